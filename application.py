@@ -2,38 +2,18 @@
 
 ####### Part 1 - Main Application Setup and Configurations  ######
 
-from flask import Flask, render_template, request, jsonify, Response, make_response
-from flask_cors import CORS
-import azure.cognitiveservices.speech as speechsdk
-from azure.cognitiveservices.speech import SpeechConfig
-import queue
-import logging
-import json
-import pyaudio
-import uuid
-import os
-
-#============================================================================================================================================
 
-
-####### Part 1 - Main Application Setup and Configurations  ######
-
-
-from flask import Flask, render_template, request, jsonify, Response, make_response
+from flask import Flask, render_template, request, jsonify, Response
 from flask_cors import CORS
 import azure.cognitiveservices.speech as speechsdk
-from azure.cognitiveservices.speech import SpeechConfig
-import queue
 import logging
 import json
 import pyaudio
-import uuid
 import os
-import tempfile
 import time
-from datetime import datetime
+import math
 from cachetools import TTLCache, LRUCache
-from collections import deque
+from collections import Counter
 import sys
 import signal
 from waitress import serve
@@ -41,30 +21,51 @@ from concurrent.futures import ThreadPoolExecutor
 from werkzeug.serving import is_running_from_reloader
 from functools import lru_cache
 import aiohttp
+import asyncio
+import itertools
 import werkzeug.serving
 from werkzeug.middleware.shared_data import SharedDataMiddleware
 from werkzeug.serving import WSGIRequestHandler
 from threading import Lock, Thread
+from translator_client import TranslatorClient, TranslationBatcher
+from translation_store import PersistentTranslationCache
+from translation_memory import TranslationMemory
+from audio_cache import AudioCache
+from synthesizer_pool import SynthesizerPool, PoolExhausted
+from room_registry import Room, RoomRegistry, RoomLimitReached
+from shared_state import LocalState, RedisState
+from interim_translation import InterimTranslations, reusable_translation
+from rate_limiter import RateLimiter, RateLimited
+from call_policy import CallPolicy, CircuitBreaker, CircuitOpen
+from utterance_coalescer import UtteranceCoalescer
+from audio_ingest import AudioIngest
+from audio_buffer import pcm16_level
+from metrics import Registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from log_config import configure_logging, SAMPLED
+import re
 
 executor = ThreadPoolExecutor(max_workers=10)
 
-# Configure logging
-log_directory = "logs"
-if not os.path.exists(log_directory):
-    os.makedirs(log_directory)
-
-current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-file_handler = logging.FileHandler(f'{log_directory}/app_{current_time}.log')
-console_handler = logging.StreamHandler(sys.stdout)
-
-log_format = logging.Formatter('%(asctime)s [%(levelname)s] %(filename)s:%(lineno)d - %(message)s')
-file_handler.setFormatter(log_format)
-console_handler.setFormatter(log_format)
-
+# Configure logging: records are written by a background thread; LOG_LEVEL=DEBUG for full detail
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# Rotation is not safe across processes: with several workers the default is stdout only,
+# and an explicit LOG_FILE gets one file per worker (app.<pid>.log)
+WORKERS = int(os.environ.get('WORKERS', 1))
+LOG_FILE = os.environ.get('LOG_FILE', os.path.join('logs', 'app.log') if WORKERS == 1 else '')  # "" logs to stdout only
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+LOG_SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', 100))  # Keep 1 in N per-message debug events
+LOG_ASYNC = os.environ.get('LOG_ASYNC', '1') != '0'
+
+log_queue_handler = configure_logging(
+    LOG_LEVEL, LOG_FILE,
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
+    sample_rate=LOG_SAMPLE_RATE,
+    use_queue=LOG_ASYNC,
+    per_process=WORKERS > 1
+)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
@@ -84,34 +85,252 @@ werkzeug.serving.WSGIRequestHandler = CustomRequestHandler
 
 # TRanslator Configuration (PAYG)
 TRANSLATOR_KEY = "2BfzkpmTCXpbQlrNHAAOsG5MiaThHsCIvRVkVzGgC61r4pZNAk1uJQQJ99AKACYeBjFXJ3w3AAAbACOG5IFN"
-TRANSLATOR_ENDPOINT = "https://api.cognitive.microsofttranslator.com"
+TRANSLATOR_ENDPOINT = os.environ.get('TRANSLATOR_ENDPOINT', "https://api.cognitive.microsofttranslator.com")
 TRANSLATOR_LOCATION = "eastus"  
 
+# Translator connection pool (one background event loop per process)
+TRANSLATOR_POOL_SIZE = int(os.environ.get('TRANSLATOR_POOL_SIZE', 100))
+TRANSLATOR_POOL_SIZE_PER_HOST = int(os.environ.get('TRANSLATOR_POOL_SIZE_PER_HOST', 0))  # 0 = no per-host limit
+TRANSLATOR_DNS_TTL = int(os.environ.get('TRANSLATOR_DNS_TTL', 300))
+TRANSLATOR_KEEPALIVE = float(os.environ.get('TRANSLATOR_KEEPALIVE', 60))
+TRANSLATOR_TIMEOUT = float(os.environ.get('TRANSLATOR_TIMEOUT', 10))
+
+# Requests arriving within this window are sent as one multi-target, multi-segment call
+TRANSLATOR_BATCH_WINDOW_MS = float(os.environ.get('TRANSLATOR_BATCH_WINDOW_MS', 5))
+TRANSLATOR_BATCH_MAX_SEGMENTS = int(os.environ.get('TRANSLATOR_BATCH_MAX_SEGMENTS', 100))
+
+# App language codes -> Translator API language codes
+TRANSLATOR_LANGUAGES = {
+    'es': 'es',
+    'en': 'en',
+    'pt': 'pt-BR',
+    'yue': 'yue-CN',  # Simplified Chinese
+    'id': 'id'
+}
+API_LANGUAGES = {api_code: lang for lang, api_code in TRANSLATOR_LANGUAGES.items()}
+
+translator_client = TranslatorClient(
+    TRANSLATOR_ENDPOINT, TRANSLATOR_KEY, TRANSLATOR_LOCATION,
+    pool_size=TRANSLATOR_POOL_SIZE,
+    pool_size_per_host=TRANSLATOR_POOL_SIZE_PER_HOST,
+    dns_ttl=TRANSLATOR_DNS_TTL,
+    keepalive_timeout=TRANSLATOR_KEEPALIVE,
+    request_timeout=TRANSLATOR_TIMEOUT
+)
+
 # Azure Speech Service configuration (Free Tier)
 #speech_key, service_region = "kB8Tt5fBgJt7r1hz4P98qx5tq55I0gvugyjhfAzPyBmHTddnN6WJJQQJ99AJACL93NaXJ3w3AAAYACOGPMpm", "australiaeast"
 
 # Azure Speech Service configuration (PAYG Tier)
 speech_key, service_region = "95zWlKeL0A5mbmIMYnrqBnudN2ImNK8jrnLM6Eq6zRwOQpA8r5FYJQQJ99AJACqBBLyXJ3w3AAAYACOGDrlz", "southeastasia"
 
+# Text-to-speech voices and synthesized audio cache
+TTS_VOICES = {
+    'pt': 'pt-BR-AntonioNeural',
+    'es': 'es-ES-AlvaroNeural',
+    'yue': 'yue-CN-YunSongNeural',
+    'id': 'id-ID-ArdiNeural'
+}
+# MP3 frames are self-delimiting, so the response can start playing before synthesis finishes
+TTS_OUTPUT_FORMAT = speechsdk.SpeechSynthesisOutputFormat.Audio24Khz48KBitRateMonoMp3
+TTS_MIMETYPE = 'audio/mpeg'
+TTS_CHUNK_SIZE = 4096
+TTS_CACHE_MAX_BYTES = int(os.environ.get('TTS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+TTS_CACHE_TTL = int(os.environ.get('TTS_CACHE_TTL', 24 * 3600))
+TTS_CACHE_DIR = os.environ.get('TTS_CACHE_DIR', os.path.join('data', 'tts_cache'))  # "" disables the disk tier
+TTS_CACHE_DISK_MAX_BYTES = int(os.environ.get('TTS_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+
+# Warm synthesizers per voice, each holding its Speech service connection open
+TTS_POOL_SIZE = int(os.environ.get('TTS_POOL_SIZE', 1))
+TTS_POOL_MAX_SIZE = int(os.environ.get('TTS_POOL_MAX_SIZE', 4))
+TTS_POOL_MAX_AGE = int(os.environ.get('TTS_POOL_MAX_AGE', 1800))
+TTS_POOL_CHECKOUT_TIMEOUT = float(os.environ.get('TTS_POOL_CHECKOUT_TIMEOUT', 10))
+
+audio_cache = AudioCache(
+    TTS_CACHE_MAX_BYTES, TTS_CACHE_TTL,
+    disk_dir=TTS_CACHE_DIR,
+    disk_max_bytes=TTS_CACHE_DISK_MAX_BYTES
+)
+
+synthesizer_pool = SynthesizerPool(
+    speech_key, service_region, TTS_VOICES.values(), TTS_OUTPUT_FORMAT,
+    size=TTS_POOL_SIZE,
+    max_size=TTS_POOL_MAX_SIZE,
+    max_age=TTS_POOL_MAX_AGE,
+    checkout_timeout=TTS_POOL_CHECKOUT_TIMEOUT
+)
+executor.submit(synthesizer_pool.warm)
+
+# Metrics (served at /metrics); children are bound once so hot paths only add to a per-thread cell
+metrics_registry = Registry()
+CACHE_HITS = metrics_registry.counter('translation_cache_hits_total', 'Translation cache hits', ['cache'])
+CACHE_MISSES = metrics_registry.counter('translation_cache_misses_total', 'Translation cache misses', ['cache'])
+CACHE_EVICTIONS = metrics_registry.counter('translation_cache_evictions_total', 'Entries removed to make room or on expiry', ['cache', 'reason'])
+TRANSLATE_LATENCY = metrics_registry.histogram('translate_text_duration_seconds', 'Translator API latency per target language', ['language'])
+TRANSLATE_FAILURES = metrics_registry.counter('translate_text_failures_total', 'Failed Translator API calls', ['language'])
+TRANSLATION_RETRY_COUNT = metrics_registry.counter('translation_retries_total', 'Translation attempts retried after a failure', ['language'])
+TRANSLATION_SHARED = metrics_registry.counter('translation_singleflight_shared_total', 'Cache misses that awaited an identical in-flight translation', ['language'])
+INTERIM_TRANSLATIONS_SENT = metrics_registry.counter('interim_translations_total', 'Interim translations published as partial messages', ['language'])
+INTERIM_REUSED = metrics_registry.counter('interim_translation_reuse_total', 'Finals that reused the last interim translation instead of the API', ['language'])
+SSE_BYTES = metrics_registry.counter('sse_bytes_sent_total', 'Bytes written to server-sent event streams', ['stream'])
+SSE_DROPPED = metrics_registry.counter('sse_dropped_messages_total', 'Messages skipped because a subscriber fell behind the hub', ['stream'])
+SSE_OPENED = metrics_registry.counter('sse_streams_opened_total', 'Server-sent event streams opened', ['stream'])
+SSE_CLOSED = metrics_registry.counter('sse_streams_closed_total', 'Server-sent event streams closed', ['stream'])
+SSE_RESUMED = metrics_registry.counter('sse_streams_resumed_total', 'Streams opened with a Last-Event-ID, by whether it was still in the replay window', ['stream', 'result'])
+SSE_REPLAYED = metrics_registry.counter('sse_replayed_messages_total', 'Messages replayed to resuming streams from the hub', ['stream'])
+MEMORY_HITS = metrics_registry.counter('translation_memory_hits_total', 'Translations served from the translation memory', ['language'])
+CACHE_HIT = {cache: CACHE_HITS.labels(cache) for cache in ('recent', 'main', 'persistent')}
+CACHE_MISS = {cache: CACHE_MISSES.labels(cache) for cache in ('recent', 'main', 'persistent')}
+
+class CountingLRUCache(LRUCache):
+    """LRUCache that counts evictions"""
+
+    def __init__(self, maxsize, name):
+        super().__init__(maxsize)
+        self._evicted = CACHE_EVICTIONS.labels(name, 'size')
+
+    def popitem(self):
+        item = super().popitem()
+        self._evicted.inc()
+        return item
+
+class CountingTTLCache(TTLCache):
+    """TTLCache that counts evictions and expirations"""
+
+    def __init__(self, maxsize, ttl, name):
+        super().__init__(maxsize, ttl)
+        self._evicted = CACHE_EVICTIONS.labels(name, 'size')
+        self._expired = CACHE_EVICTIONS.labels(name, 'expired')
+
+    def popitem(self):
+        item = super().popitem()
+        self._evicted.inc()
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        if expired:
+            self._expired.inc(len(expired))
+        return expired
+
 # Enhanced caching system
-translation_cache = TTLCache(maxsize=200000, ttl=24*360000)  # 24 hours cache
-recent_translations = LRUCache(maxsize=10000)  # Recent translations cache
+translation_cache = CountingTTLCache(maxsize=200000, ttl=24*360000, name='main')  # 24 hours cache
+recent_translations = CountingLRUCache(maxsize=10000, name='recent')  # Recent translations cache
 translation_lock = Lock()
 
+# Durable second tier shared by all workers; set TRANSLATION_CACHE_DB="" to disable
+TRANSLATION_CACHE_DB = os.environ.get('TRANSLATION_CACHE_DB', os.path.join('data', 'translation_cache.db'))
+TRANSLATION_CACHE_MAX_ROWS = int(os.environ.get('TRANSLATION_CACHE_MAX_ROWS', 200000))  # Least used rows are evicted beyond this
+persistent_cache = None
+if TRANSLATION_CACHE_DB:
+    try:
+        persistent_cache = PersistentTranslationCache(TRANSLATION_CACHE_DB, max_rows=TRANSLATION_CACHE_MAX_ROWS)
+    except Exception as e:
+        logger.error("Persistent translation cache unavailable: %s", e)
+
+# Approved translations of recurring texts (prayers, creeds, hymns), consulted before any cache or
+# API call. Every *.csv in the directory has a header of app language codes (en,es,pt,yue,id) and
+# one line of English text per row with its translations; "" disables
+TRANSLATION_MEMORY_DIR = os.environ.get('TRANSLATION_MEMORY_DIR', 'translation_memory')
+translation_memory = TranslationMemory(source='en')
+if TRANSLATION_MEMORY_DIR and os.path.isdir(TRANSLATION_MEMORY_DIR):
+    try:
+        translation_memory.load_directory(TRANSLATION_MEMORY_DIR)
+    except Exception as e:
+        logger.error("Translation memory unavailable: %s", e)
+
 # Rate limiting and debouncing
-translation_rate_limit = {
-    'requests': deque(maxlen=10000),
-    'limit': 10000,
-    'window': 60
-}
-last_translation_time = {}
-DEBOUNCE_DELAY = 1.0  # 1 second delay
+# Token buckets in front of Translator and Speech synthesis calls, in calls per minute (0 disables a scope).
+# Cache hits never take a token; over budget a call waits up to RATE_LIMIT_MAX_WAIT_MS, then fails.
+TRANSLATOR_RATE_PER_MINUTE = int(os.environ.get('TRANSLATOR_RATE_PER_MINUTE', 10000))
+TRANSLATOR_LANGUAGE_RATE_PER_MINUTE = int(os.environ.get('TRANSLATOR_LANGUAGE_RATE_PER_MINUTE', 5000))
+TRANSLATOR_CLIENT_RATE_PER_MINUTE = int(os.environ.get('TRANSLATOR_CLIENT_RATE_PER_MINUTE', 120))
+TTS_RATE_PER_MINUTE = int(os.environ.get('TTS_RATE_PER_MINUTE', 1200))
+TTS_CLIENT_RATE_PER_MINUTE = int(os.environ.get('TTS_CLIENT_RATE_PER_MINUTE', 30))
+RATE_LIMIT_BURST_SECONDS = int(os.environ.get('RATE_LIMIT_BURST_SECONDS', 5))
+RATE_LIMIT_MAX_WAIT_MS = int(os.environ.get('RATE_LIMIT_MAX_WAIT_MS', 2000))
+
+translation_limiter = RateLimiter(
+    'translator', TRANSLATOR_RATE_PER_MINUTE, TRANSLATOR_LANGUAGE_RATE_PER_MINUTE, TRANSLATOR_CLIENT_RATE_PER_MINUTE,
+    burst=RATE_LIMIT_BURST_SECONDS, max_wait=RATE_LIMIT_MAX_WAIT_MS / 1000
+)
+tts_limiter = RateLimiter(
+    'tts', TTS_RATE_PER_MINUTE, per_client_per_minute=TTS_CLIENT_RATE_PER_MINUTE,
+    burst=RATE_LIMIT_BURST_SECONDS, max_wait=RATE_LIMIT_MAX_WAIT_MS / 1000
+)
+# Finals posted to /translate_realtime are joined per client and language before translating
+COALESCE_MIN_WINDOW_MS = int(os.environ.get('COALESCE_MIN_WINDOW_MS', 200))
+COALESCE_MAX_WINDOW_MS = int(os.environ.get('COALESCE_MAX_WINDOW_MS', 2500))  # Also the longest wait for a sentence end
+
+# Translator call policy: retries with jittered exponential backoff (Retry-After on 429),
+# a circuit breaker that fails fast while the API keeps failing, and optional hedging
+TRANSLATION_RETRIES = int(os.environ.get('TRANSLATION_RETRIES', 3))
+TRANSLATION_BACKOFF_BASE_MS = int(os.environ.get('TRANSLATION_BACKOFF_BASE_MS', 250))
+TRANSLATION_BACKOFF_MAX_MS = int(os.environ.get('TRANSLATION_BACKOFF_MAX_MS', 4000))
+TRANSLATION_DEADLINE_MS = int(os.environ.get('TRANSLATION_DEADLINE_MS', 15000))  # No retry may start after this
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))  # Consecutive failures that open it
+CIRCUIT_RESET_TIMEOUT = int(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))  # Seconds before a probe call
+TRANSLATION_HEDGE = os.environ.get('TRANSLATION_HEDGE', '0') == '1'  # Race a second call past the p95 latency
+
+SUPPORTED_LANGUAGES = ['en', 'es', 'pt', 'yue', 'id']
+# Hub sizes are also how far back a reconnecting listener can resume (Last-Event-ID)
+TRANSCRIPTION_HUB_SIZE = 1024  # Interim results arrive several times per second
+TRANSLATION_HUB_SIZE = 256
+SSE_KEEPALIVE_INTERVAL = 1  # Seconds between keepalive events on idle streams
+CLIENT_IDLE_TIMEOUT = 30  # Close translation streams with no messages for this long
+CLIENT_EXPIRY_INTERVAL = 5  # Seconds between expiry sweeps of idle clients
+CLIENT_SUMMARY_INTERVAL = 30  # Seconds between client count log lines
+
+# Interim translations of partial hypotheses, throttled per room and language
+INTERIM_TRANSLATIONS = os.environ.get('INTERIM_TRANSLATIONS', '1') == '1'
+INTERIM_MIN_INTERVAL_MS = int(os.environ.get('INTERIM_MIN_INTERVAL_MS', 500))  # When many words changed
+INTERIM_MAX_INTERVAL_MS = int(os.environ.get('INTERIM_MAX_INTERVAL_MS', 2000))  # When a single word changed
+INTERIM_WORD_STEP = int(os.environ.get('INTERIM_WORD_STEP', 4))  # New words that earn the shortest interval
+
+# Rooms: one per concurrent broadcast, selected with the session_id query parameter
+DEFAULT_SESSION_ID = 'default'
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+MAX_ROOMS = int(os.environ.get('MAX_ROOMS', 50))
+ROOM_IDLE_TIMEOUT = int(os.environ.get('ROOM_IDLE_TIMEOUT', 600))  # Evict rooms with no broadcast or listeners
+
+# Captured server-microphone audio waits in a fixed ring per room (16 kHz 16-bit mono is 32 KB/s)
+AUDIO_BUFFER_SECONDS = int(os.environ.get('AUDIO_BUFFER_SECONDS', 5))
+AUDIO_BUFFER_POLICY = os.environ.get('AUDIO_BUFFER_POLICY', 'drop_oldest')  # or 'block' to stall capture instead
+
+# State every worker and instance must agree on: stream fan-out, translation cache entries and
+# the client registry. "" keeps it in this process, which then has to be the only worker; a
+# redis:// URL (any Redis-compatible server) lets gunicorn workers and instances share rooms.
+SHARED_STATE_URL = os.environ.get('SHARED_STATE_URL', '')
+SHARED_STATE_PREFIX = os.environ.get('SHARED_STATE_PREFIX', 'church-app:')
+SHARED_CACHE_TTL = int(os.environ.get('SHARED_CACHE_TTL', 24 * 3600))  # Seconds a shared translation is kept
+if SHARED_STATE_URL:
+    shared_state = RedisState(SHARED_STATE_URL, SHARED_STATE_PREFIX,
+                              cache_ttl=SHARED_CACHE_TTL, client_ttl=CLIENT_IDLE_TIMEOUT)
+else:
+    shared_state = LocalState(translation_cache)
+
+def create_room(session_id):
+    room = Room(
+        session_id, SUPPORTED_LANGUAGES, TRANSCRIPTION_HUB_SIZE, TRANSLATION_HUB_SIZE,
+        AUDIO_BUFFER_SECONDS * 32000, AUDIO_BUFFER_POLICY,
+        InterimTranslations(INTERIM_MIN_INTERVAL_MS / 1000, INTERIM_MAX_INTERVAL_MS / 1000, INTERIM_WORD_STEP),
+        CLIENT_IDLE_TIMEOUT, stamp_event_id, shared_state.sequence
+    )
+    room.coalescer = UtteranceCoalescer(
+        lambda: translator_client.loop,
+        lambda key, text: translate_coalesced(room, key, text),
+        min_window=COALESCE_MIN_WINDOW_MS / 1000,
+        max_window=COALESCE_MAX_WINDOW_MS / 1000
+    )
+    return room
+
+rooms = RoomRegistry(
+    create_room,
+    max_rooms=MAX_ROOMS,
+    idle_timeout=ROOM_IDLE_TIMEOUT
+)
 
 # Global variables
-is_streaming = False
-transcription_queue = queue.Queue()
-audio_queue = queue.Queue()
-connected_clients = {}
 cleanup_done = False
 
 # Audio settings
@@ -120,6 +339,14 @@ FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 16000
 
+# Browser audio ingest (WebSocket /ingest_audio, ASGI mode only)
+INGEST_FORMATS = {
+    'pcm16': RATE * CHANNELS * 2 // 1000,  # bytes per millisecond of raw 16-bit PCM
+    'opus': 4                               # ~32 kbit/s WebM/Opus from MediaRecorder
+}
+INGEST_MAX_BUFFER_MS = int(os.environ.get('INGEST_MAX_BUFFER_MS', 2000))  # Stop reading the socket beyond this
+INGEST_PREFILL_MS = int(os.environ.get('INGEST_PREFILL_MS', 100))  # Jitter buffer filled before recognition starts
+
 
 
 #######  Part 2: Core Functions (translation, normalization, client management  ########
@@ -127,17 +354,33 @@ RATE = 16000
 
 
 def check_client_connections():
-    """Periodically check and log client connection status"""
+    """Expire idle clients and periodically log how many are connected"""
+    next_summary = time.time() + CLIENT_SUMMARY_INTERVAL
     while True:
         try:
-            current_clients = list(connected_clients.keys())
-            logger.info(f"Active clients: {current_clients}")
-            for client_id in current_clients:
-                if client_id not in connected_clients:
-                    logger.warning(f"Client {client_id} disconnected")
-            time.sleep(30)  # Check every 30 seconds
+            time.sleep(CLIENT_EXPIRY_INTERVAL)
+            now = time.time()
+            for room in rooms.rooms():
+                expired = room.clients.expire(now)
+                if expired:
+                    logger.info("Expired %d idle clients in room %s", len(expired), room.session_id)
+                    room.touch()
+                if shared_state.networked:
+                    # Keep this process's clients live for the others; expired ones simply lapse
+                    shared_state.add_clients(room.session_id, [
+                        (client.client_id, client.target_language, client.last_active)
+                        for client in room.clients.records()
+                    ])
+            if now >= next_summary:
+                next_summary = now + CLIENT_SUMMARY_INTERVAL
+                counts = Counter()
+                for room in rooms.rooms():
+                    counts.update(room.clients.counts())
+                logger.info("Active clients: %d in %d rooms %s", sum(counts.values()), len(rooms), dict(counts))
+                translation_limiter.prune()
+                tts_limiter.prune()
         except Exception as e:
-            logger.error(f"Error checking client connections: {str(e)}")
+            logger.error("Error checking client connections: %s", e)
 
 # Start the connection checker in a separate thread
 Thread(target=check_client_connections, daemon=True).start()
@@ -147,92 +390,486 @@ def normalize_text(text):
     """Normalize text to reduce duplicate translations"""
     return ' '.join(text.lower().split())
 
-def send_translation_to_client(client_id, translation, is_final):
-    """Send translation to client through queue"""
+def send_translation_to_client(room, client_id, translation, is_final):
+    """Send translation to a single client through its room's language hub"""
     try:
-        if client_id in connected_clients:
-            logger.debug(f"Sending translation to client {client_id}: {translation}")
-            translation_queue = connected_clients[client_id]['translation_queue']
-            message = {
+        client = room.clients.get(client_id)
+        # The client's stream may be held by another worker
+        language = client.target_language if client else shared_state.client_language(room.session_id, client_id)
+        if language:
+            logger.debug("Sending translation to client %s: %s", client_id, translation, extra=SAMPLED)
+            frame = format_sse({
                 'type': 'final' if is_final else 'partial',
                 'translation': translation
-            }
-            translation_queue.put(message)
-            logger.debug(f"Translation sent successfully to client {client_id}")
+            })
+            publish_frame(room, language, frame, recipient=client_id)
+            logger.debug("Translation sent successfully to client %s", client_id, extra=SAMPLED)
         else:
-            logger.warning(f"Client {client_id} not found in connected_clients")
+            logger.warning("Client %s is not connected", client_id)
     except Exception as e:
-        logger.error(f"Error sending translation to client {client_id}: {str(e)}")
-
-async def translate_text(text, target_language):
-    """Perform the actual translation"""
-    logger.info(f"Starting translation request - Text: '{text}', Target language: {target_language}")
-    
-    language_map = {
-        'es': 'es',
-        'en': 'en',
-        'pt': 'pt-BR',
-        'yue': 'yue-CN',  # Simplified Chinese
-        'id': 'id'
-    }
+        logger.error("Error sending translation to client %s: %s", client_id, e)
+
+def broadcast_translation(room, target_language, translation, is_final):
+    """Publish a translation once for every subscriber of a language in a room"""
+    frame = format_sse({
+        'type': 'final' if is_final else 'partial',
+        'translation': translation
+    })
+    publish_frame(room, target_language, frame)
+
+def publish_frame(room, stream, frame, recipient=None):
+    """Publish an encoded frame to a room's transcription hub or a language hub in every process"""
+    shared_state.publish(f"{room.session_id}:{stream}", frame, recipient)
+
+def deliver_frame(channel, frame, recipient, seq):
+    """Put a published frame into this process's copy of the hub, if the room is open here"""
+    session_id, _, stream = channel.rpartition(':')
+    room = rooms.peek(session_id)
+    if room is None:
+        return
+    if stream == 'control':
+        if frame == b'stop':
+            if shared_state.networked:
+                # Off the subscriber thread: stopping recognition waits for its last results
+                executor.submit(stop_capture, room)
+            else:
+                stop_capture(room)
+        return
+    hub = room.transcription_hub if stream == 'transcription' else room.translation_hubs.get(stream)
+    if hub is not None:
+        hub.publish(frame, recipient, seq)
+
+async def translate_text(text, target_language, interim=False, client=None):
+    """Perform the actual translation (runs on the translator client's event loop).
+
+    Interim hypotheses go through their own batcher so their results are not cached,
+    and are skipped rather than queued when the rate limit is reached.
+    """
+    logger.info("Starting translation request - Text: '%s', Target language: %s", text, target_language)
     
-    target_lang = language_map.get(target_language)
+    target_lang = TRANSLATOR_LANGUAGES.get(target_language)
     if not target_lang:
-        logger.error(f"Invalid target language requested: {target_language}")
+        logger.error("Invalid target language requested: %s", target_language)
         raise ValueError(f"Invalid target language: {target_language}")
 
-    endpoint = f'{TRANSLATOR_ENDPOINT}/translate'
-    params = {
-        'api-version': '3.0',
-        'to': target_lang
-    }
-    headers = {
-        'Ocp-Apim-Subscription-Key': TRANSLATOR_KEY,
-        'Ocp-Apim-Subscription-Region': TRANSLATOR_LOCATION,
-        'Content-type': 'application/json'
-    }
-    body = [{
-        'text': text
-    }]
-
+    await translation_limiter.acquire_async(target_language, client, max_wait=0 if interim else None)
+    started = time.perf_counter()
     try:
-        async with aiohttp.ClientSession() as session:
-            logger.debug(f"Making API request to {endpoint}")
-            logger.debug(f"Request params: {params}")
-            logger.debug(f"Request body: {body}")
-            
-            async with session.post(endpoint, params=params, headers=headers, json=body) as response:
-                logger.debug(f"Response status: {response.status}")
-                response.raise_for_status()
-                
-                result = await response.json()
-                logger.debug(f"Raw API response: {result}")
-                
-                translation = result[0]['translations'][0]['text']
-                logger.debug(f"Extracted translation: {translation}")
-                logger.info(f"Translation completed successfully - Original: '{text}' -> Translation: '{translation}' ({target_language})")
-                return translation
+        logger.debug("Queueing batched API request to %s/translate (%s)", TRANSLATOR_ENDPOINT, target_lang)
+        batcher = interim_batcher if interim else translation_batcher
+        translation = await batcher.translate(text, target_lang)
+        TRANSLATE_LATENCY.labels(target_language).observe(time.perf_counter() - started)
+        logger.debug("Extracted translation: %s", translation)
+        logger.info("Translation completed successfully - Original: '%s' -> Translation: '%s' (%s)", text, translation, target_language)
+        return translation
+    except CircuitOpen:
+        # Shed without a call; the breaker counts these
+        raise
     except aiohttp.ClientError as e:
-        logger.error(f"API request failed: {str(e)}")
+        TRANSLATE_FAILURES.labels(target_language).inc()
+        logger.error("API request failed: %s", e)
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during translation: {str(e)}")
+        TRANSLATE_FAILURES.labels(target_language).inc()
+        logger.error("Unexpected error during translation: %s", e)
         raise
 
-def safe_delete_file(filepath, max_retries=3, delay=0.1):
-    """Safely delete a file with retries."""
-    for attempt in range(max_retries):
+async def get_cached_translation(normalized_text, target_language):
+    """Look up a translation in the recent, main and persistent caches"""
+    cache_key = f"{normalized_text}:{target_language}"
+    translation = recent_translations.get(cache_key)
+    if translation is not None:
+        CACHE_HIT['recent'].inc()
+        logger.debug("Translation found in recent cache", extra=SAMPLED)
+    else:
+        CACHE_MISS['recent'].inc()
+        translation = await shared_state.cache_get(cache_key)
+        if translation is not None:
+            CACHE_HIT['main'].inc()
+            logger.debug("Translation found in main cache", extra=SAMPLED)
+            recent_translations[cache_key] = translation
+        else:
+            CACHE_MISS['main'].inc()
+
+    if translation is not None:
+        if persistent_cache:
+            persistent_cache.touch(normalized_text, target_language)
+        return translation
+
+    if persistent_cache:
+        translation = persistent_cache.get(normalized_text, target_language)
+        if translation is None:
+            CACHE_MISS['persistent'].inc()
+        else:
+            CACHE_HIT['persistent'].inc()
+            logger.debug("Translation found in persistent cache", extra=SAMPLED)
+            with translation_lock:
+                recent_translations[cache_key] = translation
+            shared_state.cache_set(cache_key, translation)
+    return translation
+
+def store_translation(normalized_text, target_language, translation):
+    """Store a translation in every cache tier"""
+    cache_key = f"{normalized_text}:{target_language}"
+    with translation_lock:
+        recent_translations[cache_key] = translation
+    shared_state.cache_set(cache_key, translation)
+    if persistent_cache:
+        persistent_cache.put(normalized_text, target_language, translation)
+
+def warm_translation_cache():
+    """Load the most used persistent entries into the in-memory LRU"""
+    if not persistent_cache:
+        return
+    rows = persistent_cache.hottest(recent_translations.maxsize)
+    # Insert coldest first so the hottest entries end up most recently used
+    for text, language, translation in reversed(rows):
+        recent_translations[f"{text}:{language}"] = translation
+    logger.info("Warmed translation cache with %s persistent entries", len(rows))
+
+def format_sse(payload):
+    """Encode a payload as a server-sent event frame.
+
+    Hubs store these bytes, so an event is serialized once when it is published and
+    every subscriber writes the same object.
+    """
+    return f"data: {json.dumps(payload)}\n\n".encode('utf-8')
+
+SSE_KEEPALIVE = format_sse({'keepalive': True})
+
+def stamp_event_id(seq, frame):
+    """Prefix an encoded frame with its hub sequence number as the event ID"""
+    return b'id: %d\n' % seq + frame
+
+def last_event_id(headers, args):
+    """Event ID a reconnecting stream resumes after, or None.
+
+    EventSource sends the Last-Event-ID header when it reconnects by itself; pages
+    that open a new EventSource pass it as the last_event_id query parameter.
+    """
+    value = headers.get('Last-Event-ID') or args.get('last_event_id')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def subscribe_stream(hub, stream, last_seq):
+    """Return a hub cursor for a new stream, resuming after `last_seq` when it is still replayable"""
+    cursor = hub.subscribe(last_seq)
+    if last_seq is not None:
+        replayed = hub.head - cursor
+        SSE_RESUMED.labels(stream, 'replayed' if cursor == last_seq else 'expired').inc()
+        SSE_REPLAYED.labels(stream).inc(replayed)
+        logger.debug("Stream resumed after event %s, replaying %s messages", last_seq, replayed, extra=SAMPLED)
+    return cursor
+
+def resolve_room(session_id, create=True):
+    """Return the room for a session ID, the default room when none is given.
+
+    Raises ValueError for malformed session IDs and RoomLimitReached when full.
+    """
+    session_id = session_id or DEFAULT_SESSION_ID
+    if not SESSION_ID_PATTERN.match(session_id):
+        raise ValueError(f"Invalid session_id: {session_id}")
+    if create:
+        return rooms.get_or_create(session_id)
+    return rooms.get(session_id)
+
+def register_client(room, client_id, target_language, cursor=None):
+    """Register a translation stream subscriber; a reconnect replaces the previous stream's record"""
+    logger.info("Creating new client connection: %s (room %s)", client_id, room.session_id)
+    if cursor is None:
+        cursor = room.translation_hubs[target_language].head
+    record = room.clients.register(client_id, target_language, cursor)
+    shared_state.add_clients(room.session_id, [(client_id, target_language, record.last_active)])
+    return record
+
+def remove_client(room, client_id, record=None):
+    """Forget a disconnected translation stream subscriber, unless it has reconnected since"""
+    record = record or room.clients.get(client_id)
+    if record is not None and room.clients.remove(client_id, record):
         try:
-            if os.path.exists(filepath):
-                os.unlink(filepath)
-                return True
+            shared_state.remove_client(room.session_id, client_id, record.target_language)
         except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(delay)
-                continue
-            logger.warning(f"Failed to delete file {filepath} after {max_retries} attempts: {str(e)}")
-            return False
-    return False
+            # The shared entry lapses after CLIENT_IDLE_TIMEOUT anyway
+            logger.error("Error removing client %s from shared state: %s", client_id, e)
+    room.touch()
+
+def get_subscribed_languages(room):
+    """Return the set of target languages that currently have connected clients in a room, in any process"""
+    return room.clients.languages() | shared_state.languages(room.session_id, SUPPORTED_LANGUAGES)
+
+# Cache misses being translated right now, keyed by (normalized text, language).
+# Only touched on the translator loop, so it needs no lock.
+translations_in_flight = {}
+
+def remembered_translation(text, target_language):
+    """Approved translation of a line from the translation memory, or None"""
+    if not translation_memory:
+        return None
+    translation = translation_memory.lookup(text, target_language)
+    if translation is not None:
+        MEMORY_HITS.labels(target_language).inc()
+    return translation
+
+async def translate_for_language(normalized_text, target_language, client=None):
+    """Translate normalized text through the memory and caches, sharing one API call among concurrent misses"""
+    translation = remembered_translation(normalized_text, target_language)
+    if translation is not None:
+        return translation
+    translation = await get_cached_translation(normalized_text, target_language)
+    if translation is not None:
+        return translation
+
+    key = (normalized_text, target_language)
+    future = translations_in_flight.get(key)
+    if future is not None:
+        TRANSLATION_SHARED.labels(target_language).inc()
+        # Shielded so one waiter going away does not cancel the call for the others
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    translations_in_flight[key] = future
+    try:
+        translation = await request_translation(normalized_text, target_language, client)
+        future.set_result(translation)
+        return translation
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark it retrieved, so a miss nobody else joined does not log "exception never retrieved"
+        future.exception()
+        raise
+    finally:
+        del translations_in_flight[key]
+
+async def request_translation(normalized_text, target_language, client=None):
+    """Call the API for a cache miss, and cache the result"""
+    # Retries and the circuit breaker apply to the whole batched request, in translation_batcher
+    translation = await translate_text(normalized_text, target_language, client=client)
+    store_translation(normalized_text, target_language, translation)
+    return translation
+
+async def translate_final(normalized_text, target_language, reusable):
+    """Translate a final utterance, reusing the interim translation of the same text"""
+    translation = remembered_translation(normalized_text, target_language)
+    if translation is not None:
+        return translation
+    translation = reusable_translation(reusable, target_language, normalized_text)
+    if translation is not None:
+        INTERIM_REUSED.labels(target_language).inc()
+        store_translation(normalized_text, target_language, translation)
+        return translation
+    return await translate_for_language(normalized_text, target_language)
+
+async def fan_out_translation(room, text, reusable=None):
+    """Translate a final utterance once per subscribed language and publish it to that language's hub"""
+    # Languages subscribed in other processes are looked up in shared state
+    subscribed = await shared_state.run(get_subscribed_languages, room)
+    languages = [lang for lang in subscribed if lang != 'en']
+    if not languages:
+        return
+
+    normalized_text = normalize_text(text)
+    logger.debug("Fanning out translation of '%s' to languages: %s", normalized_text, languages)
+    results = await asyncio.gather(
+        *(translate_final(normalized_text, lang, reusable or {}) for lang in languages),
+        return_exceptions=True
+    )
+
+    for lang, result in zip(languages, results):
+        if isinstance(result, Exception):
+            logger.error("Fan-out translation to %s failed: %s", lang, result)
+            continue
+        broadcast_translation(room, lang, result, True)
+
+def schedule_fan_out(room, text):
+    """Queue a final utterance for server-side translation fan-out in its room"""
+    # Ends the utterance's interim translations even when the final is empty
+    reusable = room.interim.finalize()
+    if text and text.strip():
+        room.fanout_executor.submit(translator_client.run, fan_out_translation(room, text, reusable))
+
+async def translate_coalesced(room, key, text):
+    """Translate finals joined by a room's coalescer and send the result to the client that posted them"""
+    client_id, target_language = key
+    normalized_text = normalize_text(text)
+    started = time.perf_counter()
+    try:
+        translation = await translate_for_language(normalized_text, target_language, client_id)
+    except RateLimited as e:
+        logger.warning("Translation for %s shed by rate limit: %s", client_id, e)
+        return
+    except CircuitOpen as e:
+        logger.warning("Translation for %s skipped, circuit open: %s", client_id, e)
+        return
+    except Exception as e:
+        logger.error("Translation failed after %s attempts: %s", TRANSLATION_RETRIES, e)
+        return
+    room.coalescer.observe_latency(time.perf_counter() - started)
+    # Looking up a client served by another worker waits on shared state
+    await shared_state.run(send_translation_to_client, room, client_id, translation, True)
+
+async def translate_interim(room, target_language, token):
+    """Translate one partial hypothesis and publish what changed as a `partial` message"""
+    translation = remembered_translation(token[1], target_language)
+    try:
+        if translation is None:
+            # Best effort: interim_batcher makes one attempt, no hedge, and nothing while the circuit is open
+            translation = await translate_text(token[1], target_language, interim=True)
+    except (RateLimited, CircuitOpen) as e:
+        room.interim.fail(target_language, token)
+        logger.debug("Interim translation to %s skipped: %s", target_language, e, extra=SAMPLED)
+        return
+    except Exception as e:
+        room.interim.fail(target_language, token)
+        logger.warning("Interim translation to %s failed: %s", target_language, e)
+        return
+    message = room.interim.complete(target_language, token, translation)
+    if message:
+        INTERIM_TRANSLATIONS_SENT.labels(target_language).inc()
+        publish_frame(room, target_language, format_sse(message))
+
+def schedule_interim_translation(room, text, languages=None):
+    """Start interim translations of a partial hypothesis for languages that are due one"""
+    if not INTERIM_TRANSLATIONS or not text or not text.strip():
+        return
+    # Hypotheses rarely repeat, so keep them out of normalize_text's cache
+    hypothesis = normalize_text.__wrapped__(text)
+    if languages is None:
+        languages = [lang for lang in get_subscribed_languages(room) if lang != 'en']
+    for lang in languages:
+        token = room.interim.begin(lang, hypothesis)
+        if token:
+            translator_client.submit(translate_interim(room, lang, token))
+
+def cache_batched_translation(text, api_language, translation):
+    """Cache every pair returned by a batched request, including those other callers asked for"""
+    target_language = API_LANGUAGES.get(api_language)
+    if target_language:
+        store_translation(text, target_language, translation)
+
+def log_batch_retry(api_languages, attempt, delay, error):
+    """Count a retried batch request once for each of its languages"""
+    for api_language in api_languages:
+        TRANSLATION_RETRY_COUNT.labels(API_LANGUAGES.get(api_language, api_language)).inc()
+    logger.warning("Translation attempt %s for %s failed: %s, retrying in %.2fs",
+                   attempt, ','.join(api_languages), error, delay)
+
+translation_policy = CallPolicy(
+    retries=TRANSLATION_RETRIES,
+    base_delay=TRANSLATION_BACKOFF_BASE_MS / 1000,
+    max_delay=TRANSLATION_BACKOFF_MAX_MS / 1000,
+    deadline=TRANSLATION_DEADLINE_MS / 1000,
+    breaker=CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT),
+    hedge=TRANSLATION_HEDGE
+)
+
+translation_batcher = TranslationBatcher(
+    translator_client,
+    window=TRANSLATOR_BATCH_WINDOW_MS / 1000,
+    max_segments=TRANSLATOR_BATCH_MAX_SEGMENTS,
+    on_result=cache_batched_translation,
+    policy=translation_policy,
+    on_retry=log_batch_retry
+)
+interim_batcher = TranslationBatcher(
+    translator_client,
+    window=TRANSLATOR_BATCH_WINDOW_MS / 1000,
+    max_segments=TRANSLATOR_BATCH_MAX_SEGMENTS,
+    policy=translation_policy,
+    retries=1,
+    hedge=False
+)
+
+warm_translation_cache()
+shared_state.start(deliver_frame)
+
+def normalize_cache_stats():
+    info = normalize_text.cache_info()
+    # Every miss inserts an entry, so whatever is no longer held was evicted
+    return {'hits': info.hits, 'misses': info.misses, 'evictions': info.misses - info.currsize}
+
+def connected_clients_by_language():
+    counts = {lang: 0 for lang in SUPPORTED_LANGUAGES}
+    for room in rooms.rooms():
+        for lang, count in room.clients.counts().items():
+            counts[lang] += count
+    return counts
+
+def client_lag_by_language(aggregate):
+    """Messages published to a language hub that its clients have not yet been sent"""
+    lags = {lang: 0 for lang in SUPPORTED_LANGUAGES}
+    for room in rooms.rooms():
+        for client in room.clients.records():
+            lang = client.target_language
+            lag = room.translation_hubs[lang].head - client.cursor
+            lags[lang] = aggregate(lags[lang], lag)
+    return lags
+
+def audio_buffer_stats(stat):
+    return {room.session_id: getattr(room.audio_buffer, stat) for room in rooms.rooms()}
+
+def active_streams():
+    return {stream: SSE_OPENED.labels(stream).value - SSE_CLOSED.labels(stream).value
+            for stream in ('transcription', 'translation')}
+
+metrics_registry.gauge_counter('normalize_text_cache_hits_total', 'normalize_text lru_cache hits', lambda: normalize_cache_stats()['hits'])
+metrics_registry.gauge_counter('normalize_text_cache_misses_total', 'normalize_text lru_cache misses', lambda: normalize_cache_stats()['misses'])
+metrics_registry.gauge_counter('normalize_text_cache_evictions_total', 'normalize_text lru_cache evictions', lambda: normalize_cache_stats()['evictions'])
+metrics_registry.gauge('translation_cache_entries', 'Entries held per translation cache tier',
+                       lambda: {'main': len(translation_cache), 'recent': len(recent_translations)}, ['cache'])
+metrics_registry.gauge('translation_memory_entries', 'Approved translations loaded per language',
+                       translation_memory.counts, ['language'])
+metrics_registry.gauge('connected_clients', 'Connected translation stream clients', connected_clients_by_language, ['language'])
+metrics_registry.gauge('translation_stream_lag_messages_max', 'Largest backlog of unsent messages for one client',
+                       lambda: client_lag_by_language(max), ['language'])
+metrics_registry.gauge('translation_stream_lag_messages', 'Unsent messages summed over all clients',
+                       lambda: client_lag_by_language(lambda total, lag: total + lag), ['language'])
+metrics_registry.gauge('sse_active_streams', 'Open server-sent event streams', active_streams, ['stream'])
+metrics_registry.gauge('rooms', 'Active broadcast rooms', lambda: len(rooms))
+metrics_registry.gauge_counter('audio_buffer_overflows_total', 'Audio frames written while the capture buffer was full',
+                               lambda: audio_buffer_stats('overflows'), ['room'])
+metrics_registry.gauge_counter('audio_buffer_dropped_bytes_total', 'Captured audio lost to a full buffer (overwritten or not written)',
+                               lambda: audio_buffer_stats('dropped_bytes'), ['room'])
+metrics_registry.gauge_counter('utterances_coalesced_total', "Finals joined into an earlier final's translation request",
+                               lambda: {room.session_id: room.coalescer.coalesced for room in rooms.rooms()}, ['room'])
+metrics_registry.gauge_counter('translation_store_evictions_total', 'Least used rows deleted from the persistent translation cache',
+                               lambda: persistent_cache.evicted if persistent_cache else 0)
+metrics_registry.gauge('translations_in_flight', 'Distinct translation cache misses waiting on the API', lambda: len(translations_in_flight))
+metrics_registry.gauge('translator_circuit_open', 'Translator circuit breaker state (0 closed, 0.5 half-open, 1 open)',
+                       lambda: {'closed': 0, 'half_open': 0.5, 'open': 1}[translation_policy.breaker.state])
+metrics_registry.gauge_counter('translator_circuit_opens_total', 'Times the Translator circuit breaker opened',
+                               lambda: translation_policy.breaker.opens)
+metrics_registry.gauge_counter('translator_circuit_rejected_total', 'Translator calls failed fast while the circuit was open',
+                               lambda: translation_policy.breaker.rejected)
+metrics_registry.gauge_counter('translator_throttled_requests_total', 'Translator requests answered 429, retried without counting against the circuit',
+                               lambda: translation_policy.throttled)
+metrics_registry.gauge_counter('translator_hedged_requests_total', 'Second Translator attempts started past the p95 latency',
+                               lambda: translation_policy.hedges)
+metrics_registry.gauge_counter('translator_hedge_wins_total', 'Hedged attempts that finished first',
+                               lambda: translation_policy.hedge_wins)
+metrics_registry.gauge('rate_limit_tokens', 'Tokens left in the global and per-language rate limit buckets',
+                       lambda: {(limiter.name,) + key: tokens for limiter in (translation_limiter, tts_limiter)
+                                for key, tokens in limiter.available().items()}, ['limiter', 'scope', 'language'])
+metrics_registry.gauge_counter('rate_limit_queued_total', 'Calls that waited for a rate limit bucket to refill',
+                               lambda: {(limiter.name, scope): count for limiter in (translation_limiter, tts_limiter)
+                                        for scope, count in limiter.queued.items()}, ['limiter', 'scope'])
+metrics_registry.gauge_counter('rate_limit_rejected_total', 'Calls refused because a rate limit bucket stayed empty',
+                               lambda: {(limiter.name, scope): count for limiter in (translation_limiter, tts_limiter)
+                                        for scope, count in limiter.rejected.items()}, ['limiter', 'scope'])
+metrics_registry.gauge('audio_input_level_dbfs', 'RMS level of the latest captured audio',
+                       lambda: {room.session_id: room.audio_level for room in rooms.rooms() if room.is_streaming}, ['room'])
+metrics_registry.gauge_counter('log_records_dropped_total', 'Log records dropped because the log queue was full',
+                               lambda: log_queue_handler.dropped if log_queue_handler else 0)
+metrics_registry.gauge_counter('tts_cache_hits_total', 'Synthesized speech cache hits', lambda: audio_cache.hits)
+metrics_registry.gauge_counter('tts_cache_misses_total', 'Synthesized speech cache misses', lambda: audio_cache.misses)
+metrics_registry.gauge('tts_pool_synthesizers', 'Pooled synthesizers per voice and state',
+                       lambda: {(voice, state): count for voice, (created, idle) in synthesizer_pool.stats().items()
+                                for state, count in (('created', created), ('idle', idle))},
+                       ['voice', 'state'])
 
 
 
@@ -246,18 +883,28 @@ def safe_delete_file(filepath, max_retries=3, delay=0.1):
 def home():
     return render_template('index.html')
 
+def room_error_response(error):
+    """Map a room lookup failure to an HTTP error"""
+    if isinstance(error, RoomLimitReached):
+        logger.error("Cannot open room: %s", error)
+        return jsonify({'error': 'Too many active sessions, try again later'}), 503
+    logger.error(str(error))
+    return jsonify({'error': str(error)}), 400
+
 @app.route('/go_live')
 def go_live():
-    logger.info("Go live page requested")
-    return render_template('go_live1.html')
+    session_id = request.args.get('session_id') or DEFAULT_SESSION_ID
+    logger.info("Go live page requested for room %s", session_id)
+    return render_template('go_live1.html', session_id=session_id)
 
 @app.route('/join_live')
 def join_live():
-    logger.info("Join live page requested")
-    return render_template('join_live.html')
+    session_id = request.args.get('session_id') or DEFAULT_SESSION_ID
+    logger.info("Join live page requested for room %s", session_id)
+    return render_template('join_live.html', session_id=session_id)
 
 @app.route('/translate_realtime', methods=['POST'])
-async def translate_realtime():
+def translate_realtime():
     logger.info("Real-time translation endpoint called")
     try:
         data = request.get_json()
@@ -265,87 +912,80 @@ async def translate_realtime():
         target_language = data.get('targetLanguage', '')
         client_id = data.get('clientId')
         is_final = data.get('isFinal', False)
+        session_id = data.get('sessionId') or request.args.get('session_id')
 
-        logger.debug(f"Received translation request - Text: '{text}', Target: {target_language}, Client: {client_id}, Final: {is_final}")
+        logger.debug("Received translation request - Text: '%s', Target: %s, Client: %s, Final: %s", text, target_language, client_id, is_final)
 
         if not text or not target_language or not client_id:
             logger.debug("Missing required parameters")
             return jsonify({'success': True})
 
-        if not is_final:
-            logger.debug("Skipping non-final transcription")
-            return jsonify({'success': True})
-
-        normalized_text = normalize_text(text)
-        logger.debug(f"Normalized text: '{normalized_text}'")
-
-        current_time = time.time()
-        client_key = f"{client_id}:{target_language}"
-        if client_key in last_translation_time:
-            time_since_last = current_time - last_translation_time[client_key]
-            logger.debug(f"Time since last translation for {client_key}: {time_since_last}s")
-            if time_since_last < DEBOUNCE_DELAY:
-                logger.debug(f"Debouncing translation request for {client_key}")
-                return jsonify({'success': True})
-
-        last_translation_time[client_key] = current_time
+        try:
+            room = resolve_room(session_id, create=False)
+            if room is None and shared_state.client_language(session_id or DEFAULT_SESSION_ID, client_id):
+                # The client's stream is held by another worker; its translation is published from here
+                room = resolve_room(session_id)
+        except (ValueError, RoomLimitReached) as e:
+            return room_error_response(e)
+        if room is None:
+            logger.warning("Translation requested for unknown room %s", session_id)
+            return jsonify({'error': 'Unknown session'}), 404
 
-        cache_key = f"{normalized_text}:{target_language}"
-        logger.debug(f"Checking cache with key: {cache_key}")
-        
-        if cache_key in recent_translations:
-            logger.debug("Translation found in recent cache")
-            translation = recent_translations[cache_key]
-            send_translation_to_client(client_id, translation, is_final)
+        if not is_final:
+            # Throttled per language, so every listener posting the same hypothesis costs one call
+            if target_language in room.translation_hubs and target_language != 'en':
+                schedule_interim_translation(room, text, [target_language])
             return jsonify({'success': True})
 
-        if cache_key in translation_cache:
-            logger.debug("Translation found in main cache")
-            translation = translation_cache[cache_key]
-            recent_translations[cache_key] = translation
-            send_translation_to_client(client_id, translation, is_final)
-            return jsonify({'success': True})
+        if target_language not in room.translation_hubs:
+            logger.error("Invalid target language requested: %s", target_language)
+            return jsonify({'error': 'Invalid language code'}), 400
 
-        logger.debug("No cache hit, proceeding with translation")
-        retries = 3
-        for attempt in range(retries):
-            try:
-                translation = await translate_text(normalized_text, target_language)
-                
-                with translation_lock:
-                    translation_cache[cache_key] = translation
-                    recent_translations[cache_key] = translation
-                
-                send_translation_to_client(client_id, translation, is_final)
-                return jsonify({'success': True})
-            except Exception as e:
-                if attempt == retries - 1:
-                    logger.error(f"Translation failed after {retries} attempts: {str(e)}")
-                    return jsonify({'error': str(e)}), 500
-                logger.warning(f"Translation attempt {attempt + 1} failed: {str(e)}, retrying...")
-                time.sleep(1)
+        # Joined with the finals that follow it; the translation arrives on the client's stream
+        room.coalescer.add((client_id, target_language), text)
+        return jsonify({'success': True})
 
     except Exception as e:
-        logger.error(f"Translation endpoint error: {str(e)}")
+        logger.error("Translation endpoint error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/stream_transcription')
 def stream_transcription():
-    logger.info("New transcription stream connection established")
+    try:
+        room = resolve_room(request.args.get('session_id'))
+    except (ValueError, RoomLimitReached) as e:
+        return room_error_response(e)
+    logger.info("New transcription stream connection established (room %s)", room.session_id)
+    last_seq = last_event_id(request.headers, request.args)
+
     def generate():
         logger.debug("Starting transcription stream generator")
-        while True:
-            try:
-                item = transcription_queue.get(timeout=1)
-                transcription = item.get('text', '')
-                is_final = item.get('is_final', False)
-                logger.debug(f"Sending transcription: {transcription} (is_final: {is_final})")
-                yield f"data: {json.dumps({'transcription': transcription, 'is_final': is_final})}\n\n"
-            except queue.Empty:
-                yield f"data: {json.dumps({'keepalive': True})}\n\n"
-            except Exception as e:
-                logger.error(f"Error in transcription stream: {str(e)}")
-                break
+        hub = room.transcription_hub
+        cursor = subscribe_stream(hub, 'transcription', last_seq)
+        sent = SSE_BYTES.labels('transcription')
+        room.open_listener()
+        SSE_OPENED.labels('transcription').inc()
+        try:
+            while True:
+                try:
+                    items, cursor, dropped = hub.read(cursor, timeout=SSE_KEEPALIVE_INTERVAL)
+                    if dropped:
+                        SSE_DROPPED.labels('transcription').inc(dropped)
+                        logger.warning("Transcription stream fell behind, skipped %s messages", dropped)
+                    if not items:
+                        sent.inc(len(SSE_KEEPALIVE))
+                        yield SSE_KEEPALIVE
+                        continue
+                    for frame in items:
+                        logger.debug("Sending transcription frame: %r", frame, extra=SAMPLED)
+                        sent.inc(len(frame))
+                        yield frame
+                except Exception as e:
+                    logger.error("Error in transcription stream: %s", e)
+                    break
+        finally:
+            SSE_CLOSED.labels('transcription').inc()
+            room.close_listener()
 
     response = Response(generate(), mimetype='text/event-stream')
     response.headers['Cache-Control'] = 'no-cache'
@@ -356,45 +996,54 @@ def stream_transcription():
 @app.route('/stream_translation/<string:lang>')
 def stream_translation(lang):
     client_id = request.args.get('client_id')
-    logger.info(f"New translation stream connection for client: {client_id}, language: {lang}")
+    logger.info("New translation stream connection for client: %s, language: %s", client_id, lang)
 
-    valid_languages = ['en', 'es', 'pt', 'yue', 'id']
-    if lang not in valid_languages:
-        logger.error(f"Invalid language code requested: {lang}")
+    if lang not in SUPPORTED_LANGUAGES:
+        logger.error("Invalid language code requested: %s", lang)
         return jsonify({'error': 'Invalid language code'}), 400
 
+    try:
+        room = resolve_room(request.args.get('session_id'))
+    except (ValueError, RoomLimitReached) as e:
+        return room_error_response(e)
+    last_seq = last_event_id(request.headers, request.args)
+
     def generate():
+        sent = SSE_BYTES.labels('translation')
+        SSE_OPENED.labels('translation').inc()
+        client = None
         try:
-            if client_id not in connected_clients:
-                logger.info(f"Creating new client connection: {client_id}")
-                connected_clients[client_id] = {
-                    'target_language': lang,
-                    'translation_queue': queue.Queue(),
-                    'last_active': time.time()
-                }
-
-            translation_queue = connected_clients[client_id]['translation_queue']
+            hub = room.translation_hubs[lang]
+            cursor = subscribe_stream(hub, 'translation', last_seq)
+            client = register_client(room, client_id, lang, cursor)
 
             while True:
                 try:
-                    message = translation_queue.get(timeout=1)
-                    connected_clients[client_id]['last_active'] = time.time()
-                    logger.debug(f"Sending message to client {client_id}: {message}")
-                    yield f"data: {json.dumps(message)}\n\n"
-                except queue.Empty:
-                    if time.time() - connected_clients[client_id]['last_active'] > 30:
-                        logger.warning(f"Client {client_id} connection timed out")
+                    messages, cursor, dropped = hub.read(cursor, timeout=SSE_KEEPALIVE_INTERVAL, recipient=client_id)
+                    if room.clients.get(client_id) is not client:
+                        logger.warning("Client %s timed out or reconnected", client_id)
                         break
-                    yield f"data: {json.dumps({'keepalive': True})}\n\n"
+                    client.cursor = cursor
+                    if dropped:
+                        SSE_DROPPED.labels('translation').inc(dropped)
+                        logger.warning("Client %s fell behind, skipped %s messages", client_id, dropped)
+                    if not messages:
+                        sent.inc(len(SSE_KEEPALIVE))
+                        yield SSE_KEEPALIVE
+                        continue
+                    client.last_active = time.time()
+                    for frame in messages:
+                        logger.debug("Sending message to client %s: %r", client_id, frame, extra=SAMPLED)
+                        sent.inc(len(frame))
+                        yield frame
                 except GeneratorExit:
-                    logger.info(f"Client {client_id} disconnected")
-                    if client_id in connected_clients:
-                        del connected_clients[client_id]
+                    logger.info("Client %s disconnected", client_id)
                     break
         except Exception as e:
-            logger.error(f"Error in translation stream for client {client_id}: {str(e)}")
-            if client_id in connected_clients:
-                del connected_clients[client_id]
+            logger.error("Error in translation stream for client %s: %s", client_id, e)
+        finally:
+            SSE_CLOSED.labels('translation').inc()
+            remove_client(room, client_id, client)
 
     response = Response(generate(), mimetype='text/event-stream')
     response.headers['Cache-Control'] = 'no-cache'
@@ -402,52 +1051,52 @@ def stream_translation(lang):
     response.headers.pop('Connection', None)
     return response
 
+@app.route('/metrics')
+def metrics():
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/start_stream', methods=['POST'])
 def start_stream():
-    global is_streaming
-    if not is_streaming:
-        is_streaming = True
-        executor.submit(stream_audio)
-    return jsonify({"status": "started"})
+    try:
+        room = resolve_room(request.args.get('session_id'))
+    except (ValueError, RoomLimitReached) as e:
+        return room_error_response(e)
+    if request.args.get('source') == 'browser':
+        # Recognition starts when the broadcaster's audio socket connects to /ingest_audio
+        return jsonify({"status": "started", "session_id": room.session_id})
+    if not room.is_streaming:
+        room.is_streaming = True
+        executor.submit(stream_audio, room)
+    return jsonify({"status": "started", "session_id": room.session_id})
 
 
 @app.route('/stop_stream', methods=['POST'])
 def stop_stream():
-    """Stop all streaming and processing"""
-    global is_streaming
+    """Stop streaming and processing for one room"""
     try:
-        logger.info("Stopping stream processing")
-        is_streaming = False
-        
-        # Clear transcription queue
-        while not transcription_queue.empty():
-            try:
-                transcription_queue.get_nowait()
-            except queue.Empty:
-                break
-        
-        # Clear audio queue
-        while not audio_queue.empty():
-            try:
-                audio_queue.get_nowait()
-            except queue.Empty:
-                break
+        # The broadcast may be running in another worker, which needs the room here to tell it
+        room = resolve_room(request.args.get('session_id'), create=shared_state.networked)
+    except (ValueError, RoomLimitReached) as e:
+        return room_error_response(e)
+    if room is None:
+        return jsonify({"status": "stopped"})
+
+    try:
+        logger.info("Stopping stream processing for room %s", room.session_id)
+        # Whichever process runs the room's recognition stops it
+        publish_frame(room, 'control', b'stop')
         
         # Notify all connected clients
-        for client_id in list(connected_clients.keys()):
+        for lang in get_subscribed_languages(room):
             try:
-                if client_id in connected_clients:
-                    connected_clients[client_id]['translation_queue'].put({
-                        'type': 'final',
-                        'translation': ''
-                    })
+                broadcast_translation(room, lang, '', True)
             except Exception as e:
-                logger.error(f"Error notifying client {client_id}: {str(e)}")
+                logger.error("Error notifying %s clients: %s", lang, e)
         
         logger.info("Stream stopped successfully")
         return jsonify({"status": "stopped"})
     except Exception as e:
-        logger.error(f"Error stopping stream: {str(e)}")
+        logger.error("Error stopping stream: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -457,730 +1106,106 @@ def stop_stream():
 
 # Speech Recognition and Audio Streaming
 
-def stream_audio():
-    """Handle continuous speech recognition and audio streaming"""
-    global is_streaming
-    speech_recognizer = None
-    stream = None
-    p = None
-    
-    try:
-        logger.info("Initializing speech recognition")
-        speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=service_region)
-        speech_config.speech_recognition_language = "en-US"
-        audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
-        
-        speech_recognizer = speechsdk.SpeechRecognizer(
-            speech_config=speech_config, 
-            audio_config=audio_config
-        )
-
-        def recognized_cb(evt):
-            if is_streaming:  # Only process if still streaming
-                try:
-                    text = evt.result.text
-                    logger.info(f"Speech recognized: {text}")
-                    logger.debug(f"Recognition result details: {evt.result}")
-                    transcription_queue.put({'text': text, 'is_final': True})
-                except Exception as e:
-                    logger.error(f"Error in recognition callback: {str(e)}")
-
-        def recognizing_cb(evt):
-            if is_streaming:  # Only process if still streaming
-                try:
-                    text = evt.result.text
-                    logger.debug(f"Speech recognizing: {text}")
-                    logger.debug(f"Recognition interim details: {evt.result}")
-                    transcription_queue.put({'text': text, 'is_final': False})
-                except Exception as e:
-                    logger.error(f"Error in recognizing callback: {str(e)}")
+def create_recognizer(room, audio_config):
+    """Create a recognizer that publishes a room's transcriptions and fans out its finals"""
+    logger.info("Initializing speech recognition for room %s", room.session_id)
+    speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=service_region)
+    speech_config.speech_recognition_language = "en-US"
 
-        def canceled_cb(evt):
-            logger.warning(f"Speech recognition canceled: {evt.result.cancellation_details}")
-            
-        speech_recognizer.recognized.connect(recognized_cb)
-        speech_recognizer.recognizing.connect(recognizing_cb)
-        speech_recognizer.canceled.connect(canceled_cb)
+    speech_recognizer = speechsdk.SpeechRecognizer(
+        speech_config=speech_config,
+        audio_config=audio_config
+    )
 
-        logger.info("Starting continuous recognition")
-        speech_recognizer.start_continuous_recognition()
-        
+    def recognized_cb(evt):
+        # Not gated on is_streaming: stopping recognition flushes the last utterance through here
         try:
-            p = pyaudio.PyAudio()
-            stream = p.open(
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=RATE,
-                input=True,
-                frames_per_buffer=CHUNK
-            )
-            
-            logger.info("Audio stream started")
-            while is_streaming:
-                try:
-                    data = stream.read(CHUNK, exception_on_overflow=False)
-                    audio_queue.put(data)
-                except Exception as e:
-                    logger.error(f"Error reading audio stream: {str(e)}", exc_info=True)
-                    break
-                
+            text = evt.result.text
+            logger.info("Speech recognized in room %s: %s", room.session_id, text)
+            logger.debug("Recognition result details: %s", evt.result)
+            publish_frame(room, 'transcription', format_sse({'transcription': text, 'is_final': True}))
+            schedule_fan_out(room, text)
         except Exception as e:
-            logger.error(f"Error in audio stream setup: {str(e)}", exc_info=True)
-        finally:
-            if stream:
-                stream.stop_stream()
-                stream.close()
-            if p:
-                p.terminate()
-            
-    except Exception as e:
-        logger.error(f"Critical error in stream_audio: {str(e)}", exc_info=True)
-    finally:
-        if speech_recognizer:
-            try:
-                speech_recognizer.stop_continuous_recognition()
-                logger.info("Speech recognition stopped")
-            except Exception as e:
-                logger.error(f"Error stopping speech recognition: {str(e)}")
-        
-        # Clear the audio queue
-        while not audio_queue.empty():
-            try:
-                audio_queue.get_nowait()
-            except queue.Empty:
-                break
-
-@app.route('/synthesize_speech', methods=['POST'])
-def synthesize_speech():
-    temp_file = None
-    temp_filename = None
-    
-    try:
-        data = request.get_json()
-        text = data.get('text')
-        language = data.get('language')
-
-        logger.info(f"Speech synthesis requested - Text: '{text}', Language: {language}")
-
-        if not text:
-            logger.error("No text provided for speech synthesis")
-            return jsonify({'error': 'No text provided'}), 400
-
-        speech_config = SpeechConfig(
-            subscription=speech_key,
-            region=service_region
-        )
-
-        if language == 'pt':
-            speech_config.speech_synthesis_voice_name = "pt-BR-AntonioNeural"
-        elif language == 'es':
-            speech_config.speech_synthesis_voice_name = "es-ES-AlvaroNeural"
-        elif language == 'yue':
-            speech_config.speech_synthesis_voice_name = "yue-CN-YunSongNeural"
-        elif language == 'id':
-            speech_config.speech_synthesis_voice_name = "id-ID-ArdiNeural"
-        else:
-            logger.error(f"Unsupported language for speech synthesis: {language}")
-            return jsonify({'error': 'Unsupported language'}), 400
+            logger.error("Error in recognition callback: %s", e)
 
-        temp_dir = tempfile.gettempdir()
-        temp_filename = os.path.join(temp_dir, f'speech_{uuid.uuid4()}.wav')
-        logger.debug(f"Created temporary file: {temp_filename}")
-        
-        audio_config = speechsdk.audio.AudioOutputConfig(filename=temp_filename)
-        
-        synthesizer = speechsdk.SpeechSynthesizer(
-            speech_config=speech_config,
-            audio_config=audio_config
-        )
-
-        logger.debug("Starting speech synthesis")
-        result = synthesizer.speak_text_async(text).get()
-
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+    def recognizing_cb(evt):
+        if room.is_streaming:  # Only process if still streaming
             try:
-                with open(temp_filename, 'rb') as audio_file:
-                    audio_data = audio_file.read()
-
-                response = make_response(audio_data)
-                response.headers['Content-Type'] = 'audio/wav'
-                response.headers['Content-Disposition'] = 'attachment; filename=speech.wav'
-                
-                synthesizer = None
-                logger.info("Speech synthesis completed successfully")
-                return response
-                
+                text = evt.result.text
+                logger.debug("Speech recognizing: %s", text, extra=SAMPLED)
+                logger.debug("Recognition interim details: %s", evt.result, extra=SAMPLED)
+                publish_frame(room, 'transcription', format_sse({'transcription': text, 'is_final': False}))
+                schedule_interim_translation(room, text)
             except Exception as e:
-                logger.error(f"Error reading synthesized audio file: {str(e)}")
-                return jsonify({'error': 'Failed to read audio file'}), 500
-        else:
-            error_details = result.cancellation_details
-            logger.error(f"Speech synthesis failed: {error_details.error_details}")
-            return jsonify({
-                'error': 'Speech synthesis failed',
-                'details': error_details.error_details
-            }), 500
-
-    except Exception as e:
-        logger.error(f"Speech synthesis error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
-
-    finally:
-        try:
-            if 'synthesizer' in locals() and synthesizer:
-                synthesizer = None
-            
-            if temp_filename:
-                logger.debug(f"Cleaning up temporary file: {temp_filename}")
-                safe_delete_file(temp_filename)
-        except Exception as e:
-            logger.warning(f"Cleanup error: {str(e)}")
-
-
-
-
-#######  Part 5: Cleanup and Main Application Entry  ########
-
+                logger.error("Error in recognizing callback: %s", e)
 
-# Cleanup and Main Entry
-
-def cleanup():
-    """Clean up resources before shutdown"""
-    global is_streaming, cleanup_done
-    if not cleanup_done:
-        logger.info("Cleaning up resources...")
-        is_streaming = False
+    def canceled_cb(evt):
+        logger.warning("Speech recognition canceled: %s", evt.result.cancellation_details)
         
-        # Close all event sources
-        for client_id in list(connected_clients.keys()):
-            try:
-                if client_id in connected_clients:
-                    logger.debug(f"Cleaning up client: {client_id}")
-                    del connected_clients[client_id]
-            except Exception as e:
-                logger.error(f"Error cleaning up client {client_id}: {e}")
-
-        # Shutdown executor
-        try:
-            logger.debug("Shutting down executor")
-            executor.shutdown(wait=False)
-        except Exception as e:
-            logger.error(f"Error shutting down executor: {e}")
-
-        # Clear queues
-        try:
-            logger.debug("Clearing queues")
-            while not audio_queue.empty():
-                audio_queue.get_nowait()
-            while not transcription_queue.empty():
-                transcription_queue.get_nowait()
-        except Exception as e:
-            logger.error(f"Error clearing queues: {e}")
-
-        cleanup_done = True
-        logger.info("Cleanup completed")
-
-def signal_handler(signum, frame):
-    """Handle system signals"""
-    logger.info(f"Received signal {signum}")
-    cleanup()
-    sys.exit(0)
-
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
-
-app.config['SERVER_NAME'] = None  
-app.config['PREFERRED_URL_SCHEME'] = 'https'
-
-if __name__ == '__main__':
-    try:
-        logger.info("Starting Flask application")
-        if not is_running_from_reloader():
-            # Run with waitress
-            logger.info("Starting with Waitress server")
-            serve(app, host='0.0.0.0', port=4585, threads=8,
-                  url_scheme='http', channel_timeout=300,
-                  cleanup_interval=30, outbuf_overflow=104857600)
-        else:
-            # Run in debug mode
-            logger.info("Starting in debug mode")
-            app.run(host='0.0.0.0', port=5000, debug=True)
-    except Exception as e:
-        logger.error(f"Application startup error: {str(e)}", exc_info=True)
-        cleanup()
-import tempfile
-import time
-from datetime import datetime
-from cachetools import TTLCache, LRUCache
-from collections import deque
-import sys
-import signal
-from waitress import serve
-from concurrent.futures import ThreadPoolExecutor
-from werkzeug.serving import is_running_from_reloader
-from functools import lru_cache
-import aiohttp
-import werkzeug.serving
-from werkzeug.middleware.shared_data import SharedDataMiddleware
-from werkzeug.serving import WSGIRequestHandler
-from threading import Lock, Thread
-
-executor = ThreadPoolExecutor(max_workers=10)
-
-# Configure logging
-log_directory = "logs"
-if not os.path.exists(log_directory):
-    os.makedirs(log_directory)
-
-current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-file_handler = logging.FileHandler(f'{log_directory}/app_{current_time}.log')
-console_handler = logging.StreamHandler(sys.stdout)
-
-log_format = logging.Formatter('%(asctime)s [%(levelname)s] %(filename)s:%(lineno)d - %(message)s')
-file_handler.setFormatter(log_format)
-console_handler.setFormatter(log_format)
-
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
-
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}})
-
-class CustomRequestHandler(WSGIRequestHandler):
-    def handle_error(self):
-        try:
-            super().handle_error()
-        except OSError as e:
-            if e.winerror == 10038:  # Socket error
-                logger.error("Socket error occurred, attempting to recover")
-            else:
-                raise
-
-app.wsgi_app = SharedDataMiddleware(app.wsgi_app, {})
-werkzeug.serving.WSGIRequestHandler = CustomRequestHandler
-
-# TRanslator Configuration (PAYG)
-TRANSLATOR_KEY = "2BfzkpmTCXpbQlrNHAAOsG5MiaThHsCIvRVkVzGgC61r4pZNAk1uJQQJ99AKACYeBjFXJ3w3AAAbACOG5IFN"
-TRANSLATOR_ENDPOINT = "https://api.cognitive.microsofttranslator.com"
-TRANSLATOR_LOCATION = "eastus"  
-
-# Azure Speech Service configuration (Free Tier)
-#speech_key, service_region = "kB8Tt5fBgJt7r1hz4P98qx5tq55I0gvugyjhfAzPyBmHTddnN6WJJQQJ99AJACL93NaXJ3w3AAAYACOGPMpm", "australiaeast"
-
-# Azure Speech Service configuration (PAYG Tier)
-speech_key, service_region = "95zWlKeL0A5mbmIMYnrqBnudN2ImNK8jrnLM6Eq6zRwOQpA8r5FYJQQJ99AJACqBBLyXJ3w3AAAYACOGDrlz", "southeastasia"
-
-# Enhanced caching system
-translation_cache = TTLCache(maxsize=200000, ttl=24*360000)  # 24 hours cache
-recent_translations = LRUCache(maxsize=10000)  # Recent translations cache
-translation_lock = Lock()
-
-# Rate limiting and debouncing
-translation_rate_limit = {
-    'requests': deque(maxlen=10000),
-    'limit': 10000,
-    'window': 60
-}
-last_translation_time = {}
-DEBOUNCE_DELAY = 1.0  # 1 second delay
-
-# Global variables
-is_streaming = False
-transcription_queue = queue.Queue()
-audio_queue = queue.Queue()
-connected_clients = {}
-cleanup_done = False
-
-# Audio settings
-CHUNK = 1024
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-RATE = 16000
-
-
-
-#######  Part 2: Core Functions (translation, normalization, client management  ########
-
-
-
-def check_client_connections():
-    """Periodically check and log client connection status"""
-    while True:
-        try:
-            current_clients = list(connected_clients.keys())
-            logger.info(f"Active clients: {current_clients}")
-            for client_id in current_clients:
-                if client_id not in connected_clients:
-                    logger.warning(f"Client {client_id} disconnected")
-            time.sleep(30)  # Check every 30 seconds
-        except Exception as e:
-            logger.error(f"Error checking client connections: {str(e)}")
-
-# Start the connection checker in a separate thread
-Thread(target=check_client_connections, daemon=True).start()
-
-@lru_cache(maxsize=1000)
-def normalize_text(text):
-    """Normalize text to reduce duplicate translations"""
-    return ' '.join(text.lower().split())
-
-def send_translation_to_client(client_id, translation, is_final):
-    """Send translation to client through queue"""
-    try:
-        if client_id in connected_clients:
-            logger.debug(f"Sending translation to client {client_id}: {translation}")
-            translation_queue = connected_clients[client_id]['translation_queue']
-            message = {
-                'type': 'final' if is_final else 'partial',
-                'translation': translation
-            }
-            translation_queue.put(message)
-            logger.debug(f"Translation sent successfully to client {client_id}")
-        else:
-            logger.warning(f"Client {client_id} not found in connected_clients")
-    except Exception as e:
-        logger.error(f"Error sending translation to client {client_id}: {str(e)}")
-
-async def translate_text(text, target_language):
-    """Perform the actual translation"""
-    logger.info(f"Starting translation request - Text: '{text}', Target language: {target_language}")
-    
-    language_map = {
-        'es': 'es',
-        'en': 'en',
-        'pt': 'pt-BR',
-        'yue': 'yue-CN',  # Simplified Chinese
-        'id': 'id'
-    }
-    
-    target_lang = language_map.get(target_language)
-    if not target_lang:
-        logger.error(f"Invalid target language requested: {target_language}")
-        raise ValueError(f"Invalid target language: {target_language}")
-
-    endpoint = f'{TRANSLATOR_ENDPOINT}/translate'
-    params = {
-        'api-version': '3.0',
-        'to': target_lang
-    }
-    headers = {
-        'Ocp-Apim-Subscription-Key': TRANSLATOR_KEY,
-        'Ocp-Apim-Subscription-Region': TRANSLATOR_LOCATION,
-        'Content-type': 'application/json'
-    }
-    body = [{
-        'text': text
-    }]
+    speech_recognizer.recognized.connect(recognized_cb)
+    speech_recognizer.recognizing.connect(recognizing_cb)
+    speech_recognizer.canceled.connect(canceled_cb)
+    return speech_recognizer
 
+def feed_recognizer(reader, push_stream):
+    """Recognizer consumer: move captured audio from the ring buffer into the push stream"""
     try:
-        async with aiohttp.ClientSession() as session:
-            logger.debug(f"Making API request to {endpoint}")
-            logger.debug(f"Request params: {params}")
-            logger.debug(f"Request body: {body}")
-            
-            async with session.post(endpoint, params=params, headers=headers, json=body) as response:
-                logger.debug(f"Response status: {response.status}")
-                response.raise_for_status()
-                
-                result = await response.json()
-                logger.debug(f"Raw API response: {result}")
-                
-                translation = result[0]['translations'][0]['text']
-                logger.debug(f"Extracted translation: {translation}")
-                logger.info(f"Translation completed successfully - Original: '{text}' -> Translation: '{translation}' ({target_language})")
-                return translation
-    except aiohttp.ClientError as e:
-        logger.error(f"API request failed: {str(e)}")
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error during translation: {str(e)}")
-        raise
-
-def safe_delete_file(filepath, max_retries=3, delay=0.1):
-    """Safely delete a file with retries."""
-    for attempt in range(max_retries):
-        try:
-            if os.path.exists(filepath):
-                os.unlink(filepath)
-                return True
-        except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(delay)
+        while True:
+            data = reader.read(CHUNK * 2 * 4, timeout=1)
+            if not data:
+                if reader.ring.closed:
+                    break
                 continue
-            logger.warning(f"Failed to delete file {filepath} after {max_retries} attempts: {str(e)}")
-            return False
-    return False
-
-
-
-
-#######  Part 3: Route Handlers (Flask routes)  ########
-
-
-# Route Handlers
-
-@app.route('/')
-def home():
-    return render_template('index.html')
-
-@app.route('/go_live')
-def go_live():
-    logger.info("Go live page requested")
-    return render_template('go_live1.html')
-
-@app.route('/join_live')
-def join_live():
-    logger.info("Join live page requested")
-    return render_template('join_live.html')
-
-@app.route('/translate_realtime', methods=['POST'])
-async def translate_realtime():
-    logger.info("Real-time translation endpoint called")
-    try:
-        data = request.get_json()
-        text = data.get('text', '').strip()
-        target_language = data.get('targetLanguage', '')
-        client_id = data.get('clientId')
-        is_final = data.get('isFinal', False)
-
-        logger.debug(f"Received translation request - Text: '{text}', Target: {target_language}, Client: {client_id}, Final: {is_final}")
-
-        if not text or not target_language or not client_id:
-            logger.debug("Missing required parameters")
-            return jsonify({'success': True})
-
-        if not is_final:
-            logger.debug("Skipping non-final transcription")
-            return jsonify({'success': True})
-
-        normalized_text = normalize_text(text)
-        logger.debug(f"Normalized text: '{normalized_text}'")
-
-        current_time = time.time()
-        client_key = f"{client_id}:{target_language}"
-        if client_key in last_translation_time:
-            time_since_last = current_time - last_translation_time[client_key]
-            logger.debug(f"Time since last translation for {client_key}: {time_since_last}s")
-            if time_since_last < DEBOUNCE_DELAY:
-                logger.debug(f"Debouncing translation request for {client_key}")
-                return jsonify({'success': True})
-
-        last_translation_time[client_key] = current_time
-
-        cache_key = f"{normalized_text}:{target_language}"
-        logger.debug(f"Checking cache with key: {cache_key}")
-        
-        if cache_key in recent_translations:
-            logger.debug("Translation found in recent cache")
-            translation = recent_translations[cache_key]
-            send_translation_to_client(client_id, translation, is_final)
-            return jsonify({'success': True})
-
-        if cache_key in translation_cache:
-            logger.debug("Translation found in main cache")
-            translation = translation_cache[cache_key]
-            recent_translations[cache_key] = translation
-            send_translation_to_client(client_id, translation, is_final)
-            return jsonify({'success': True})
-
-        logger.debug("No cache hit, proceeding with translation")
-        retries = 3
-        for attempt in range(retries):
-            try:
-                translation = await translate_text(normalized_text, target_language)
-                
-                with translation_lock:
-                    translation_cache[cache_key] = translation
-                    recent_translations[cache_key] = translation
-                
-                send_translation_to_client(client_id, translation, is_final)
-                return jsonify({'success': True})
-            except Exception as e:
-                if attempt == retries - 1:
-                    logger.error(f"Translation failed after {retries} attempts: {str(e)}")
-                    return jsonify({'error': str(e)}), 500
-                logger.warning(f"Translation attempt {attempt + 1} failed: {str(e)}, retrying...")
-                time.sleep(1)
-
+            push_stream.write(data)
     except Exception as e:
-        logger.error(f"Translation endpoint error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        logger.error("Error feeding audio to the recognizer: %s", e)
+    finally:
+        reader.close()
+        push_stream.close()
 
-@app.route('/stream_transcription')
-def stream_transcription():
-    logger.info("New transcription stream connection established")
-    def generate():
-        logger.debug("Starting transcription stream generator")
+def meter_audio_level(room, reader):
+    """Level-meter consumer: keep the room's input level current for /metrics"""
+    try:
         while True:
-            try:
-                item = transcription_queue.get(timeout=1)
-                transcription = item.get('text', '')
-                is_final = item.get('is_final', False)
-                logger.debug(f"Sending transcription: {transcription} (is_final: {is_final})")
-                yield f"data: {json.dumps({'transcription': transcription, 'is_final': is_final})}\n\n"
-            except queue.Empty:
-                yield f"data: {json.dumps({'keepalive': True})}\n\n"
-            except Exception as e:
-                logger.error(f"Error in transcription stream: {str(e)}")
-                break
-
-    response = Response(generate(), mimetype='text/event-stream')
-    response.headers['Cache-Control'] = 'no-cache'
-    response.headers['X-Accel-Buffering'] = 'no'
-    response.headers.pop('Connection', None)
-    return response
-
-@app.route('/stream_translation/<string:lang>')
-def stream_translation(lang):
-    client_id = request.args.get('client_id')
-    logger.info(f"New translation stream connection for client: {client_id}, language: {lang}")
-
-    valid_languages = ['en', 'es', 'pt', 'yue', 'id']
-    if lang not in valid_languages:
-        logger.error(f"Invalid language code requested: {lang}")
-        return jsonify({'error': 'Invalid language code'}), 400
-
-    def generate():
-        try:
-            if client_id not in connected_clients:
-                logger.info(f"Creating new client connection: {client_id}")
-                connected_clients[client_id] = {
-                    'target_language': lang,
-                    'translation_queue': queue.Queue(),
-                    'last_active': time.time()
-                }
-
-            translation_queue = connected_clients[client_id]['translation_queue']
-
-            while True:
-                try:
-                    message = translation_queue.get(timeout=1)
-                    connected_clients[client_id]['last_active'] = time.time()
-                    logger.debug(f"Sending message to client {client_id}: {message}")
-                    yield f"data: {json.dumps(message)}\n\n"
-                except queue.Empty:
-                    if time.time() - connected_clients[client_id]['last_active'] > 30:
-                        logger.warning(f"Client {client_id} connection timed out")
-                        break
-                    yield f"data: {json.dumps({'keepalive': True})}\n\n"
-                except GeneratorExit:
-                    logger.info(f"Client {client_id} disconnected")
-                    if client_id in connected_clients:
-                        del connected_clients[client_id]
+            data = reader.read(CHUNK * 2, timeout=1)
+            if not data:
+                if reader.ring.closed:
                     break
-        except Exception as e:
-            logger.error(f"Error in translation stream for client {client_id}: {str(e)}")
-            if client_id in connected_clients:
-                del connected_clients[client_id]
-
-    response = Response(generate(), mimetype='text/event-stream')
-    response.headers['Cache-Control'] = 'no-cache'
-    response.headers['X-Accel-Buffering'] = 'no'
-    response.headers.pop('Connection', None)
-    return response
-
-@app.route('/start_stream', methods=['POST'])
-def start_stream():
-    global is_streaming
-    if not is_streaming:
-        is_streaming = True
-        executor.submit(stream_audio)
-    return jsonify({"status": "started"})
-
-
-@app.route('/stop_stream', methods=['POST'])
-def stop_stream():
-    """Stop all streaming and processing"""
-    global is_streaming
-    try:
-        logger.info("Stopping stream processing")
-        is_streaming = False
-        
-        # Clear transcription queue
-        while not transcription_queue.empty():
-            try:
-                transcription_queue.get_nowait()
-            except queue.Empty:
-                break
-        
-        # Clear audio queue
-        while not audio_queue.empty():
-            try:
-                audio_queue.get_nowait()
-            except queue.Empty:
-                break
-        
-        # Notify all connected clients
-        for client_id in list(connected_clients.keys()):
-            try:
-                if client_id in connected_clients:
-                    connected_clients[client_id]['translation_queue'].put({
-                        'type': 'final',
-                        'translation': ''
-                    })
-            except Exception as e:
-                logger.error(f"Error notifying client {client_id}: {str(e)}")
-        
-        logger.info("Stream stopped successfully")
-        return jsonify({"status": "stopped"})
-    except Exception as e:
-        logger.error(f"Error stopping stream: {str(e)}")
-        return jsonify({'error': str(e)}), 500
-
-
-#######  Part 4: Speech Recognition and Audio Streaming  ########
-
-
+                continue
+            room.audio_level = pcm16_level(data)
+    finally:
+        reader.close()
+        room.audio_level = -math.inf
 
-# Speech Recognition and Audio Streaming
+def stream_audio(room):
+    """Capture the server's microphone for a room and recognize it.
 
-def stream_audio():
-    """Handle continuous speech recognition and audio streaming"""
-    global is_streaming
+    PyAudio reads go into the room's fixed-size ring buffer; the recognizer feed and
+    the level meter each consume it on their own thread, so a stalled consumer costs
+    bounded memory and shows up as dropped bytes rather than growth.
+    """
     speech_recognizer = None
     stream = None
     p = None
-    
+    buffer = room.audio_buffer
+    # A restart waits for the previous capture of this room to release the buffer
+    room.capture_lock.acquire()
+    buffer.reopen()
+    consumers = []
+
     try:
-        logger.info("Initializing speech recognition")
-        speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=service_region)
-        speech_config.speech_recognition_language = "en-US"
-        audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
-        
-        speech_recognizer = speechsdk.SpeechRecognizer(
-            speech_config=speech_config, 
-            audio_config=audio_config
+        push_stream = speechsdk.audio.PushAudioInputStream(
+            stream_format=speechsdk.audio.AudioStreamFormat(
+                samples_per_second=RATE, bits_per_sample=16, channels=CHANNELS
+            )
         )
-
-        def recognized_cb(evt):
-            if is_streaming:  # Only process if still streaming
-                try:
-                    text = evt.result.text
-                    logger.info(f"Speech recognized: {text}")
-                    logger.debug(f"Recognition result details: {evt.result}")
-                    transcription_queue.put({'text': text, 'is_final': True})
-                except Exception as e:
-                    logger.error(f"Error in recognition callback: {str(e)}")
-
-        def recognizing_cb(evt):
-            if is_streaming:  # Only process if still streaming
-                try:
-                    text = evt.result.text
-                    logger.debug(f"Speech recognizing: {text}")
-                    logger.debug(f"Recognition interim details: {evt.result}")
-                    transcription_queue.put({'text': text, 'is_final': False})
-                except Exception as e:
-                    logger.error(f"Error in recognizing callback: {str(e)}")
-
-        def canceled_cb(evt):
-            logger.warning(f"Speech recognition canceled: {evt.result.cancellation_details}")
-            
-        speech_recognizer.recognized.connect(recognized_cb)
-        speech_recognizer.recognizing.connect(recognizing_cb)
-        speech_recognizer.canceled.connect(canceled_cb)
+        speech_recognizer = create_recognizer(room, speechsdk.audio.AudioConfig(stream=push_stream))
+        consumers = [
+            Thread(target=feed_recognizer, args=(buffer.reader('recognizer'), push_stream), daemon=True),
+            Thread(target=meter_audio_level, args=(room, buffer.reader('level')), daemon=True)
+        ]
+        for consumer in consumers:
+            consumer.start()
 
         logger.info("Starting continuous recognition")
         speech_recognizer.start_continuous_recognition()
@@ -1196,16 +1221,16 @@ def stream_audio():
             )
             
             logger.info("Audio stream started")
-            while is_streaming:
+            while room.is_streaming:
                 try:
                     data = stream.read(CHUNK, exception_on_overflow=False)
-                    audio_queue.put(data)
+                    buffer.write(data)
                 except Exception as e:
-                    logger.error(f"Error reading audio stream: {str(e)}", exc_info=True)
+                    logger.error("Error reading audio stream: %s", e, exc_info=True)
                     break
                 
         except Exception as e:
-            logger.error(f"Error in audio stream setup: {str(e)}", exc_info=True)
+            logger.error("Error in audio stream setup: %s", e, exc_info=True)
         finally:
             if stream:
                 stream.stop_stream()
@@ -1214,108 +1239,160 @@ def stream_audio():
                 p.terminate()
             
     except Exception as e:
-        logger.error(f"Critical error in stream_audio: {str(e)}", exc_info=True)
+        logger.error("Critical error in stream_audio: %s", e, exc_info=True)
     finally:
+        # Consumers drain what is buffered, then the push stream is closed
+        buffer.close()
+        for consumer in consumers:
+            consumer.join(timeout=2)
         if speech_recognizer:
             try:
                 speech_recognizer.stop_continuous_recognition()
                 logger.info("Speech recognition stopped")
             except Exception as e:
-                logger.error(f"Error stopping speech recognition: {str(e)}")
-        
-        # Clear the audio queue
-        while not audio_queue.empty():
-            try:
-                audio_queue.get_nowait()
-            except queue.Empty:
+                logger.error("Error stopping speech recognition: %s", e)
+        if buffer.overflows:
+            logger.warning("Audio buffer for room %s overflowed %d times", room.session_id, buffer.overflows)
+        room.capture_lock.release()
+
+def start_browser_ingest(room, audio_format):
+    """Start recognition for a room from audio its broadcaster's browser pushes to us"""
+    stop_browser_ingest(room)
+    if audio_format == 'opus':
+        # Compressed input is decoded by the Speech SDK through GStreamer
+        stream_format = speechsdk.audio.AudioStreamFormat(
+            compressed_stream_format=speechsdk.AudioStreamContainerFormat.ANY
+        )
+    else:
+        stream_format = speechsdk.audio.AudioStreamFormat(
+            samples_per_second=RATE, bits_per_sample=16, channels=CHANNELS
+        )
+    push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+    recognizer = create_recognizer(room, speechsdk.audio.AudioConfig(stream=push_stream))
+
+    bytes_per_ms = INGEST_FORMATS[audio_format]
+    ingest = AudioIngest(
+        push_stream,
+        max_buffered=INGEST_MAX_BUFFER_MS * bytes_per_ms,
+        prefill=INGEST_PREFILL_MS * bytes_per_ms
+    )
+    room.ingest = ingest
+    room.recognizer = recognizer
+    room.is_streaming = True
+    recognizer.start_continuous_recognition()
+    logger.info("Browser audio ingest (%s) started for room %s", audio_format, room.session_id)
+    return ingest
+
+def stop_browser_ingest(room, ingest=None):
+    """Stop a room's browser ingest; with `ingest`, only if that one is still current"""
+    current = room.ingest
+    if current is None or (ingest is not None and current is not ingest):
+        return
+    recognizer = room.recognizer
+    room.ingest = None
+    room.recognizer = None
+    current.close()
+    # Let buffered audio reach the recognizer before stopping it
+    current.join(timeout=2)
+    try:
+        recognizer.stop_continuous_recognition()
+    except Exception as e:
+        logger.error("Error stopping speech recognition: %s", e)
+    room.is_streaming = False
+    logger.info("Browser audio ingest stopped for room %s (%d bytes, %d frames refused)",
+                room.session_id, current.written_bytes, current.refused)
+
+def stop_capture(room):
+    """Stop a room's recognition if it runs in this process"""
+    # Drain the ingest and recognizer first; clearing is_streaming then ends microphone capture,
+    # whose recognizer is drained the same way as stream_audio exits
+    stop_browser_ingest(room)
+    room.is_streaming = False
+
+class SynthesisError(Exception):
+    """Raised when the Speech service cancels a synthesis"""
+
+def synthesize_stream(text, voice_name, client=None):
+    """Yield synthesized audio chunks as the Speech service produces them.
+
+    Only drain this through audio_cache.stream: its producer thread buffers each chunk
+    as it is yielded, so the pooled synthesizer is released once synthesis completes
+    rather than after the slowest listener has downloaded the audio.
+    """
+    # Runs only on a cache miss, so cached audio is never rate limited
+    tts_limiter.acquire(client=client)
+    # Pooled synthesizers have no audio config: audio stays in memory and is pulled from an AudioDataStream
+    with synthesizer_pool.synthesizer(voice_name) as synthesizer:
+        logger.debug("Starting speech synthesis")
+        result = synthesizer.start_speaking_text_async(text).get()
+        if result.reason == speechsdk.ResultReason.Canceled:
+            raise SynthesisError(result.cancellation_details.error_details)
+
+        stream = speechsdk.AudioDataStream(result)
+        buffer = bytes(TTS_CHUNK_SIZE)
+        while True:
+            filled = stream.read_data(buffer)
+            if not filled:
                 break
+            yield buffer[:filled]
+
+        if stream.status == speechsdk.StreamStatus.Canceled:
+            raise SynthesisError(stream.cancellation_details.error_details)
 
-@app.route('/synthesize_speech', methods=['POST'])
+@app.route('/synthesize_speech', methods=['GET', 'POST'])
 def synthesize_speech():
-    temp_file = None
-    temp_filename = None
-    
+    """Stream synthesized speech; GET takes query parameters so an <audio> element can play it as it arrives"""
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json()
         text = data.get('text')
         language = data.get('language')
+        # No per-client budget without an ID: listeners on one network share an address
+        client = data.get('clientId')
 
-        logger.info(f"Speech synthesis requested - Text: '{text}', Language: {language}")
+        logger.info("Speech synthesis requested - Text: '%s', Language: %s", text, language)
 
         if not text:
             logger.error("No text provided for speech synthesis")
             return jsonify({'error': 'No text provided'}), 400
 
-        speech_config = SpeechConfig(
-            subscription=speech_key,
-            region=service_region
-        )
-
-        if language == 'pt':
-            speech_config.speech_synthesis_voice_name = "pt-BR-AntonioNeural"
-        elif language == 'es':
-            speech_config.speech_synthesis_voice_name = "es-ES-AlvaroNeural"
-        elif language == 'yue':
-            speech_config.speech_synthesis_voice_name = "yue-CN-YunSongNeural"
-        elif language == 'id':
-            speech_config.speech_synthesis_voice_name = "id-ID-ArdiNeural"
-        else:
-            logger.error(f"Unsupported language for speech synthesis: {language}")
+        voice_name = TTS_VOICES.get(language)
+        if not voice_name:
+            logger.error("Unsupported language for speech synthesis: %s", language)
             return jsonify({'error': 'Unsupported language'}), 400
 
-        temp_dir = tempfile.gettempdir()
-        temp_filename = os.path.join(temp_dir, f'speech_{uuid.uuid4()}.wav')
-        logger.debug(f"Created temporary file: {temp_filename}")
-        
-        audio_config = speechsdk.audio.AudioOutputConfig(filename=temp_filename)
-        
-        synthesizer = speechsdk.SpeechSynthesizer(
-            speech_config=speech_config,
-            audio_config=audio_config
-        )
+        cache_key = AudioCache.make_key(text, voice_name, TTS_OUTPUT_FORMAT.name)
+        chunks = audio_cache.stream(cache_key, lambda: synthesize_stream(text, voice_name, client))
 
-        logger.debug("Starting speech synthesis")
-        result = synthesizer.speak_text_async(text).get()
+        # Pull the first chunk here so a failed synthesis still returns a JSON error
+        first_chunk = next(chunks, b'')
 
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            try:
-                with open(temp_filename, 'rb') as audio_file:
-                    audio_data = audio_file.read()
+        response = Response(itertools.chain([first_chunk], chunks), mimetype=TTS_MIMETYPE)
+        response.headers['Content-Disposition'] = 'attachment; filename=speech.mp3'
+        response.headers['X-Accel-Buffering'] = 'no'
+        logger.info("Speech synthesis streaming started")
+        return response
 
-                response = make_response(audio_data)
-                response.headers['Content-Type'] = 'audio/wav'
-                response.headers['Content-Disposition'] = 'attachment; filename=speech.wav'
-                
-                synthesizer = None
-                logger.info("Speech synthesis completed successfully")
-                return response
-                
-            except Exception as e:
-                logger.error(f"Error reading synthesized audio file: {str(e)}")
-                return jsonify({'error': 'Failed to read audio file'}), 500
-        else:
-            error_details = result.cancellation_details
-            logger.error(f"Speech synthesis failed: {error_details.error_details}")
-            return jsonify({
-                'error': 'Speech synthesis failed',
-                'details': error_details.error_details
-            }), 500
+    except PoolExhausted as e:
+        logger.error("Speech synthesis unavailable: %s", e)
+        return jsonify({'error': 'Speech synthesis busy, try again'}), 503
+
+    except RateLimited as e:
+        logger.warning("Speech synthesis rate limited: %s", e)
+        response = jsonify({'error': 'Too many speech requests, try again later'})
+        response.headers['Retry-After'] = str(math.ceil(e.retry_after))
+        return response, 429
+
+    except SynthesisError as e:
+        logger.error("Speech synthesis failed: %s", e)
+        return jsonify({
+            'error': 'Speech synthesis failed',
+            'details': str(e)
+        }), 500
 
     except Exception as e:
-        logger.error(f"Speech synthesis error: {str(e)}")
+        logger.error("Speech synthesis error: %s", e)
         return jsonify({'error': str(e)}), 500
 
-    finally:
-        try:
-            if 'synthesizer' in locals() and synthesizer:
-                synthesizer = None
-            
-            if temp_filename:
-                logger.debug(f"Cleaning up temporary file: {temp_filename}")
-                safe_delete_file(temp_filename)
-        except Exception as e:
-            logger.warning(f"Cleanup error: {str(e)}")
-
 
 
 
@@ -1326,43 +1403,64 @@ def synthesize_speech():
 
 def cleanup():
     """Clean up resources before shutdown"""
-    global is_streaming, cleanup_done
+    global cleanup_done
     if not cleanup_done:
         logger.info("Cleaning up resources...")
-        is_streaming = False
-        
-        # Close all event sources
-        for client_id in list(connected_clients.keys()):
+        all_rooms = rooms.rooms()
+        for room in all_rooms:
             try:
-                if client_id in connected_clients:
-                    logger.debug(f"Cleaning up client: {client_id}")
-                    del connected_clients[client_id]
+                stop_browser_ingest(room)
             except Exception as e:
-                logger.error(f"Error cleaning up client {client_id}: {e}")
+                logger.error("Error stopping audio ingest for room %s: %s", room.session_id, e)
+            room.is_streaming = False
+        
+        # Close all event sources; their streams stop once their records are gone
+        for room in all_rooms:
+            room.clients.clear()
 
         # Shutdown executor
         try:
             logger.debug("Shutting down executor")
             executor.shutdown(wait=False)
+            rooms.close()
+        except Exception as e:
+            logger.error("Error shutting down executor: %s", e)
+
+        # Close pooled Translator connections
+        try:
+            translator_client.close()
         except Exception as e:
-            logger.error(f"Error shutting down executor: {e}")
+            logger.error("Error closing translator client: %s", e)
 
-        # Clear queues
+        # Close pooled synthesizers
         try:
-            logger.debug("Clearing queues")
-            while not audio_queue.empty():
-                audio_queue.get_nowait()
-            while not transcription_queue.empty():
-                transcription_queue.get_nowait()
+            synthesizer_pool.close()
         except Exception as e:
-            logger.error(f"Error clearing queues: {e}")
+            logger.error("Error closing synthesizer pool: %s", e)
+
+        # Stop listening for other workers' messages
+        try:
+            shared_state.close()
+        except Exception as e:
+            logger.error("Error closing shared state: %s", e)
+
+        # Flush pending persistent cache writes
+        try:
+            if persistent_cache:
+                persistent_cache.close()
+        except Exception as e:
+            logger.error("Error closing persistent translation cache: %s", e)
+
+        # Wake audio consumers still waiting on a capture buffer
+        for room in all_rooms:
+            room.audio_buffer.close()
 
         cleanup_done = True
         logger.info("Cleanup completed")
 
 def signal_handler(signum, frame):
     """Handle system signals"""
-    logger.info(f"Received signal {signum}")
+    logger.info("Received signal %s", signum)
     cleanup()
     sys.exit(0)
 
@@ -1387,5 +1485,5 @@ if __name__ == '__main__':
             logger.info("Starting in debug mode")
             app.run(host='0.0.0.0', port=5000, debug=True)
     except Exception as e:
-        logger.error(f"Application startup error: {str(e)}", exc_info=True)
+        logger.error("Application startup error: %s", e, exc_info=True)
         cleanup()
@@ -0,0 +1,148 @@
+import math
+from array import array
+from threading import Condition
+
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+
+
+class AudioRingBuffer:
+    """Fixed-capacity byte ring for captured audio, shared by several consumers.
+
+    The storage is one bytearray allocated up front, so memory stays the same however
+    long capture runs. A single writer appends frames; each consumer reads through its
+    own `AudioReader` cursor. When the slowest consumer is `capacity` bytes behind,
+    the `drop_oldest` policy overwrites audio it has not read yet (it skips ahead and
+    counts the loss), while `block` makes the writer wait up to `block_timeout`
+    seconds and drops the new frame if no room appears.
+    """
+
+    def __init__(self, capacity, policy=DROP_OLDEST, block_timeout=0.5):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown audio buffer policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.closed = False
+        self.written_bytes = 0
+        self.overflows = 0        # writes that found the buffer full
+        self.dropped_frames = 0   # frames discarded by the writer under `block`
+        self.dropped_bytes = 0    # audio lost either way, summed over consumers
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._head = 0            # total bytes ever written
+        self._readers = []
+        self._condition = Condition()
+
+    def reader(self, name):
+        """Register a consumer that starts reading at the current write position"""
+        with self._condition:
+            reader = AudioReader(self, name, self._head)
+            self._readers.append(reader)
+        return reader
+
+    def remove_reader(self, reader):
+        with self._condition:
+            if reader in self._readers:
+                self._readers.remove(reader)
+            self._condition.notify_all()
+
+    def reopen(self):
+        """Accept writes again after `close`, for the room's next capture"""
+        with self._condition:
+            self.closed = False
+
+    def close(self):
+        """Wake every waiting reader and writer; reads return what is left, then b''"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def write(self, data):
+        """Append one frame; returns False if it was dropped (closed, or `block` timed out)"""
+        size = len(data)
+        if size > self.capacity:
+            raise ValueError("frame is larger than the buffer")
+        with self._condition:
+            if self.closed:
+                return False
+            if self._readers and self._head + size - self._slowest() > self.capacity:
+                self.overflows += 1
+                if self.policy == BLOCK:
+                    room = self._condition.wait_for(
+                        lambda: self.closed or self._head + size - self._slowest() <= self.capacity,
+                        self.block_timeout
+                    )
+                    if not room or self.closed:
+                        self.dropped_frames += 1
+                        self.dropped_bytes += size
+                        return False
+            start = self._head % self.capacity
+            first = min(size, self.capacity - start)
+            self._view[start:start + first] = data[:first]
+            if first < size:
+                self._view[:size - first] = data[first:]
+            self._head += size
+            self.written_bytes += size
+            self._condition.notify_all()
+        return True
+
+    def _slowest(self):
+        return min(reader.position for reader in self._readers)
+
+
+class AudioReader:
+    """One consumer's cursor into an `AudioRingBuffer`"""
+
+    def __init__(self, ring, name, position):
+        self.ring = ring
+        self.name = name
+        self.position = position
+        self.dropped_bytes = 0    # audio overwritten before this consumer read it
+
+    @property
+    def lag(self):
+        """Bytes written but not yet read by this consumer"""
+        return self.ring._head - self.position
+
+    def read(self, max_bytes, timeout=None):
+        """Return up to `max_bytes` of unread audio, waiting up to `timeout` for some.
+
+        Returns b'' on timeout, or once the buffer is closed and fully read.
+        """
+        ring = self.ring
+        with ring._condition:
+            if not ring._condition.wait_for(lambda: ring.closed or ring._head > self.position, timeout):
+                return b''
+            oldest = ring._head - ring.capacity
+            if self.position < oldest:
+                self.dropped_bytes += oldest - self.position
+                ring.dropped_bytes += oldest - self.position
+                self.position = oldest
+            size = min(max_bytes, ring._head - self.position)
+            start = self.position % ring.capacity
+            first = min(size, ring.capacity - start)
+            data = bytes(ring._view[start:start + first])
+            if first < size:
+                data += ring._view[:size - first]
+            self.position += size
+            # A blocked writer may be waiting for this consumer to free space
+            ring._condition.notify_all()
+        return data
+
+    def close(self):
+        self.ring.remove_reader(self)
+
+
+def pcm16_level(data):
+    """Return the RMS level of little-endian 16-bit PCM in dBFS (-inf for silence)"""
+    samples = array('h')
+    samples.frombytes(data[:len(data) - len(data) % 2])
+    if not samples:
+        return -math.inf
+    mean_square = sum(sample * sample for sample in samples) / len(samples)
+    if not mean_square:
+        return -math.inf
+    return 10 * math.log10(mean_square / (32768 * 32768))
@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from threading import Condition, Lock, Thread
+
+logger = logging.getLogger(__name__)
+
+
+class PendingAudio:
+    """Chunks of one in-flight synthesis, readable by any number of callers while it runs"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._condition = Condition()
+
+    def append(self, chunk):
+        with self._condition:
+            self.chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, error=None):
+        with self._condition:
+            self.done = True
+            self.error = error
+            self._condition.notify_all()
+
+    def follow(self):
+        """Yield the audio from the start as it arrives; raises the producer's error at the end"""
+        sent = 0
+        while True:
+            with self._condition:
+                while sent == len(self.chunks) and not self.done:
+                    self._condition.wait()
+                chunks = self.chunks[sent:]
+                done, error = self.done, self.error
+            sent += len(chunks)
+            if chunks:
+                yield b''.join(chunks)
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+class AudioCache:
+    """Content-addressed cache for synthesized speech.
+
+    Audio is keyed by a hash of (text, voice, output format). The memory tier is an
+    LRU bounded by total bytes, with a TTL per entry. Entries evicted from memory
+    spill to an optional disk tier, which has its own byte budget. `stream` also
+    de-duplicates concurrent misses, so only one synthesis runs per key and every
+    caller receives the same bytes.
+    """
+
+    def __init__(self, max_bytes, ttl, disk_dir=None, disk_max_bytes=0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir if disk_dir and disk_max_bytes > 0 else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()   # key -> (data, expires_at)
+        self._bytes = 0
+        self._disk_entries = OrderedDict()   # key -> size, oldest first
+        self._disk_bytes = 0
+        self._inflight = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(text, voice, output_format):
+        """Hash the inputs that determine the synthesized audio"""
+        return hashlib.sha256(f"{voice}\0{output_format}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return cached audio bytes or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                data, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return data
+                self._remove(key)
+
+        data = self._read_disk(key, now)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.put(key, data)
+        return data
+
+    def put(self, key, data):
+        """Store audio bytes, evicting least recently used entries over the byte budget"""
+        if len(data) > self.max_bytes:
+            self._write_disk(key, data)
+            return
+
+        spilled = []
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (data, time.time() + self.ttl)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                old_key, (old_data, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_data)
+                spilled.append((old_key, old_data))
+
+        for old_key, old_data in spilled:
+            self._write_disk(old_key, old_data)
+
+    def stream(self, key, chunk_factory):
+        """Yield audio for `key`, running `chunk_factory()` once for all concurrent callers.
+
+        On a miss a background thread drains the factory into a shared buffer as fast
+        as it produces, then caches the result. Every caller, the first included,
+        reads that buffer as chunks arrive, so no caller waits on another's download
+        and the factory never waits on a caller. Errors from the factory are raised
+        in every caller.
+        """
+        data = self.get(key)
+        if data is not None:
+            yield data
+            return
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = PendingAudio()
+                Thread(target=self._produce, args=(key, pending, chunk_factory),
+                       name='audio-cache-producer', daemon=True).start()
+
+        yield from pending.follow()
+
+    def _produce(self, key, pending, chunk_factory):
+        try:
+            for chunk in chunk_factory():
+                pending.append(chunk)
+            # Cached before waiters are released, so a later request finds it
+            self.put(key, b''.join(pending.chunks))
+            pending.finish()
+        except BaseException as e:
+            pending.finish(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        """Return a snapshot of cache usage"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'disk_entries': len(self._disk_entries),
+                'disk_bytes': self._disk_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _remove(self, key):
+        data, _ = self._entries.pop(key)
+        self._bytes -= len(data)
+
+    # Disk tier
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.audio')
+
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.audio'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-len('.audio')], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk_entries[key] = size
+            self._disk_bytes += size
+
+    def _read_disk(self, key, now):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= now:
+                self._delete_disk(key)
+                return None
+            with open(path, 'rb') as audio_file:
+                return audio_file.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, data):
+        if not self.disk_dir or len(data) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as audio_file:
+                audio_file.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write audio cache file %s: %s", path, e)
+            return
+
+        with self._lock:
+            old_size = self._disk_entries.pop(key, 0)
+            self._disk_entries[key] = len(data)
+            self._disk_bytes += len(data) - old_size
+            evicted = []
+            while self._disk_bytes > self.disk_max_bytes and self._disk_entries:
+                old_key, size = self._disk_entries.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.unlink(self._disk_path(old_key))
+            except OSError:
+                pass
+
+    def _delete_disk(self, key):
+        with self._lock:
+            self._disk_bytes -= self._disk_entries.pop(key, 0)
+        try:
+            os.unlink(self._disk_path(key))
+        except OSError:
+            pass
@@ -0,0 +1,85 @@
+import logging
+from collections import deque
+from threading import Condition, Thread
+
+logger = logging.getLogger(__name__)
+
+
+class AudioIngest:
+    """Feeds audio frames received from a broadcaster into a Speech SDK push stream.
+
+    Frames are kept as the bytes objects they arrived in and handed to
+    `push_stream.write` unchanged, so audio is never copied or concatenated on the
+    way. A feeder thread drains the buffer, starting only once `prefill` bytes are
+    buffered so the uneven arrival of the first frames does not starve the recognizer
+    mid-word; after that the buffer absorbs bursts. `offer` refuses frames while more
+    than `max_buffered` bytes are waiting; the caller then stops reading its socket,
+    which pushes back on the sender.
+    """
+
+    def __init__(self, push_stream, max_buffered=64000, prefill=3200):
+        self.push_stream = push_stream
+        self.max_buffered = max_buffered
+        self.prefill = prefill
+        self.closed = False
+        self.received_bytes = 0
+        self.written_bytes = 0
+        self.refused = 0
+        self._frames = deque()
+        self._buffered = 0
+        self._condition = Condition()
+        self._feeder = Thread(target=self._feed, name='audio-ingest-feeder', daemon=True)
+        self._feeder.start()
+
+    @property
+    def buffered(self):
+        return self._buffered
+
+    def offer(self, frame):
+        """Queue a frame; returns False if the buffer is full or closed and the frame was not taken"""
+        with self._condition:
+            if self.closed:
+                return False
+            if self._buffered >= self.max_buffered:
+                self.refused += 1
+                return False
+            self._frames.append(frame)
+            self._buffered += len(frame)
+            self.received_bytes += len(frame)
+            self._condition.notify()
+        return True
+
+    def close(self):
+        """Flush what is buffered, then close the push stream so recognition can finish"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+    def join(self, timeout=None):
+        self._feeder.join(timeout)
+
+    def _feed(self):
+        waiting_for = self.prefill
+        try:
+            while True:
+                with self._condition:
+                    while not self.closed and self._buffered < waiting_for:
+                        self._condition.wait()
+                    if not self._frames:
+                        if self.closed:
+                            break
+                        continue
+                    frame = self._frames.popleft()
+                    self._buffered -= len(frame)
+                    waiting_for = 1
+                self.push_stream.write(frame)
+                self.written_bytes += len(frame)
+        except Exception as e:
+            logger.error("Audio ingest feeder failed: %s", e)
+        finally:
+            self.closed = True
+            try:
+                self.push_stream.close()
+            except Exception as e:
+                logger.warning("Error closing push stream: %s", e)
+
@@ -0,0 +1,318 @@
+"""Local stand-in for a Redis server, enough for SHARED_STATE_URL.
+
+Speaks RESP2 over TCP and keeps everything in memory. Supports the commands
+shared_state.RedisState uses: strings (GET, SET with NX/EX, INCR/INCRBY, DEL, EXPIRE),
+hashes (HSET, HGET, HDEL), sorted sets (ZADD, ZREM, ZCOUNT, ZREMRANGEBYSCORE),
+pattern pub/sub (PUBLISH, PSUBSCRIBE, PUNSUBSCRIBE) and PING. Pipelines work;
+MULTI/EXEC does not. EVAL/EVALSHA run only shared_state's own scripts, through
+Python equivalents, since there is no Lua here.
+
+    python -m benchmarks.fake_redis --port 16379
+    SHARED_STATE_URL=redis://127.0.0.1:16379/0 python -m benchmarks.serve --port 18080
+"""
+import argparse
+import asyncio
+import fnmatch
+import hashlib
+import math
+import time
+
+from shared_state import PUBLISH_SCRIPT
+
+
+class CommandError(Exception):
+    def __init__(self, message, code='ERR'):
+        super().__init__(message)
+        self.code = code
+
+
+def encode(value):
+    """Encode a reply in RESP2"""
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, bool):
+        return b':%d\r\n' % value
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, str):
+        return b'+%s\r\n' % value.encode('utf-8')
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    if isinstance(value, CommandError):
+        return b'-%s %s\r\n' % (value.code.encode('ascii'), str(value).encode('utf-8'))
+    return b'*%d\r\n' % len(value) + b''.join(encode(item) for item in value)
+
+
+def parse_score(value):
+    """Parse a ZCOUNT/ZREMRANGEBYSCORE bound; returns (score, exclusive)"""
+    text = value.decode('ascii').lower()
+    exclusive = text.startswith('(')
+    text = text.lstrip('(')
+    if text in ('-inf', '+inf', 'inf'):
+        return (-math.inf if text == '-inf' else math.inf), exclusive
+    return float(text), exclusive
+
+
+def in_range(score, low, high):
+    (low, low_open), (high, high_open) = low, high
+    return ((score > low) if low_open else (score >= low)) and ((score < high) if high_open else (score <= high))
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.subscribers = {}  # writer -> set of patterns
+        self.scripts = {}  # sha1 -> script source
+
+    def _get(self, key, kind=None):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            del self.expires[key]
+        value = self.data.get(key)
+        if value is not None and kind is not None and not isinstance(value, kind):
+            raise CommandError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _set(self, key, value):
+        self.data[key] = value
+        self.expires.pop(key, None)
+
+    def execute(self, writer, args):
+        name = args[0].upper().decode('ascii')
+        handler = getattr(self, 'cmd_' + name.lower(), None)
+        if handler is None:
+            raise CommandError(f"unknown command '{name}'")
+        return handler(writer, *args[1:])
+
+    def cmd_ping(self, writer, message=None):
+        if writer in self.subscribers:
+            return [b'pong', message or b'']
+        return message if message is not None else 'PONG'
+
+    def cmd_client(self, writer, *args):
+        return 'OK'
+
+    def cmd_select(self, writer, db):
+        return 'OK'
+
+    def cmd_get(self, writer, key):
+        return self._get(key, bytes)
+
+    def cmd_set(self, writer, key, value, *options):
+        options = [option.upper() for option in options]
+        exists = self._get(key) is not None
+        if (b'NX' in options and exists) or (b'XX' in options and not exists):
+            return None
+        self._set(key, value)
+        for unit, scale in ((b'EX', 1), (b'PX', 0.001)):
+            if unit in options:
+                self.expires[key] = time.monotonic() + int(options[options.index(unit) + 1]) * scale
+        return 'OK'
+
+    def cmd_incr(self, writer, key):
+        return self.cmd_incrby(writer, key, b'1')
+
+    def cmd_incrby(self, writer, key, amount):
+        value = int(self._get(key, bytes) or 0) + int(amount)
+        deadline = self.expires.get(key)
+        self.data[key] = b'%d' % value
+        if deadline is not None:
+            self.expires[key] = deadline
+        return value
+
+    def cmd_del(self, writer, *keys):
+        removed = 0
+        for key in keys:
+            if self._get(key) is not None:
+                del self.data[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_expire(self, writer, key, seconds):
+        if self._get(key) is None:
+            return 0
+        self.expires[key] = time.monotonic() + int(seconds)
+        return 1
+
+    def cmd_hset(self, writer, key, *pairs):
+        fields = self._get(key, dict)
+        if fields is None:
+            fields = self.data[key] = {}
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in fields
+            fields[field] = value
+        return added
+
+    def cmd_hget(self, writer, key, field):
+        return (self._get(key, dict) or {}).get(field)
+
+    def cmd_hdel(self, writer, key, *fields):
+        values = self._get(key, dict) or {}
+        return sum(values.pop(field, None) is not None for field in fields)
+
+    def cmd_zadd(self, writer, key, *pairs):
+        members = self._get(key, ZSet)
+        if members is None:
+            members = self.data[key] = ZSet()
+        added = 0
+        for score, member in zip(pairs[::2], pairs[1::2]):
+            added += member not in members
+            members[member] = float(score)
+        return added
+
+    def cmd_zrem(self, writer, key, *members):
+        values = self._get(key, ZSet) or {}
+        return sum(values.pop(member, None) is not None for member in members)
+
+    def cmd_zcount(self, writer, key, low, high):
+        low, high = parse_score(low), parse_score(high)
+        return sum(in_range(score, low, high) for score in (self._get(key, ZSet) or {}).values())
+
+    def cmd_zremrangebyscore(self, writer, key, low, high):
+        values = self._get(key, ZSet) or {}
+        low, high = parse_score(low), parse_score(high)
+        doomed = [member for member, score in values.items() if in_range(score, low, high)]
+        for member in doomed:
+            del values[member]
+        return len(doomed)
+
+    def cmd_publish(self, writer, channel, message):
+        receivers = 0
+        name = channel.decode('latin-1')
+        for subscriber, patterns in list(self.subscribers.items()):
+            for pattern in patterns:
+                if fnmatch.fnmatchcase(name, pattern.decode('latin-1')):
+                    subscriber.write(encode([b'pmessage', pattern, channel, message]))
+                    receivers += 1
+        return receivers
+
+    def cmd_psubscribe(self, writer, *patterns):
+        subscribed = self.subscribers.setdefault(writer, set())
+        replies = []
+        for pattern in patterns:
+            subscribed.add(pattern)
+            replies.append(encode([b'psubscribe', pattern, len(subscribed)]))
+        return Raw(b''.join(replies))
+
+    def cmd_punsubscribe(self, writer, *patterns):
+        subscribed = self.subscribers.get(writer, set())
+        patterns = patterns or list(subscribed)
+        replies = []
+        for pattern in patterns:
+            subscribed.discard(pattern)
+            replies.append(encode([b'punsubscribe', pattern, len(subscribed)]))
+        if not subscribed:
+            self.subscribers.pop(writer, None)
+        return Raw(b''.join(replies) or encode([b'punsubscribe', None, 0]))
+
+    def cmd_script(self, writer, subcommand, *args):
+        subcommand = subcommand.upper()
+        if subcommand == b'LOAD':
+            sha = hashlib.sha1(args[0]).hexdigest()
+            self.scripts[sha] = args[0].decode('utf-8')
+            return sha.encode('ascii')
+        if subcommand == b'EXISTS':
+            return [int(sha.decode('ascii') in self.scripts) for sha in args]
+        if subcommand == b'FLUSH':
+            self.scripts.clear()
+            return 'OK'
+        raise CommandError(f"unknown SCRIPT subcommand '{subcommand.decode('ascii')}'")
+
+    def cmd_eval(self, writer, script, numkeys, *args):
+        return self._run_script(writer, script.decode('utf-8'), int(numkeys), args)
+
+    def cmd_evalsha(self, writer, sha, numkeys, *args):
+        script = self.scripts.get(sha.decode('ascii').lower())
+        if script is None:
+            raise CommandError("No matching script. Please use EVAL.", code='NOSCRIPT')
+        return self._run_script(writer, script, int(numkeys), args)
+
+    def _run_script(self, writer, script, numkeys, args):
+        # Commands run back to back on the event loop, so a script is atomic as in Redis
+        handler = SCRIPTS.get(script)
+        if handler is None:
+            raise CommandError("only shared_state's scripts are supported")
+        return handler(self, writer, list(args[:numkeys]), list(args[numkeys:]))
+
+    def script_publish(self, writer, keys, args):
+        seq = self.cmd_incr(writer, keys[0])
+        self.cmd_publish(writer, keys[1], b'%d %s\n\n' % (seq, args[0]) + args[1])
+        return seq
+
+    def cmd_flushall(self, writer, *args):
+        self.data.clear()
+        self.expires.clear()
+        return 'OK'
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                try:
+                    reply = self.execute(writer, args)
+                except CommandError as e:
+                    reply = e
+                except (TypeError, ValueError) as e:
+                    reply = CommandError(str(e))
+                writer.write(reply.data if isinstance(reply, Raw) else encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.subscribers.pop(writer, None)
+            writer.close()
+
+
+SCRIPTS = {PUBLISH_SCRIPT: FakeRedis.script_publish}
+
+
+class ZSet(dict):
+    """Sorted set members and scores (ordering is not needed by any supported command)"""
+
+
+class Raw:
+    """A reply that is already encoded"""
+
+    def __init__(self, data):
+        self.data = data
+
+
+async def read_command(reader):
+    """Read one command as a list of bytes arguments, or None at end of stream"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        # Inline command, e.g. from telnet or redis-cli's PING
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        length = int(header[1:])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+async def serve(host, port):
+    fake = FakeRedis()
+    server = await asyncio.start_server(fake.handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=16379)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
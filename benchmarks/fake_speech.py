@@ -0,0 +1,284 @@
+"""Stand-ins for the Azure Speech SDK and PyAudio used by the benchmark server.
+
+`install()` registers fake `azure.cognitiveservices.speech` and `pyaudio` modules
+before application.py is imported. The fake recognizer emits a scripted utterance
+every BENCH_UTTERANCE_INTERVAL seconds, preceded by BENCH_INTERIM_RESULTS interim
+results, while continuous recognition is running. Each utterance carries the time it
+was emitted ("... at <epoch seconds> ...") so listeners can measure end-to-end
+latency. The fake synthesizer waits BENCH_TTS_LATENCY_MS and returns BENCH_TTS_BYTES
+of audio.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+import types
+
+UTTERANCE_INTERVAL = float(os.environ.get('BENCH_UTTERANCE_INTERVAL', 2.0))
+INTERIM_RESULTS = int(os.environ.get('BENCH_INTERIM_RESULTS', 3))
+WORDS_PER_UTTERANCE = int(os.environ.get('BENCH_WORDS_PER_UTTERANCE', 12))
+TTS_LATENCY = float(os.environ.get('BENCH_TTS_LATENCY_MS', 150)) / 1000
+TTS_BYTES = int(os.environ.get('BENCH_TTS_BYTES', 18000))
+
+WORDS = ("grace peace love hope faith light word life joy truth mercy spirit "
+         "glory praise kingdom heart people church family prayer").split()
+
+# Counters reported by the benchmark server's stats endpoint
+stats = {'utterances': 0, 'interim_results': 0, 'syntheses': 0, 'audio_bytes': 0}
+_utterance_ids = itertools.count(1)
+
+
+class EventSignal:
+    def __init__(self):
+        self._callbacks = []
+
+    def connect(self, callback):
+        self._callbacks.append(callback)
+
+    def fire(self, evt):
+        for callback in self._callbacks:
+            callback(evt)
+
+
+class Enum:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+class ResultReason:
+    RecognizedSpeech = Enum('RecognizedSpeech')
+    RecognizingSpeech = Enum('RecognizingSpeech')
+    SynthesizingAudioStarted = Enum('SynthesizingAudioStarted')
+    SynthesizingAudioCompleted = Enum('SynthesizingAudioCompleted')
+    Canceled = Enum('Canceled')
+
+
+class StreamStatus:
+    AllData = Enum('AllData')
+    PartialData = Enum('PartialData')
+    Canceled = Enum('Canceled')
+
+
+class SpeechSynthesisOutputFormat:
+    Audio24Khz48KBitRateMonoMp3 = Enum('Audio24Khz48KBitRateMonoMp3')
+    Riff16Khz16BitMonoPcm = Enum('Riff16Khz16BitMonoPcm')
+
+
+class SpeechConfig:
+    def __init__(self, subscription=None, region=None, **kwargs):
+        self.subscription = subscription
+        self.region = region
+        self.speech_recognition_language = None
+        self.speech_synthesis_voice_name = None
+        self.output_format = None
+
+    def set_speech_synthesis_output_format(self, output_format):
+        self.output_format = output_format
+
+    def set_property(self, *args, **kwargs):
+        pass
+
+
+class Result:
+    def __init__(self, reason, text='', audio_data=b''):
+        self.reason = reason
+        self.text = text
+        self.audio_data = audio_data
+        self.cancellation_details = None
+
+    def __repr__(self):
+        return f"Result(reason={self.reason}, text={self.text!r})"
+
+
+class RecognitionEventArgs:
+    def __init__(self, result):
+        self.result = result
+
+
+class ResultFuture:
+    def __init__(self, result):
+        self._result = result
+
+    def get(self):
+        return self._result
+
+
+class SpeechRecognizer:
+    """Emits timestamped utterances on a background thread while recognition runs"""
+
+    def __init__(self, speech_config=None, audio_config=None, **kwargs):
+        self.recognizing = EventSignal()
+        self.recognized = EventSignal()
+        self.canceled = EventSignal()
+        self.session_started = EventSignal()
+        self.session_stopped = EventSignal()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start_continuous_recognition(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='fake-recognizer', daemon=True)
+        self._thread.start()
+
+    def start_continuous_recognition_async(self):
+        self.start_continuous_recognition()
+        return ResultFuture(None)
+
+    def stop_continuous_recognition(self):
+        self._stopped.set()
+
+    def stop_continuous_recognition_async(self):
+        self.stop_continuous_recognition()
+        return ResultFuture(None)
+
+    def _run(self):
+        interim_delay = UTTERANCE_INTERVAL / (INTERIM_RESULTS + 1)
+        while not self._stopped.wait(interim_delay):
+            utterance_id = next(_utterance_ids)
+            words = [WORDS[(utterance_id + i) % len(WORDS)] for i in range(WORDS_PER_UTTERANCE)]
+            for step in range(1, INTERIM_RESULTS + 1):
+                partial = ' '.join(words[:max(1, len(words) * step // (INTERIM_RESULTS + 1))])
+                self.recognizing.fire(RecognitionEventArgs(Result(ResultReason.RecognizingSpeech, partial)))
+                stats['interim_results'] += 1
+                if self._stopped.wait(interim_delay):
+                    return
+            text = f"Utterance {utterance_id} at {time.time():.6f} " + ' '.join(words) + '.'
+            self.recognized.fire(RecognitionEventArgs(Result(ResultReason.RecognizedSpeech, text)))
+            stats['utterances'] += 1
+
+
+class SpeechSynthesizer:
+    def __init__(self, speech_config=None, audio_config=None, **kwargs):
+        self.speech_config = speech_config
+
+    def _synthesize(self, text):
+        time.sleep(TTS_LATENCY)
+        stats['syntheses'] += 1
+        return Result(ResultReason.SynthesizingAudioCompleted, text, bytes(TTS_BYTES))
+
+    def start_speaking_text_async(self, text):
+        return ResultFuture(self._synthesize(text))
+
+    def speak_text_async(self, text):
+        return ResultFuture(self._synthesize(text))
+
+    def speak_text(self, text):
+        return self._synthesize(text)
+
+
+class AudioDataStream:
+    def __init__(self, result):
+        self._data = memoryview(result.audio_data)
+        self._position = 0
+        self.status = StreamStatus.AllData
+        self.cancellation_details = None
+
+    def read_data(self, buffer):
+        size = min(len(buffer), len(self._data) - self._position)
+        if isinstance(buffer, (bytearray, memoryview)):
+            buffer[:size] = self._data[self._position:self._position + size]
+        self._position += size
+        return size
+
+
+class Connection:
+    def __init__(self):
+        self.connected = EventSignal()
+        self.disconnected = EventSignal()
+
+    @classmethod
+    def from_speech_synthesizer(cls, synthesizer):
+        return cls()
+
+    @classmethod
+    def from_recognizer(cls, recognizer):
+        return cls()
+
+    def open(self, for_continuous_recognition):
+        pass
+
+    def close(self):
+        pass
+
+
+class AudioConfig:
+    def __init__(self, use_default_microphone=False, filename=None, stream=None, **kwargs):
+        self.stream = stream
+
+
+class AudioStreamContainerFormat:
+    ANY = Enum('ANY')
+
+
+class AudioStreamFormat:
+    def __init__(self, samples_per_second=16000, bits_per_sample=16, channels=1, compressed_stream_format=None):
+        self.compressed_stream_format = compressed_stream_format
+
+
+class PushAudioInputStream:
+    """Accepts pushed audio and only counts it; the recognizer's output is scripted"""
+
+    def __init__(self, stream_format=None):
+        self.closed = False
+
+    def write(self, data):
+        stats['audio_bytes'] += len(data)
+
+    def close(self):
+        self.closed = True
+
+
+class PyAudioStream:
+    """Microphone stand-in that returns silence at the real capture rate"""
+
+    def __init__(self, rate=16000, frames_per_buffer=1024, **kwargs):
+        self._delay = frames_per_buffer / rate
+        self._frame = bytes(frames_per_buffer * 2)
+
+    def read(self, frames, exception_on_overflow=True):
+        time.sleep(self._delay)
+        return self._frame
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PyAudio:
+    def open(self, **kwargs):
+        return PyAudioStream(**kwargs)
+
+    def terminate(self):
+        pass
+
+
+def install():
+    """Register the fake modules so application.py imports them instead of the real SDKs"""
+    speech = types.ModuleType('azure.cognitiveservices.speech')
+    for name, value in list(globals().items()):
+        if isinstance(value, type) and name not in ('PyAudio', 'PyAudioStream'):
+            setattr(speech, name, value)
+    speech.audio = types.ModuleType('azure.cognitiveservices.speech.audio')
+    speech.audio.AudioConfig = AudioConfig
+    speech.audio.AudioStreamFormat = AudioStreamFormat
+    speech.audio.PushAudioInputStream = PushAudioInputStream
+
+    azure = sys.modules.get('azure') or types.ModuleType('azure')
+    cognitiveservices = types.ModuleType('azure.cognitiveservices')
+    azure.cognitiveservices = cognitiveservices
+    cognitiveservices.speech = speech
+    sys.modules['azure'] = azure
+    sys.modules['azure.cognitiveservices'] = cognitiveservices
+    sys.modules['azure.cognitiveservices.speech'] = speech
+    sys.modules['azure.cognitiveservices.speech.audio'] = speech.audio
+
+    pyaudio = types.ModuleType('pyaudio')
+    pyaudio.PyAudio = PyAudio
+    pyaudio.paInt16 = 8
+    sys.modules['pyaudio'] = pyaudio
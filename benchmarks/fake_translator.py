@@ -0,0 +1,90 @@
+"""Local stand-in for the Translator API's /translate endpoint.
+
+Every request waits `latency` (+/- `jitter`) milliseconds, then fails with a 500 at
+`error_rate`, is throttled with a 429 and Retry-After header at `throttle_rate`, or
+returns "[<to>] <text>" for every element and every `to=` language. GET /stats
+returns request, segment, error and throttle counters.
+
+    python -m benchmarks.fake_translator --port 18081 --latency 80 --throttle-rate 0.02
+"""
+import argparse
+import asyncio
+import random
+
+from aiohttp import web
+
+
+class FakeTranslator:
+    def __init__(self, latency=80, jitter=20, error_rate=0.0, throttle_rate=0.0, retry_after=1):
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.stats = {'requests': 0, 'segments': 0, 'characters': 0, 'languages': 0,
+                      'errors': 0, 'throttled': 0}
+
+    async def translate(self, request):
+        self.stats['requests'] += 1
+        body = await request.json()
+        languages = request.query.getall('to', [])
+
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = random.random()
+        if roll < self.throttle_rate:
+            self.stats['throttled'] += 1
+            return web.json_response(
+                {'error': {'code': 429001, 'message': 'The server rejected the request because the client has exceeded request limits.'}},
+                status=429, headers={'Retry-After': str(self.retry_after)}
+            )
+        if roll < self.throttle_rate + self.error_rate:
+            self.stats['errors'] += 1
+            return web.json_response({'error': {'code': 500000, 'message': 'An unexpected error occurred.'}}, status=500)
+
+        self.stats['segments'] += len(body)
+        self.stats['languages'] += len(body) * len(languages)
+        self.stats['characters'] += sum(len(item.get('Text', item.get('text', ''))) for item in body) * len(languages)
+        return web.json_response([
+            {'translations': [
+                {'text': f"[{language}] {item.get('Text', item.get('text', ''))}", 'to': language}
+                for language in languages
+            ]}
+            for item in body
+        ])
+
+    async def get_stats(self, request):
+        return web.json_response(self.stats)
+
+    async def reset_stats(self, request):
+        for key in self.stats:
+            self.stats[key] = 0
+        return web.json_response(self.stats)
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post('/translate', self.translate)
+        app.router.add_get('/stats', self.get_stats)
+        app.router.add_post('/stats/reset', self.reset_stats)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18081)
+    parser.add_argument('--latency', type=float, default=80, help='mean response time in ms')
+    parser.add_argument('--jitter', type=float, default=20, help='uniform jitter in ms')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+    args = parser.parse_args()
+
+    translator = FakeTranslator(args.latency, args.jitter, args.error_rate, args.throttle_rate, args.retry_after)
+    web.run_app(translator.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
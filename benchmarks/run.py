@@ -0,0 +1,423 @@
+"""Load test the translation server against local Translator and Speech stand-ins.
+
+Starts benchmarks.fake_translator and benchmarks.serve as subprocesses, connects
+listeners spread over the broadcast rooms and languages, then starts one broadcaster
+per room. The fake recognizer emits timestamped utterances, so every final a listener
+receives gives one end-to-end latency sample (recognized -> delivered). Listeners
+can also request speech for what they receive (--tts-ratio) or ask for translations
+the old way through /translate_realtime (--realtime-ratio).
+
+With --instances N, N servers share state through benchmarks.fake_redis. Listeners
+are spread over them round-robin, /translate_realtime is posted to a different
+instance than the one holding the listener's stream, every broadcast is started on
+the first instance and stopped on the last, and CPU and memory are summed.
+
+Prints one JSON document with latency percentiles, throughput, Translator calls per
+utterance, server memory per connection and CPU use:
+
+    python -m benchmarks.run --server asgi --broadcasters 3 --listeners 500 --duration 60 \\
+        --translator-latency 120 --throttle-rate 0.01 --output results.json
+
+Compare two runs with any JSON tool, e.g. `jq .latency.translation results.json`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+import uuid
+
+import aiohttp
+
+LANGUAGES = ['en', 'es', 'pt', 'yue', 'id']
+TTS_LANGUAGES = {'es', 'pt', 'yue', 'id'}
+UTTERANCE_PATTERN = re.compile(r'utterance (\d+) at (\d+\.\d+)', re.IGNORECASE)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def log(message):
+    print(f"[bench] {message}", file=sys.stderr, flush=True)
+
+
+def summarize(samples):
+    """Return count and p50/p95/p99/max (seconds) for a list of samples"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 6)
+
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 6),
+        'p50': rank(0.50),
+        'p95': rank(0.95),
+        'p99': rank(0.99),
+        'max': round(ordered[-1], 6)
+    }
+
+
+class Results:
+    def __init__(self):
+        self.latency = {
+            'translation': [], 'transcription': [], 'translate_realtime': [],
+            'synthesize_speech_ttfb': [], 'synthesize_speech_total': []
+        }
+        self.errors = {'stream': 0, 'translate_realtime': 0, 'synthesize_speech': 0}
+        self.sse_messages = 0
+        self.sse_bytes = 0
+        self.requests = {'translate_realtime': 0, 'synthesize_speech': 0}
+        self.delivered = 0
+        self.seen = {}   # room -> utterance ids delivered to anyone in the room
+        self.listeners_per_room = {}
+        self.connected = 0
+        self.recording = False
+
+
+async def read_events(response, results):
+    """Yield decoded SSE payloads from a streaming response"""
+    async for line in response.content:
+        if not line.startswith(b'data: '):
+            continue
+        results.sse_messages += 1
+        results.sse_bytes += len(line) + 1
+        yield json.loads(line[6:])
+
+
+def record_final(results, room, text, kind, received):
+    """Record the first delivery of an utterance to one listener"""
+    match = UTTERANCE_PATTERN.search(text)
+    if not match or not results.recording:
+        return False
+    utterance_id = int(match.group(1))
+    if utterance_id in received:
+        return False
+    received.add(utterance_id)
+    results.latency[kind].append(time.time() - float(match.group(2)))
+    results.delivered += 1
+    results.seen[room].add(utterance_id)
+    return True
+
+
+async def speak(session, base_url, text, language, results):
+    started = time.monotonic()
+    try:
+        async with session.post(f'{base_url}/synthesize_speech', json={'text': text, 'language': language}) as response:
+            if response.status != 200:
+                results.errors['synthesize_speech'] += 1
+                return
+            first = True
+            async for _ in response.content.iter_any():
+                if first:
+                    results.latency['synthesize_speech_ttfb'].append(time.monotonic() - started)
+                    first = False
+        results.latency['synthesize_speech_total'].append(time.monotonic() - started)
+        results.requests['synthesize_speech'] += 1
+    except aiohttp.ClientError:
+        results.errors['synthesize_speech'] += 1
+
+
+async def translate_realtime(session, base_url, room, client_id, text, language, results):
+    started = time.monotonic()
+    try:
+        async with session.post(f'{base_url}/translate_realtime', json={
+            'text': text, 'targetLanguage': language, 'clientId': client_id,
+            'isFinal': True, 'sessionId': room
+        }) as response:
+            await response.read()
+            if response.status != 200:
+                results.errors['translate_realtime'] += 1
+                return
+        results.latency['translate_realtime'].append(time.monotonic() - started)
+        results.requests['translate_realtime'] += 1
+    except aiohttp.ClientError:
+        results.errors['translate_realtime'] += 1
+
+
+async def translation_listener(session, base_url, room, language, tts, results, ready):
+    client_id = str(uuid.uuid4())
+    url = f'{base_url}/stream_translation/{language}?client_id={client_id}&session_id={room}'
+    received = set()
+    try:
+        async with session.get(url) as response:
+            ready.set_result(client_id)
+            async for event in read_events(response, results):
+                if event.get('type') != 'final' or not event.get('translation'):
+                    continue
+                if record_final(results, room, event['translation'], 'translation', received) and tts:
+                    asyncio.create_task(speak(session, base_url, event['translation'], language, results))
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        results.errors['stream'] += 1
+    finally:
+        if not ready.done():
+            ready.set_result(None)
+
+
+async def transcription_listener(session, base_url, room, results, ready, realtime_language=None, translation_ready=None,
+                                 post_url=None):
+    url = f'{base_url}/stream_transcription?session_id={room}'
+    received = set()
+    # Realtime clients post with the client ID of their translation stream
+    client_id = await translation_ready if translation_ready else None
+    try:
+        async with session.get(url) as response:
+            ready.set_result(True)
+            async for event in read_events(response, results):
+                if not event.get('is_final') or not event.get('transcription'):
+                    continue
+                if realtime_language:
+                    if results.recording:
+                        asyncio.create_task(translate_realtime(
+                            session, post_url or base_url, room, client_id, event['transcription'], realtime_language, results
+                        ))
+                else:
+                    record_final(results, room, event['transcription'], 'transcription', received)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        results.errors['stream'] += 1
+    finally:
+        if not ready.done():
+            ready.set_result(None)
+
+
+async def get_json(session, url):
+    async with session.get(url) as response:
+        return await response.json()
+
+
+async def wait_until_up(session, url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return await get_json(session, url)
+        except (aiohttp.ClientError, json.JSONDecodeError):
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def server_stats(session, base_urls, wait=False):
+    """/_bench/stats of every instance, with numbers summed"""
+    fetch = wait_until_up if wait else get_json
+    total = {}
+    for base_url in base_urls:
+        stats = await fetch(session, f'{base_url}/_bench/stats')
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                total.setdefault(key, {})
+                for name, count in value.items():
+                    total[key][name] = total[key].get(name, 0) + count
+            else:
+                total[key] = total.get(key, 0) + value
+    return total
+
+
+async def run_load(args, base_urls, translator_url):
+    results = Results()
+    rooms = [f'bench-{i + 1}' for i in range(args.broadcasters)]
+    for room in rooms:
+        results.seen[room] = set()
+        results.listeners_per_room[room] = 0
+
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await wait_until_up(session, f'{translator_url}/stats')
+        idle = await server_stats(session, base_urls, wait=True)
+
+        log(f"Connecting {args.listeners} listeners to {len(rooms)} rooms")
+        loop = asyncio.get_running_loop()
+        tasks, waiters = [], []
+        connections = 0
+        rng = random.Random(args.seed)
+        for i in range(args.listeners):
+            base_url = base_urls[i % len(base_urls)]
+            room = rooms[i % len(rooms)]
+            language = args.languages[(i // len(rooms)) % len(args.languages)]
+            results.listeners_per_room[room] += 1
+            ready = loop.create_future()
+            waiters.append(ready)
+            if language == 'en':
+                tasks.append(asyncio.create_task(transcription_listener(session, base_url, room, results, ready)))
+                connections += 1
+                continue
+
+            tts = language in TTS_LANGUAGES and rng.random() < args.tts_ratio
+            tasks.append(asyncio.create_task(
+                translation_listener(session, base_url, room, language, tts, results, ready)
+            ))
+            connections += 1
+            if rng.random() < args.realtime_ratio:
+                realtime_ready = loop.create_future()
+                waiters.append(realtime_ready)
+                tasks.append(asyncio.create_task(transcription_listener(
+                    session, base_url, room, results, realtime_ready, language, ready,
+                    post_url=base_urls[(i + 1) % len(base_urls)]
+                )))
+                connections += 1
+            if args.connect_rate and i % args.connect_rate == args.connect_rate - 1:
+                await asyncio.sleep(1)
+        await asyncio.gather(*waiters)
+        results.connected = sum(1 for waiter in waiters if waiter.result())
+        await asyncio.sleep(2)
+        loaded = await server_stats(session, base_urls)
+        log(f"{results.connected}/{connections} streams connected")
+
+        async with session.post(f'{translator_url}/stats/reset') as response:
+            await response.read()
+        started_client = resource.getrusage(resource.RUSAGE_SELF)
+        started = time.monotonic()
+        before = await server_stats(session, base_urls)
+        for room in rooms:
+            async with session.post(f'{base_urls[0]}/start_stream?session_id={room}&type=broadcaster') as response:
+                await response.read()
+        results.recording = True
+        log(f"Broadcasting for {args.duration}s")
+        await asyncio.sleep(args.duration)
+
+        for room in rooms:
+            async with session.post(f'{base_urls[-1]}/stop_stream?session_id={room}') as response:
+                await response.read()
+        await asyncio.sleep(args.drain)
+        results.recording = False
+        elapsed = time.monotonic() - started
+        after = await server_stats(session, base_urls)
+        finished_client = resource.getrusage(resource.RUSAGE_SELF)
+        translator = await get_json(session, f'{translator_url}/stats')
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    utterances = after['speech']['utterances'] - before['speech']['utterances']
+    expected = sum(len(results.seen[room]) * results.listeners_per_room[room] for room in rooms)
+    server_cpu = after['cpu_seconds'] - before['cpu_seconds']
+    client_cpu = (finished_client.ru_utime + finished_client.ru_stime
+                  - started_client.ru_utime - started_client.ru_stime)
+
+    return {
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'connections': {'requested': connections, 'connected': results.connected},
+        'latency': {kind: summarize(samples) for kind, samples in results.latency.items()},
+        'throughput': {
+            'elapsed_seconds': round(elapsed, 3),
+            'utterances': utterances,
+            'utterances_per_second': round(utterances / elapsed, 3),
+            'finals_delivered': results.delivered,
+            'delivery_ratio': round(results.delivered / expected, 4) if expected else None,
+            'sse_messages_per_second': round(results.sse_messages / elapsed, 1),
+            'sse_bytes_per_second': round(results.sse_bytes / elapsed, 1),
+            'translate_realtime_per_second': round(results.requests['translate_realtime'] / elapsed, 3),
+            'synthesize_speech_per_second': round(results.requests['synthesize_speech'] / elapsed, 3)
+        },
+        'translator': dict(translator, calls_per_utterance=round(translator['requests'] / utterances, 3) if utterances else None),
+        'speech': {key: after['speech'][key] - before['speech'][key] for key in after['speech']},
+        'server': {
+            'mode': args.server,
+            'instances': len(base_urls),
+            'cpu_seconds': round(server_cpu, 3),
+            'cpu_cores_used': round(server_cpu / elapsed, 3),
+            'rss_idle_bytes': idle['rss_bytes'],
+            'rss_connected_bytes': loaded['rss_bytes'],
+            'rss_end_bytes': after['rss_bytes'],
+            'memory_per_connection_bytes': (
+                round((loaded['rss_bytes'] - idle['rss_bytes']) / results.connected) if results.connected else None
+            )
+        },
+        'client': {
+            'cpu_seconds': round(client_cpu, 3),
+            'cpu_cores_used': round(client_cpu / elapsed, 3)
+        },
+        'errors': results.errors
+    }
+
+
+def start_process(args, env=None):
+    return subprocess.Popen(args, cwd=ROOT, env=env, stdout=sys.stderr, stderr=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=['waitress', 'asgi'], default='asgi')
+    parser.add_argument('--threads', type=int, default=8, help='waitress worker threads')
+    parser.add_argument('--port', type=int, default=18080, help='server port; instance i listens on port + 10 * i')
+    parser.add_argument('--instances', type=int, default=1, help='server processes sharing state through fake_redis')
+    parser.add_argument('--redis-port', type=int, default=16379)
+    parser.add_argument('--broadcasters', type=int, default=1, help='concurrent rooms, one broadcaster each')
+    parser.add_argument('--listeners', type=int, default=50, help='listeners spread over rooms and languages')
+    parser.add_argument('--languages', type=lambda value: value.split(','), default=LANGUAGES)
+    parser.add_argument('--duration', type=float, default=30, help='seconds of broadcasting')
+    parser.add_argument('--drain', type=float, default=3, help='seconds to wait for stragglers after stopping')
+    parser.add_argument('--connect-rate', type=int, default=500, help='listeners opened per second (0 = all at once)')
+    parser.add_argument('--utterance-interval', type=float, default=2.0, help='seconds between recognized utterances')
+    parser.add_argument('--interim-results', type=int, default=3, help='interim results before each utterance')
+    parser.add_argument('--tts-ratio', type=float, default=0.1, help='fraction of listeners requesting speech')
+    parser.add_argument('--tts-latency', type=float, default=150, help='fake synthesis time in ms')
+    parser.add_argument('--tts-bytes', type=int, default=18000, help='fake synthesized audio size')
+    parser.add_argument('--realtime-ratio', type=float, default=0.0,
+                        help='fraction of listeners also calling /translate_realtime for every final')
+    parser.add_argument('--translator-port', type=int, default=18081)
+    parser.add_argument('--translator-latency', type=float, default=80, help='fake Translator response time in ms')
+    parser.add_argument('--translator-jitter', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of Translator calls failing with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of Translator calls answered 429')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    args = parser.parse_args()
+
+    # Every listener holds a socket
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    translator = start_process([
+        sys.executable, '-m', 'benchmarks.fake_translator', '--port', str(args.translator_port),
+        '--latency', str(args.translator_latency), '--jitter', str(args.translator_jitter),
+        '--error-rate', str(args.error_rate), '--throttle-rate', str(args.throttle_rate),
+        '--retry-after', str(args.retry_after)
+    ])
+    translator_url = f'http://127.0.0.1:{args.translator_port}'
+    env = dict(
+        os.environ,
+        TRANSLATOR_ENDPOINT=translator_url,
+        BENCH_UTTERANCE_INTERVAL=str(args.utterance_interval),
+        BENCH_INTERIM_RESULTS=str(args.interim_results),
+        BENCH_TTS_LATENCY_MS=str(args.tts_latency),
+        BENCH_TTS_BYTES=str(args.tts_bytes),
+        MAX_ROOMS=str(max(args.broadcasters, int(os.environ.get('MAX_ROOMS', 50))))
+    )
+    processes = [translator]
+    if args.instances > 1:
+        processes.append(start_process([sys.executable, '-m', 'benchmarks.fake_redis', '--port', str(args.redis_port)]))
+        env['SHARED_STATE_URL'] = f'redis://127.0.0.1:{args.redis_port}/0'
+    ports = [args.port + 10 * i for i in range(args.instances)]
+    for port in ports:
+        processes.append(start_process([
+            sys.executable, '-m', 'benchmarks.serve', '--server', args.server,
+            '--port', str(port), '--threads', str(args.threads)
+        ], env=env))
+
+    try:
+        report = asyncio.run(run_load(args, [f'http://127.0.0.1:{port}' for port in ports], translator_url))
+    finally:
+        # Servers first, so they can still reach the shared state while shutting down
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Boot application:app (or asgi:app) with the fake Speech SDK for benchmarking.
+
+The Translator endpoint comes from TRANSLATOR_ENDPOINT, so point it at
+benchmarks.fake_translator. Adds GET /_bench/stats with the fake recognizer and
+synthesizer counters plus this process's CPU time and resident memory.
+
+    TRANSLATOR_ENDPOINT=http://127.0.0.1:18081 python -m benchmarks.serve --server asgi --port 18080
+"""
+import argparse
+import logging
+import os
+import resource
+import time
+
+from benchmarks import fake_speech
+
+
+def process_usage():
+    """Return (cpu_seconds, rss_bytes) for this process"""
+    cpu = time.process_time()
+    try:
+        with open('/proc/self/statm') as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Peak rather than current RSS, but still comparable between runs
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return cpu, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=['waitress', 'asgi'], default='asgi')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--threads', type=int, default=8, help='waitress worker threads')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    fake_speech.install()
+    # Keep runs independent of earlier cache contents
+    os.environ.setdefault('TRANSLATION_CACHE_DB', '')
+    os.environ.setdefault('TTS_CACHE_DIR', '')
+
+    import application
+    from flask import jsonify
+
+    application.logger.setLevel(args.log_level)
+    logging.getLogger().setLevel(args.log_level)
+
+    def bench_stats():
+        cpu, rss = process_usage()
+        return jsonify({
+            'cpu_seconds': cpu,
+            'rss_bytes': rss,
+            'speech': dict(fake_speech.stats),
+            'rooms': len(application.rooms),
+            'clients': sum(len(room.clients) for room in application.rooms.rooms())
+        })
+
+    application.app.add_url_rule('/_bench/stats', 'bench_stats', bench_stats)
+
+    if args.server == 'asgi':
+        import asgi
+        import uvicorn
+        uvicorn.run(asgi.app, host=args.host, port=args.port, log_level='warning')
+    else:
+        from waitress import serve
+        serve(application.app, host=args.host, port=args.port, threads=args.threads,
+              connection_limit=10000, channel_timeout=600)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import asyncio
+import time
+import weakref
+from threading import Lock, Event
+
+
+class BroadcastHub:
+    """Fixed-size ring buffer that delivers every published message to all subscribers.
+
+    Each message is stored once with a sequence number. Subscribers keep their own
+    cursor (the last sequence number they have read), so publishing costs O(1)
+    regardless of how many listeners are connected, and memory is bounded by the
+    ring capacity. A subscriber that falls more than `capacity` messages behind
+    skips ahead and is told how many messages it missed. Messages are handed out
+    as stored, so publishing encoded frames lets every subscriber share one copy.
+
+    Subscribers can wait from threads (`read`) or from coroutines (`aread`). Coroutine
+    subscribers on the same event loop share one wake-up future, so a publish costs
+    one callback per loop rather than one per subscriber.
+
+    Sequence numbers start from the creation time in milliseconds, so a hub created
+    later (after a restart, or for a re-created room) numbers its messages above an
+    earlier hub's, and a cursor from an earlier hub is recognised as foreign.
+    `encode(seq, message)`, when given, turns a message into what is stored, e.g. to
+    stamp it with its sequence number.
+
+    When several processes mirror one hub, the publisher can pass the sequence number
+    (from a shared counter, with `start` read from the same counter) so every copy
+    numbers a message the same way.
+    """
+
+    def __init__(self, capacity=256, encode=None, start=None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.encode = encode
+        self._ring = [None] * capacity
+        self._first = self._seq = int(time.time() * 1000) if start is None else start
+        self._lock = Lock()
+        self._event = Event()
+        self._loop_waiters = weakref.WeakKeyDictionary()  # event loop -> future resolved on next publish
+
+    @property
+    def head(self):
+        """Sequence number of the most recently published message"""
+        return self._seq
+
+    def publish(self, message, recipient=None, seq=None):
+        """Store a message and wake all waiting subscribers; returns its sequence number.
+
+        When `recipient` is given, only the subscriber reading with that ID receives it.
+        A `seq` at or below the head (one that arrived after a later message) is still
+        stored, but only reaches subscribers that have not read past it; one older
+        than the ring is discarded.
+        """
+        with self._lock:
+            if seq is None:
+                seq = self._seq + 1
+            elif seq <= self._seq - self.capacity:
+                return seq
+            if self.encode is not None:
+                message = self.encode(seq, message)
+            self._ring[seq % self.capacity] = (seq, message, recipient)
+            if seq > self._seq:
+                self._seq = seq
+            event, self._event = self._event, Event()
+        event.set()
+        for loop, waiter in list(self._loop_waiters.items()):
+            if not waiter.done():
+                loop.call_soon_threadsafe(_wake, waiter)
+        return seq
+
+    def subscribe(self, last_seq=None):
+        """Return a cursor positioned at the current head.
+
+        Given the sequence number of the last message a subscriber received from this
+        hub, the cursor resumes right after it instead, so the messages it missed are
+        replayed from the ring (a gap longer than the ring is reported as dropped).
+        """
+        head = self._seq
+        if last_seq is not None and self._first <= last_seq <= head:
+            return last_seq
+        return head
+
+    def read(self, cursor, timeout=None, recipient=None):
+        """Return (messages, cursor, dropped) for everything published after `cursor`.
+
+        Blocks up to `timeout` seconds when there is nothing new to read.
+        """
+        # Grab the event before checking the head so a concurrent publish cannot be missed
+        event = self._event
+        if cursor >= self._seq:
+            event.wait(timeout)
+
+        head = self._seq
+        if cursor > head:
+            cursor = head
+
+        dropped = 0
+        oldest = head - self.capacity + 1
+        if cursor + 1 < oldest:
+            dropped = oldest - cursor - 1
+            cursor = oldest - 1
+
+        messages = []
+        for seq in range(cursor + 1, head + 1):
+            entry = self._ring[seq % self.capacity]
+            if entry is None or entry[0] != seq:
+                # The slot was overwritten by a newer message while we were reading
+                dropped += 1
+                continue
+            target = entry[2]
+            if target is None or target == recipient:
+                messages.append(entry[1])
+        return messages, head, dropped
+
+    async def aread(self, cursor, timeout=None, recipient=None):
+        """Coroutine version of `read` that waits without blocking the event loop"""
+        if cursor >= self._seq:
+            loop = asyncio.get_running_loop()
+            waiter = self._loop_waiters.get(loop)
+            if waiter is None or waiter.done():
+                waiter = loop.create_future()
+                self._loop_waiters[loop] = waiter
+            # Re-check after registering so a publish in between is not missed
+            if cursor >= self._seq:
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        return self.read(cursor, timeout=0, recipient=recipient)
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
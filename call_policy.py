@@ -0,0 +1,227 @@
+import asyncio
+import random
+import time
+from bisect import insort
+from collections import deque
+
+import aiohttp
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream that has been failing"""
+
+
+class CircuitBreaker:
+    """Stops calls after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds one probe call is let through (half-open); its
+    success closes the circuit again, its failure reopens it. Meant to be used from
+    a single event loop, so it keeps no locks.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self):
+        """Raise CircuitOpen unless a call may go ahead.
+
+        Returns a token to hand back when the call ends: true for the half-open probe,
+        so only the probe itself can settle the half-open state.
+        """
+        if self.state == CLOSED:
+            return False
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        raise CircuitOpen(f"Upstream unavailable, retrying after {self.reset_timeout}s")
+
+    def release(self, probe):
+        """End a call that said nothing about the upstream's health"""
+        if probe:
+            self._probing = False
+
+    def record_success(self, probe):
+        self.state = CLOSED
+        self.failures = 0
+        if probe:
+            self._probing = False
+
+    def record_failure(self, probe):
+        self.failures += 1
+        if probe or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            if self.state != OPEN:
+                self.opens += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        if probe:
+            self._probing = False
+
+
+class LatencyWindow:
+    """Latencies of the last `size` successful calls, for a cheap percentile"""
+
+    def __init__(self, size=200):
+        self._recent = deque(maxlen=size)
+        self._sorted = []
+
+    def __len__(self):
+        return len(self._recent)
+
+    def record(self, seconds):
+        if len(self._recent) == self._recent.maxlen:
+            self._sorted.remove(self._recent[0])
+        self._recent.append(seconds)
+        insort(self._sorted, seconds)
+
+    def percentile(self, fraction):
+        if not self._sorted:
+            return None
+        return self._sorted[min(len(self._sorted) - 1, int(len(self._sorted) * fraction))]
+
+
+def is_retryable(error):
+    """Throttling, server errors, timeouts and dropped connections are worth retrying; other 4xx are not"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in (408, 429) or error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+
+def is_throttled(error):
+    """A 429: the upstream is healthy and asking for less traffic"""
+    return isinstance(error, aiohttp.ClientResponseError) and error.status == 429
+
+
+def retry_after(error):
+    """Seconds from a 429 response's Retry-After header, or None"""
+    if isinstance(error, aiohttp.ClientResponseError) and error.status == 429 and error.headers:
+        try:
+            return max(0.0, float(error.headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+class CallPolicy:
+    """Retries, circuit breaking and optional hedging around an async upstream call.
+
+    `call(attempt)` awaits `attempt()` (a coroutine factory). Retryable failures are
+    retried after exponential backoff with full jitter, or after Retry-After on a
+    429, as long as the wait fits within `deadline` seconds of the first attempt.
+    Non-retryable errors are raised at once and do not count against the upstream,
+    and neither do 429s: throttling is backpressure, not a sign the upstream is down.
+    Each call should be one upstream request, so the breaker sees one outcome per request.
+    With `hedge`, an attempt still running after the recent p95 latency is raced
+    against a second identical attempt and the first success wins.
+    """
+
+    def __init__(self, retries=3, base_delay=0.25, max_delay=4.0, deadline=15.0,
+                 breaker=None, hedge=False, hedge_min_samples=50):
+        if retries < 1:
+            raise ValueError("retries must be at least 1")
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyWindow()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.throttled = 0
+
+    def backoff(self, attempt, error):
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return delay
+
+    async def call(self, attempt, retries=None, hedge=True, on_retry=None):
+        """Run `attempt()` under the policy; `retries=1` makes a single attempt.
+
+        `on_retry(attempt number, delay, error)` is called before each retry.
+        """
+        retries = self.retries if retries is None else retries
+        if retries < 1:
+            raise ValueError("retries must be at least 1")
+        give_up_at = time.monotonic() + self.deadline
+        for number in range(retries):
+            probe = self.breaker.allow()
+            try:
+                result = await self._attempt(attempt, hedge and self.hedge)
+            except asyncio.CancelledError:
+                self.breaker.release(probe)
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    if isinstance(e, aiohttp.ClientResponseError):
+                        # The upstream answered; the request itself was at fault
+                        self.breaker.record_success(probe)
+                    else:
+                        self.breaker.release(probe)
+                    raise
+                if is_throttled(e):
+                    self.throttled += 1
+                    self.breaker.release(probe)
+                else:
+                    self.breaker.record_failure(probe)
+                delay = self.backoff(number, e)
+                if number == retries - 1 or time.monotonic() + delay > give_up_at:
+                    raise
+                if on_retry:
+                    on_retry(number + 1, delay, e)
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success(probe)
+                return result
+
+    async def _timed(self, attempt):
+        started = time.monotonic()
+        result = await attempt()
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    async def _attempt(self, attempt, hedge):
+        if not hedge or len(self.latency) < self.hedge_min_samples:
+            return await self._timed(attempt)
+
+        first = asyncio.ensure_future(self._timed(attempt))
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.latency.percentile(0.95))
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        if done:
+            return first.result()
+
+        self.hedges += 1
+        second = asyncio.ensure_future(self._timed(attempt))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,108 @@
+import heapq
+import itertools
+import time
+from threading import Lock
+
+
+class ClientRecord:
+    """One translation stream subscriber"""
+
+    __slots__ = ('client_id', 'target_language', 'last_active', 'cursor')
+
+    def __init__(self, client_id, target_language, cursor, now):
+        self.client_id = client_id
+        self.target_language = target_language
+        self.last_active = now
+        self.cursor = cursor
+
+
+class ClientRegistry:
+    """Thread-safe set of subscribers, indexed by client ID and by language.
+
+    Idle clients expire through a min-heap of deadlines. Marking a client active
+    only stores a timestamp; when its heap entry comes due, `expire` either removes
+    it or pushes it back with its new deadline, so upkeep is O(log n) per expiry
+    instead of a scan of every client. Registering an ID again replaces the old
+    record, which tells the stream still holding it to stop.
+    """
+
+    def __init__(self, idle_timeout=30):
+        self.idle_timeout = idle_timeout
+        self._clients = {}
+        self._by_language = {}
+        self._deadlines = []
+        self._order = itertools.count()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __contains__(self, client_id):
+        return client_id in self._clients
+
+    def get(self, client_id):
+        return self._clients.get(client_id)
+
+    def records(self):
+        return list(self._clients.values())
+
+    def register(self, client_id, target_language, cursor=0):
+        now = time.time()
+        record = ClientRecord(client_id, target_language, cursor, now)
+        with self._lock:
+            previous = self._clients.get(client_id)
+            if previous is not None:
+                self._unindex(previous)
+            self._clients[client_id] = record
+            self._by_language.setdefault(target_language, {})[client_id] = record
+            heapq.heappush(self._deadlines, (now + self.idle_timeout, next(self._order), record))
+        return record
+
+    def remove(self, client_id, record=None):
+        """Remove a client, or only the given record if it is still the registered one"""
+        with self._lock:
+            current = self._clients.get(client_id)
+            if current is None or (record is not None and current is not record):
+                return False
+            del self._clients[client_id]
+            self._unindex(current)
+        return True
+
+    def _unindex(self, record):
+        members = self._by_language.get(record.target_language)
+        if members is not None:
+            members.pop(record.client_id, None)
+            if not members:
+                del self._by_language[record.target_language]
+
+    def languages(self):
+        """Target languages with at least one client"""
+        return set(self._by_language)
+
+    def counts(self):
+        """{language: number of clients}"""
+        return {language: len(members) for language, members in list(self._by_language.items())}
+
+    def expire(self, now=None):
+        """Remove clients idle for longer than `idle_timeout`; returns the removed records"""
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, _, record = heapq.heappop(self._deadlines)
+                if self._clients.get(record.client_id) is not record:
+                    continue  # Already removed or replaced
+                deadline = record.last_active + self.idle_timeout
+                if deadline > now:
+                    heapq.heappush(self._deadlines, (deadline, next(self._order), record))
+                    continue
+                del self._clients[record.client_id]
+                self._unindex(record)
+                expired.append(record)
+        return expired
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self._by_language.clear()
+            self._deadlines.clear()
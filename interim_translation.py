@@ -0,0 +1,130 @@
+import time
+from threading import Lock
+
+from translation_memory import memory_key
+
+
+def changed_words(previous, current):
+    """Number of words in `current` after the word prefix it shares with `previous`"""
+    old, new = previous.split(), current.split()
+    shared = 0
+    for a, b in zip(old, new):
+        if a != b:
+            break
+        shared += 1
+    return len(new) - shared
+
+
+def reusable_translation(reusable, language, text):
+    """The interim translation from `finalize` if its hypothesis is `text` up to case and punctuation, else None"""
+    source, translation = reusable.get(language, (None, None))
+    # Hypotheses are unpunctuated, while finals come back with punctuation and capitals
+    if source is not None and memory_key(source) == memory_key(text):
+        return translation
+    return None
+
+
+def common_prefix_length(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+class _LanguageState:
+    __slots__ = ('source', 'translation', 'sent_at', 'pending', 'revision')
+
+    def __init__(self):
+        self.source = ''        # hypothesis behind `translation`
+        self.translation = ''   # last interim translation listeners were sent
+        self.sent_at = 0.0
+        self.pending = None     # hypothesis currently being translated
+        self.revision = 0
+
+
+class InterimTranslations:
+    """Throttles and diffs interim (partial hypothesis) translations for one room.
+
+    Per language, at most one interim translation is in flight. A new hypothesis is
+    translated once enough time has passed since the last one, and the wait shrinks
+    as more words change: `max_interval` for a one-word change, down to
+    `min_interval` once `word_step` words or more are new. Results are turned into
+    `partial` messages that carry only the part of the translation that changed.
+    A final that matches the last translated hypothesis reuses its translation.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=2.0, word_step=4):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.word_step = word_step
+        self._states = {}
+        self._utterance = 0
+        self._lock = Lock()
+
+    def begin(self, language, hypothesis, now=None):
+        """Return a token if `hypothesis` should be translated now, otherwise None"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._states.get(language)
+            if state is None:
+                state = self._states[language] = _LanguageState()
+            if state.pending is not None:
+                return None
+            changed = changed_words(state.source, hypothesis)
+            if not changed:
+                return None
+            interval = self.interval(changed)
+            if state.translation and now - state.sent_at < interval:
+                return None
+            state.pending = hypothesis
+            return (self._utterance, hypothesis)
+
+    def interval(self, changed):
+        """Seconds to wait between translations when `changed` words are new"""
+        if changed >= self.word_step:
+            return self.min_interval
+        fraction = (changed - 1) / max(1, self.word_step - 1)
+        return self.max_interval - (self.max_interval - self.min_interval) * fraction
+
+    def complete(self, language, token, translation, now=None):
+        """Record a finished interim translation; returns the `partial` message to publish or None"""
+        now = time.monotonic() if now is None else now
+        utterance, hypothesis = token
+        with self._lock:
+            state = self._states.get(language)
+            if state is None or state.pending is not hypothesis:
+                return None
+            state.pending = None
+            if utterance != self._utterance:
+                # The utterance was finalized while this was in flight
+                return None
+            state.source = hypothesis
+            if translation == state.translation:
+                return None
+            offset = common_prefix_length(state.translation, translation) if state.revision else 0
+            state.revision += 1
+            state.translation = translation
+            state.sent_at = now
+            return {
+                'type': 'partial',
+                'revision': state.revision,
+                'offset': offset,
+                'text': translation[offset:]
+            }
+
+    def fail(self, language, token):
+        with self._lock:
+            state = self._states.get(language)
+            if state is not None and state.pending is token[1]:
+                state.pending = None
+
+    def finalize(self):
+        """End the current utterance; returns {language: (hypothesis, translation)} for reuse"""
+        with self._lock:
+            self._utterance += 1
+            reusable = {language: (state.source, state.translation)
+                        for language, state in self._states.items() if state.translation}
+            self._states = {}
+        return reusable
@@ -0,0 +1,91 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(filename)s:%(lineno)d - %(message)s'
+
+# Pass as `extra=` on per-message debug events so only one in LOG_SAMPLE_RATE is kept
+SAMPLED = {'sampled': True}
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in `rate` records marked as sampled, counted per call site"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counts = {}
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False) or self.rate == 1:
+            return True
+        key = (record.pathname, record.lineno)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        return count % self.rate == 0
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the writer thread without formatting them first.
+
+    The stock QueueHandler renders the message on the calling thread; here the
+    record travels as-is and the writer thread formats it. When the queue is full
+    the record is dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level='INFO', log_file=None, max_bytes=10 * 1024 * 1024, backup_count=5,
+                      sample_rate=100, use_queue=True, queue_size=10000, per_process=False):
+    """Route every logger through the root logger to stdout and an optional rotating file.
+
+    With `use_queue` the handlers run on a background thread, so request, recognition
+    and SSE threads only pay for putting a record on a bounded queue. Returns the
+    queue handler (None without `use_queue`), whose `dropped` counts lost records.
+    With `per_process` the file name gets the process ID, so worker processes never
+    rotate a file another one is writing.
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        if per_process:
+            root, extension = os.path.splitext(log_file)
+            log_file = f'{root}.{os.getpid()}{extension}'
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = None
+    if use_queue:
+        queue_handler = BackgroundQueueHandler(queue.Queue(queue_size))
+        listener = logging.handlers.QueueListener(queue_handler.queue, *handlers)
+        listener.start()
+        atexit.register(listener.stop)
+        handlers = [queue_handler]
+
+    root = logging.getLogger()
+    for handler in handlers:
+        handler.addFilter(SamplingFilter(sample_rate))
+        root.addHandler(handler)
+    root.setLevel(level)
+    return queue_handler
@@ -0,0 +1,223 @@
+import math
+from bisect import bisect_left
+from threading import Lock, get_ident
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Cells:
+    """Per-thread value arrays, so recording never takes a lock.
+
+    Each thread writes only its own array, found by thread ID; a scrape adds the
+    arrays up. A thread ID reused by a new thread continues the dead thread's
+    array, which keeps the totals correct and the number of arrays bounded.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._cells = {}
+        self._lock = Lock()
+
+    def get(self):
+        cell = self._cells.get(get_ident())
+        if cell is None:
+            with self._lock:
+                cell = self._cells.setdefault(get_ident(), [0] * self.size)
+        return cell
+
+    def totals(self):
+        totals = [0] * self.size
+        for cell in list(self._cells.values()):
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = Lock()
+
+    def labels(self, *values):
+        """Return the child for these label values; bind it once outside hot loops"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _label_text(self, values, extra=None):
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    """Monotonic counter; `inc` costs a dict lookup and an add"""
+    kind = 'counter'
+
+    class Child:
+        __slots__ = ('_cells',)
+
+        def __init__(self):
+            self._cells = _Cells(1)
+
+        def inc(self, amount=1):
+            self._cells.get()[0] += amount
+
+        @property
+        def value(self):
+            return self._cells.totals()[0]
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        return Counter.Child()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    @property
+    def value(self):
+        return self._default.value
+
+    def render(self):
+        lines = self._header()
+        for values, child in list(self._children.items()):
+            lines.append(f'{self.name}{self._label_text(values)} {_number(child.value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values (Prometheus histogram)"""
+    kind = 'histogram'
+
+    class Child:
+        __slots__ = ('_cells', '_bounds')
+
+        def __init__(self, bounds):
+            self._bounds = bounds
+            # One count per bucket plus +Inf, then the sum and the total count
+            self._cells = _Cells(len(bounds) + 3)
+
+        def observe(self, value):
+            cell = self._cells.get()
+            cell[bisect_left(self._bounds, value)] += 1
+            cell[-2] += value
+            cell[-1] += 1
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        return Histogram.Child(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def render(self):
+        lines = self._header()
+        for values, child in list(self._children.items()):
+            totals = child._cells.totals()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), totals):
+                cumulative += count
+                le = '+Inf' if bound == math.inf else _number(bound)
+                lines.append(f'{self.name}_bucket{self._label_text(values, ("le", le))} {_number(cumulative)}')
+            lines.append(f'{self.name}_sum{self._label_text(values)} {_number(totals[-2])}')
+            lines.append(f'{self.name}_count{self._label_text(values)} {_number(totals[-1])}')
+        return lines
+
+
+class Gauge(_Metric):
+    """Value computed by `callback` at scrape time, so nothing is recorded on hot paths.
+
+    The callback returns a number, or a dict of {label values tuple: number}.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=(), kind='gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def render(self):
+        lines = self._header()
+        try:
+            samples = self.callback()
+        except Exception:
+            # A broken source should not take the rest of the scrape down
+            return lines
+        if not isinstance(samples, dict):
+            samples = {(): samples}
+        for values, value in samples.items():
+            if not isinstance(values, tuple):
+                values = (values,)
+            lines.append(f'{self.name}{self._label_text(values)} {_number(value)}')
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=()):
+        return self.register(Gauge(name, documentation, callback, labelnames))
+
+    def gauge_counter(self, name, documentation, callback, labelnames=()):
+        """A counter whose value is read at scrape time from something that already counts"""
+        return self.register(Gauge(name, documentation, callback, labelnames, kind='counter'))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
@@ -0,0 +1,201 @@
+import asyncio
+import itertools
+import time
+from threading import Lock, local
+
+
+class RateLimited(Exception):
+    """Raised when a call would have to wait longer than allowed for its budget"""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"{scope} rate limit exceeded, retry in {retry_after:.1f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`; each bucket has its own small lock"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', '_lock')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = Lock()
+
+    def take(self, cost=1):
+        """Take `cost` tokens; returns 0, or the seconds until they would be available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return 0
+            return (cost - self.tokens) / self.rate
+
+    def refund(self, cost=1):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + cost)
+
+    def available(self):
+        with self._lock:
+            return min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+
+
+class ShardedBucket:
+    """A token bucket split into `shards` smaller buckets, so busy threads do not share one lock.
+
+    Each thread takes from its own shard, assigned round-robin on first use. Only when
+    that shard is empty does it take from the others, one shard lock at a time, so the
+    whole budget stays usable when the load is uneven (e.g. one event loop thread).
+    """
+
+    def __init__(self, rate, capacity, shards=8):
+        # Every shard must be able to hold a whole token
+        shards = max(1, min(shards, int(capacity)))
+        self.capacity = capacity
+        self.shards = [TokenBucket(rate / shards, capacity / shards) for _ in range(shards)]
+        self._next_shard = itertools.count()
+        self._local = local()
+
+    def _home(self):
+        index = getattr(self._local, 'index', None)
+        if index is None:
+            index = self._local.index = next(self._next_shard) % len(self.shards)
+        return index
+
+    def take(self, cost=1):
+        """Take `cost` tokens; returns 0, or the seconds until the thread's shard would have them"""
+        home = self._home()
+        wait = None
+        for offset in range(len(self.shards)):
+            index = (home + offset) % len(self.shards)
+            shard_wait = self.shards[index].take(cost)
+            if not shard_wait:
+                # Remembered so a refund goes back to the shard that paid
+                self._local.taken = index
+                return 0
+            wait = shard_wait if wait is None else min(wait, shard_wait)
+        return wait
+
+    def refund(self, cost=1):
+        """Give back the thread's last take, to the shard it came from"""
+        index = getattr(self._local, 'taken', None)
+        self.shards[self._home() if index is None else index].refund(cost)
+
+    def available(self):
+        return sum(shard.available() for shard in self.shards)
+
+
+class RateLimiter:
+    """Global, per-language and per-client token buckets checked together.
+
+    A call takes a token from each bucket that applies to it, and gives the tokens
+    back if a later bucket is empty, so no single lock is held across buckets. Over
+    budget, `acquire` (threads) and `acquire_async` (coroutines) wait for the tokens
+    to refill for up to `max_wait` seconds and raise RateLimited beyond that. Rates
+    are per minute; a bucket holds `burst` seconds' worth of tokens. A rate of 0
+    disables that scope. The global bucket, which every call takes from, is sharded
+    so that calls on different threads do not contend on one lock.
+    """
+
+    def __init__(self, name, per_minute, per_language_per_minute=0, per_client_per_minute=0,
+                 burst=5, max_wait=2.0, global_shards=8):
+        self.name = name
+        self.burst = burst
+        self.max_wait = max_wait
+        self.global_bucket = None
+        if per_minute:
+            rate = per_minute / 60
+            self.global_bucket = ShardedBucket(rate, max(1, rate * burst), global_shards)
+        self.language_rate = per_language_per_minute
+        self.client_rate = per_client_per_minute
+        self.language_buckets = {}
+        self.client_buckets = {}
+        # Calls that had to wait, and calls refused, by the scope that was empty
+        self.queued = {'global': 0, 'language': 0, 'client': 0}
+        self.rejected = {'global': 0, 'language': 0, 'client': 0}
+
+    def _bucket(self, per_minute):
+        if not per_minute:
+            return None
+        rate = per_minute / 60
+        return TokenBucket(rate, max(1, rate * self.burst))
+
+    def _buckets(self, language, client):
+        buckets = []
+        if self.global_bucket:
+            buckets.append(('global', self.global_bucket))
+        if language is not None and self.language_rate:
+            bucket = self.language_buckets.get(language)
+            if bucket is None:
+                bucket = self.language_buckets.setdefault(language, self._bucket(self.language_rate))
+            buckets.append(('language', bucket))
+        if client is not None and self.client_rate:
+            bucket = self.client_buckets.get(client)
+            if bucket is None:
+                bucket = self.client_buckets.setdefault(client, self._bucket(self.client_rate))
+            buckets.append(('client', bucket))
+        return buckets
+
+    def try_acquire(self, language=None, client=None):
+        """Take a token from every applicable bucket; returns (0, None) or (seconds to wait, scope)"""
+        taken = []
+        for scope, bucket in self._buckets(language, client):
+            wait = bucket.take()
+            if wait:
+                for held in taken:
+                    held.refund()
+                return wait, scope
+            taken.append(bucket)
+        return 0, None
+
+    def acquire(self, language=None, client=None, max_wait=None):
+        """Block until the call fits the budget, or raise RateLimited"""
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        queued = False
+        while True:
+            wait, scope = self.try_acquire(language, client)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                self.rejected[scope] += 1
+                raise RateLimited(f"{self.name} {scope}", wait)
+            if not queued:
+                queued = True
+                self.queued[scope] += 1
+            time.sleep(wait)
+
+    async def acquire_async(self, language=None, client=None, max_wait=None):
+        """Coroutine version of `acquire`"""
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        queued = False
+        while True:
+            wait, scope = self.try_acquire(language, client)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                self.rejected[scope] += 1
+                raise RateLimited(f"{self.name} {scope}", wait)
+            if not queued:
+                queued = True
+                self.queued[scope] += 1
+            await asyncio.sleep(wait)
+
+    def prune(self):
+        """Forget client buckets that have refilled completely, so idle clients cost nothing"""
+        for client, bucket in list(self.client_buckets.items()):
+            if bucket.available() >= bucket.capacity:
+                self.client_buckets.pop(client, None)
+
+    def available(self):
+        """Return {(scope, language): tokens left} for the global and per-language buckets"""
+        tokens = {}
+        if self.global_bucket:
+            tokens[('global', '')] = self.global_bucket.available()
+        for language, bucket in list(self.language_buckets.items()):
+            tokens[('language', language)] = bucket.available()
+        return tokens
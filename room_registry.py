@@ -0,0 +1,161 @@
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread, Event
+
+from audio_buffer import AudioRingBuffer, DROP_OLDEST
+from broadcast_hub import BroadcastHub
+from client_registry import ClientRegistry
+from interim_translation import InterimTranslations
+
+logger = logging.getLogger(__name__)
+
+
+class RoomLimitReached(Exception):
+    """Raised when a new room is requested while the registry is full"""
+
+
+class Room:
+    """Everything one broadcast owns: its recognition pipeline state, hubs and subscribers.
+
+    Translation fan-out runs on a single worker per room, so utterances stay in order
+    within a room while a slow room cannot hold up the others.
+    """
+
+    def __init__(self, session_id, languages, transcription_hub_size=1024, translation_hub_size=256,
+                 audio_buffer_size=160000, audio_buffer_policy=DROP_OLDEST, interim=None, client_idle_timeout=30,
+                 encode=None, sequence=None):
+        # `sequence(channel)` gives a hub's starting sequence number when hubs are shared between processes
+        start = sequence or (lambda channel: None)
+        self.session_id = session_id
+        self.is_streaming = False
+        self.transcription_hub = BroadcastHub(transcription_hub_size, encode, start(f'{session_id}:transcription'))
+        self.translation_hubs = {lang: BroadcastHub(translation_hub_size, encode, start(f'{session_id}:{lang}'))
+                                 for lang in languages}
+        self.audio_buffer = AudioRingBuffer(audio_buffer_size, audio_buffer_policy)
+        self.audio_level = -math.inf  # dBFS of the latest captured audio
+        self.capture_lock = Lock()
+        # Set while the broadcaster's browser is sending audio over the ingest socket
+        self.ingest = None
+        self.recognizer = None
+        self.clients = ClientRegistry(client_idle_timeout)
+        self.coalescer = None  # UtteranceCoalescer for /translate_realtime finals, set by the app
+        self.interim = interim or InterimTranslations()
+        self.fanout_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'fanout-{session_id}')
+        self.listeners = 0
+        self.last_active = time.time()
+        self._lock = Lock()
+
+    def touch(self):
+        self.last_active = time.time()
+
+    def open_listener(self):
+        """Count a stream subscriber so the room is not evicted while it is connected"""
+        with self._lock:
+            self.listeners += 1
+        self.touch()
+
+    def close_listener(self):
+        with self._lock:
+            self.listeners -= 1
+        self.touch()
+
+    def is_idle(self, now, timeout):
+        return (not self.is_streaming and not self.listeners and not self.clients
+                and now - self.last_active > timeout)
+
+    def close(self):
+        """Stop the pipeline and release the fan-out worker"""
+        self.is_streaming = False
+        self.fanout_executor.shutdown(wait=False)
+
+
+class RoomRegistry:
+    """Rooms keyed by session ID, created on first use and evicted once idle.
+
+    Lookups are a single dict access. A background thread removes rooms that have no
+    running pipeline and no subscribers for longer than `idle_timeout` seconds.
+    """
+
+    def __init__(self, factory, max_rooms=50, idle_timeout=600, reap_interval=60):
+        self.factory = factory
+        self.max_rooms = max_rooms
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self._rooms = {}
+        self._lock = Lock()
+        self._stopped = Event()
+        self._reaper = Thread(target=self._reap_loop, name='room-reaper', daemon=True)
+        self._reaper.start()
+
+    def get(self, session_id):
+        """Return the room for `session_id` or None"""
+        room = self._rooms.get(session_id)
+        if room is not None:
+            room.touch()
+        return room
+
+    def peek(self, session_id):
+        """Return the room for `session_id` or None, without counting as activity"""
+        return self._rooms.get(session_id)
+
+    def get_or_create(self, session_id):
+        """Return the room for `session_id`, creating it if needed"""
+        room = self.get(session_id)
+        if room is not None:
+            return room
+
+        if len(self._rooms) >= self.max_rooms:
+            raise RoomLimitReached(f"Room limit of {self.max_rooms} reached")
+        # Built outside the lock, since a factory may wait on shared state. A racing
+        # request for the same session may build one too; the loser is closed.
+        created = self.factory(session_id)
+        with self._lock:
+            room = self._rooms.get(session_id)
+            full = room is None and len(self._rooms) >= self.max_rooms
+            if room is None and not full:
+                room = self._rooms[session_id] = created
+                logger.info("Created room %s (%s active)", session_id, len(self._rooms))
+        if room is not created:
+            created.close()
+        if full:
+            raise RoomLimitReached(f"Room limit of {self.max_rooms} reached")
+        room.touch()
+        return room
+
+    def rooms(self):
+        """Return a snapshot of all rooms"""
+        return list(self._rooms.values())
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def evict_idle(self):
+        """Remove and close every idle room; returns how many were evicted"""
+        now = time.time()
+        with self._lock:
+            idle = [room for room in self._rooms.values() if room.is_idle(now, self.idle_timeout)]
+            for room in idle:
+                del self._rooms[room.session_id]
+
+        for room in idle:
+            logger.info("Evicting idle room %s", room.session_id)
+            room.close()
+        return len(idle)
+
+    def close(self):
+        """Stop eviction and close every room"""
+        self._stopped.set()
+        with self._lock:
+            rooms = list(self._rooms.values())
+            self._rooms.clear()
+        for room in rooms:
+            room.close()
+
+    def _reap_loop(self):
+        while not self._stopped.wait(self.reap_interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error("Room eviction failed: %s", e)
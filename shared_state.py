@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+try:
+    import redis
+except ImportError:  # Only needed with SHARED_STATE_URL
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Numbers and publishes a message in one step, so messages reach subscribers in sequence order
+PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', KEYS[2], string.format('%d ', seq) .. ARGV[1] .. '\\n\\n' .. ARGV[2])
+return seq
+"""
+
+
+class LocalState:
+    """Shared state for a single process.
+
+    Messages published on a channel are handed straight to the handler given to
+    `start`, the shared cache is the process's own translation cache, and the rooms'
+    client registries already hold every client, so the client calls have nothing
+    to add.
+    """
+
+    networked = False
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._handler = None
+        self._lock = Lock()
+
+    def start(self, handler):
+        """Deliver every published message to `handler(channel, data, recipient, seq)`"""
+        self._handler = handler
+
+    def publish(self, channel, data, recipient=None):
+        # No shared counter: the receiving hub numbers the message itself
+        self._handler(channel, data, recipient, None)
+
+    def sequence(self, channel):
+        """Current sequence number of a channel, or None to let its hub choose"""
+        return None
+
+    async def run(self, function, *args):
+        """Call `function`, which may wait on shared state, without blocking the event loop"""
+        return function(*args)
+
+    async def cache_get(self, key):
+        return self.cache.get(key)
+
+    def cache_set(self, key, value):
+        with self._lock:
+            self.cache[key] = value
+
+    def add_clients(self, room_id, clients):
+        pass
+
+    def remove_client(self, room_id, client_id, language):
+        pass
+
+    def client_language(self, room_id, client_id):
+        return None
+
+    def languages(self, room_id, candidates):
+        return set()
+
+    def close(self):
+        pass
+
+
+class RedisState:
+    """Shared state in Redis, or any server speaking its protocol, for several processes.
+
+    - Channels are Redis pub/sub channels. Every process subscribes to all of them
+      and also receives its own messages, so each hub copy sees one order. Each
+      message carries a number from a per-channel INCR counter, seeded with the
+      time in milliseconds; hubs start from the counter too, so event IDs mean the
+      same thing in every process and a listener can resume on any of them.
+    - Cache entries are plain keys that expire after `cache_ttl` seconds.
+    - Clients are kept per room and language in a sorted set scored by when the
+      client goes idle, and refreshed by the process holding their stream. A room
+      hash maps client IDs to their language for requests served elsewhere.
+      Languages with a live client are cached for `languages_ttl` seconds, since
+      every recognized phrase asks for them.
+
+    Callers on an event loop never wait on the server: `cache_get` and `run` are
+    coroutines that use a small thread pool, cache writes go through the same pool
+    in the background, and messages and client membership changes are sent from a
+    single thread in the order they were handed over. `sequence`, `client_language`
+    and `languages` do wait, so call them from a thread or through `run`.
+    """
+
+    networked = True
+
+    def __init__(self, url, prefix='church-app:', cache_ttl=86400, client_ttl=30, languages_ttl=1.0, io_threads=8):
+        if redis is None:
+            raise RuntimeError("SHARED_STATE_URL needs the redis package (pip install redis)")
+        self.prefix = prefix
+        self.cache_ttl = cache_ttl
+        self.client_ttl = client_ttl
+        self.languages_ttl = languages_ttl
+        self.redis = redis.Redis.from_url(url, health_check_interval=30)
+        self._publish_script = self.redis.register_script(PUBLISH_SCRIPT)
+        self._io = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix='shared-state')
+        self._publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shared-publish')
+        self._thread = None
+        self._seeded = set()
+        self._languages = {}  # room id -> (fetched at, languages)
+        self._lock = Lock()
+
+    def _key(self, *parts):
+        return self.prefix + ':'.join(parts)
+
+    def start(self, handler):
+        """Deliver every published message to `handler(channel, data, recipient, seq)` from a listener thread"""
+        channels = self._key('channel', '')
+
+        def on_message(message):
+            try:
+                header, data = message['data'].split(b'\n\n', 1)
+                seq, recipient = header.decode('utf-8').split(' ', 1)
+                handler(message['channel'].decode('utf-8')[len(channels):], data, recipient or None, int(seq))
+            except Exception as e:
+                logger.error("Error delivering shared message on %s: %s", message.get('channel'), e)
+
+        def on_error(error, pubsub, thread):
+            # The listener reconnects and resubscribes on its next read
+            logger.error("Shared state subscription failed: %s", error)
+            time.sleep(1)
+
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(**{channels + '*': on_message})
+        self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=on_error)
+
+    def sequence(self, channel):
+        key = self._key('seq', channel)
+        if channel not in self._seeded:
+            self.redis.set(key, int(time.time() * 1000), nx=True)
+            self._seeded.add(channel)
+        return int(self.redis.get(key))
+
+    def _background(self, executor, function, *args):
+        executor.submit(function, *args).add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Shared state update failed: %s", future.exception())
+
+    def publish(self, channel, data, recipient=None):
+        self._background(self._publisher, self._publish, channel, data, recipient)
+
+    def _publish(self, channel, data, recipient):
+        if channel not in self._seeded:
+            self.sequence(channel)
+        self._publish_script(keys=[self._key('seq', channel), self._key('channel', channel)],
+                             args=[(recipient or '').encode('utf-8'), data])
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._io, function, *args)
+
+    async def cache_get(self, key):
+        value = await self.run(self.redis.get, self._key('cache', key))
+        return None if value is None else value.decode('utf-8')
+
+    def cache_set(self, key, value):
+        self._background(self._io, self._cache_set, key, value)
+
+    def _cache_set(self, key, value):
+        self.redis.set(self._key('cache', key), value, ex=self.cache_ttl)
+
+    def add_clients(self, room_id, clients):
+        """Mark clients live; `clients` is a list of (client ID, language, last active time)"""
+        if clients:
+            self._background(self._publisher, self._add_clients, room_id, clients)
+
+    def _add_clients(self, room_id, clients):
+        pipeline = self.redis.pipeline(transaction=False)
+        members = {}
+        for client_id, language, last_active in clients:
+            members.setdefault(language, {})[client_id] = last_active + self.client_ttl
+        now = time.time()
+        for language, scores in members.items():
+            key = self._key('clients', room_id, language)
+            pipeline.zadd(key, scores)
+            pipeline.zremrangebyscore(key, '-inf', now)
+            pipeline.expire(key, self.client_ttl * 2)
+        names = self._key('client_languages', room_id)
+        pipeline.hset(names, mapping={client_id: language for client_id, language, _ in clients})
+        pipeline.expire(names, self.client_ttl * 2)
+        pipeline.execute()
+
+    def remove_client(self, room_id, client_id, language):
+        # Same thread as add_clients, so a removal cannot overtake the registration before it
+        self._background(self._publisher, self._remove_client, room_id, client_id, language)
+
+    def _remove_client(self, room_id, client_id, language):
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.zrem(self._key('clients', room_id, language), client_id)
+        pipeline.hdel(self._key('client_languages', room_id), client_id)
+        pipeline.execute()
+
+    def client_language(self, room_id, client_id):
+        """Language of a client whose stream may be held by another process, or None"""
+        language = self.redis.hget(self._key('client_languages', room_id), client_id)
+        return None if language is None else language.decode('utf-8')
+
+    def languages(self, room_id, candidates):
+        """Those of `candidates` with a live client in any process"""
+        now = time.time()
+        with self._lock:
+            cached = self._languages.get(room_id)
+        if cached is not None and now - cached[0] < self.languages_ttl:
+            return cached[1]
+        pipeline = self.redis.pipeline(transaction=False)
+        for language in candidates:
+            pipeline.zcount(self._key('clients', room_id, language), now, '+inf')
+        live = {language for language, count in zip(candidates, pipeline.execute()) if count}
+        with self._lock:
+            if len(self._languages) > 1024:
+                self._languages.clear()
+            self._languages[room_id] = (now, live)
+        return live
+
+    def close(self):
+        # Let queued messages and cache writes go out first
+        self._publisher.shutdown(wait=True)
+        self._io.shutdown(wait=True)
+        if self._thread is not None:
+            # The listener closes its subscription once its current read times out
+            self._thread.stop()
+            self._thread.join(2)
+        self.redis.close()
@@ -1,3 +1,10 @@
 #!/bin/bash
 cd /home/site/wwwroot
-gunicorn --bind=0.0.0.0:8000 --timeout 600 application:app
+# More than one worker needs SHARED_STATE_URL, so workers see each other's rooms and listeners
+export WORKERS=${WORKERS:-1}
+if [ "$SERVER_MODE" = "asgi" ]; then
+    # Async mode: SSE streams are coroutines, one worker holds thousands of listeners
+    gunicorn --bind=0.0.0.0:8000 --timeout 600 -w $WORKERS -k uvicorn.workers.UvicornWorker asgi:app
+else
+    gunicorn --bind=0.0.0.0:8000 --timeout 600 -w $WORKERS application:app
+fi
@@ -0,0 +1,213 @@
+import logging
+import queue
+import time
+from contextlib import contextmanager
+from threading import Lock, Thread, Event
+
+import azure.cognitiveservices.speech as speechsdk
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(Exception):
+    """Raised when no synthesizer for a voice becomes free within the checkout timeout"""
+
+
+class PooledSynthesizer:
+    """A SpeechSynthesizer with its service connection held open"""
+
+    def __init__(self, speech_key, region, voice, output_format):
+        speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=region)
+        speech_config.speech_synthesis_voice_name = voice
+        speech_config.set_speech_synthesis_output_format(output_format)
+
+        self.voice = voice
+        self.created_at = time.time()
+        self.connected = False
+        self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        self.connection = speechsdk.Connection.from_speech_synthesizer(self.synthesizer)
+        self.connection.connected.connect(self._on_connected)
+        self.connection.disconnected.connect(self._on_disconnected)
+        self.connection.open(True)
+        # open() connects in the background; requests issued meanwhile wait for it
+        self.connected = True
+
+    def _on_connected(self, evt):
+        self.connected = True
+
+    def _on_disconnected(self, evt):
+        self.connected = False
+
+    def reconnect(self):
+        """Re-open the service connection after the service dropped it"""
+        self.connection.open(True)
+        self.connected = True
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.synthesizer = None
+
+
+class SynthesizerPool:
+    """Warm SpeechSynthesizer instances per voice with checkout/return semantics.
+
+    Each voice keeps up to `max_size` synthesizers whose connections to the Speech
+    service are opened ahead of time, so a request does not pay connection setup.
+    `size` synthesizers per voice are created by `warm()`; more are created on demand
+    up to `max_size`, after which callers wait up to `checkout_timeout` seconds.
+    Synthesizers that are older than `max_age`, failed during use, or lost their
+    connection are reconnected or replaced by a background health check.
+    """
+
+    def __init__(self, speech_key, region, voices, output_format, size=1, max_size=4,
+                 max_age=1800, checkout_timeout=10, health_interval=60):
+        self.speech_key = speech_key
+        self.region = region
+        self.voices = list(voices)
+        self.output_format = output_format
+        self.size = size
+        self.max_size = max(max_size, size)
+        self.max_age = max_age
+        self.checkout_timeout = checkout_timeout
+        self.health_interval = health_interval
+        self._idle = {voice: queue.LifoQueue() for voice in self.voices}
+        self._created = {voice: 0 for voice in self.voices}
+        self._lock = Lock()
+        self._stopped = Event()
+        self._health_thread = None
+
+    def warm(self):
+        """Create `size` connected synthesizers per voice and start health checks"""
+        for voice in self.voices:
+            while self._created[voice] < self.size:
+                entry = self._create(voice)
+                if entry is None:
+                    break
+                self._idle[voice].put(entry)
+
+        if self._health_thread is None:
+            self._health_thread = Thread(target=self._health_loop, name='synthesizer-pool-health', daemon=True)
+            self._health_thread.start()
+
+    @contextmanager
+    def synthesizer(self, voice):
+        """Check out a synthesizer for `voice`, returning it to the pool afterwards"""
+        entry = self.checkout(voice)
+        healthy = False
+        try:
+            yield entry.synthesizer
+            healthy = True
+        finally:
+            self.release(entry, healthy)
+
+    def checkout(self, voice):
+        """Take an idle synthesizer, creating one if the pool has room"""
+        idle = self._idle.get(voice)
+        if idle is None:
+            raise ValueError(f"Voice {voice} is not pooled")
+
+        try:
+            entry = idle.get_nowait()
+        except queue.Empty:
+            entry = None
+            with self._lock:
+                can_create = self._created[voice] < self.max_size
+                if can_create:
+                    self._created[voice] += 1
+            if can_create:
+                try:
+                    entry = self._new_entry(voice)
+                except Exception:
+                    with self._lock:
+                        self._created[voice] -= 1
+                    raise
+            else:
+                try:
+                    entry = idle.get(timeout=self.checkout_timeout)
+                except queue.Empty:
+                    raise PoolExhausted(f"No {voice} synthesizer free after {self.checkout_timeout}s")
+
+        if not entry.connected:
+            try:
+                entry.reconnect()
+            except Exception:
+                # Give its slot back, or every failed reconnect would shrink the pool for good
+                self._retire(entry)
+                raise
+        return entry
+
+    def release(self, entry, healthy=True):
+        """Return a synthesizer to the pool, or retire it if it failed or is too old"""
+        if healthy and not self._stopped.is_set() and time.time() - entry.created_at < self.max_age:
+            self._idle[entry.voice].put(entry)
+            return
+        self._retire(entry)
+
+    def stats(self):
+        """Return {voice: (created, idle)}"""
+        return {voice: (self._created[voice], self._idle[voice].qsize()) for voice in self.voices}
+
+    def close(self):
+        """Stop health checks and close every idle synthesizer"""
+        self._stopped.set()
+        for voice, idle in self._idle.items():
+            while True:
+                try:
+                    self._retire(idle.get_nowait())
+                except queue.Empty:
+                    break
+
+    def _new_entry(self, voice):
+        return PooledSynthesizer(self.speech_key, self.region, voice, self.output_format)
+
+    def _create(self, voice):
+        with self._lock:
+            if self._created[voice] >= self.max_size:
+                return None
+            self._created[voice] += 1
+        try:
+            return self._new_entry(voice)
+        except Exception as e:
+            with self._lock:
+                self._created[voice] -= 1
+            logger.warning("Failed to create synthesizer for %s: %s", voice, e)
+            return None
+
+    def _retire(self, entry):
+        with self._lock:
+            self._created[entry.voice] -= 1
+        entry.close()
+
+    def _health_loop(self):
+        while not self._stopped.wait(self.health_interval):
+            for voice, idle in self._idle.items():
+                # Check each idle synthesizer once; busy ones are checked on return
+                entries = []
+                while True:
+                    try:
+                        entries.append(idle.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for entry in entries:
+                    if time.time() - entry.created_at >= self.max_age:
+                        self._retire(entry)
+                        continue
+                    if not entry.connected:
+                        try:
+                            entry.reconnect()
+                        except Exception as e:
+                            logger.warning("Failed to reconnect %s synthesizer: %s", voice, e)
+                            self._retire(entry)
+                            continue
+                    idle.put(entry)
+
+                # Top the voice back up to its warm size
+                while self._created[voice] < self.size and not self._stopped.is_set():
+                    entry = self._create(voice)
+                    if entry is None:
+                        break
+                    idle.put(entry)
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from audio_cache import AudioCache
+
+
+def make_cache():
+    return AudioCache(max_bytes=1024 * 1024, ttl=60)
+
+
+def test_concurrent_callers_share_one_synthesis_and_read_it_as_it_arrives():
+    cache = make_cache()
+    calls = []
+    first_chunk_read = threading.Event()
+
+    def synthesize():
+        calls.append(1)
+        yield b'a'
+        # The second chunk only comes once a reader has seen the first
+        assert first_chunk_read.wait(2)
+        yield b'b'
+
+    owner = cache.stream('key', synthesize)
+    waiter = cache.stream('key', synthesize)
+    assert next(owner) == b'a'
+    assert next(waiter) == b'a'
+    first_chunk_read.set()
+    assert b''.join(waiter) == b'b'
+    assert calls == [1]
+
+
+def test_abandoned_reader_does_not_hold_back_synthesis_or_other_callers():
+    cache = make_cache()
+    owner = cache.stream('key', lambda: iter([b'a', b'b', b'c']))
+    assert next(owner) is not None
+    owner.close()
+    assert b''.join(cache.stream('key', lambda: iter([b'other']))) == b'abc'
+    assert cache.get('key') == b'abc'
+
+
+def test_synthesis_error_reaches_every_caller_and_is_not_cached():
+    cache = make_cache()
+
+    def fail():
+        raise RuntimeError('canceled')
+        yield b''
+
+    with pytest.raises(RuntimeError):
+        b''.join(cache.stream('key', fail))
+    assert cache.get('key') is None
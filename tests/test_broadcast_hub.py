@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+from broadcast_hub import BroadcastHub
+
+
+def test_publish_numbers_messages_from_start():
+    hub = BroadcastHub(4, start=100)
+    assert hub.publish('a') == 101
+    assert hub.publish('b') == 102
+    assert hub.head == 102
+
+
+def test_subscriber_reads_only_messages_after_its_cursor():
+    hub = BroadcastHub(4, start=0)
+    hub.publish('before')
+    cursor = hub.subscribe()
+    hub.publish('a')
+    hub.publish('b')
+    messages, cursor, dropped = hub.read(cursor, timeout=0)
+    assert (messages, cursor, dropped) == (['a', 'b'], 3, 0)
+    assert hub.read(cursor, timeout=0) == ([], 3, 0)
+
+
+def test_slow_subscriber_skips_overwritten_messages():
+    hub = BroadcastHub(3, start=0)
+    cursor = hub.subscribe()
+    for message in 'abcde':
+        hub.publish(message)
+    messages, cursor, dropped = hub.read(cursor, timeout=0)
+    assert messages == ['c', 'd', 'e']
+    assert (cursor, dropped) == (5, 2)
+
+
+def test_recipient_messages_reach_only_that_subscriber():
+    hub = BroadcastHub(4, start=0)
+    hub.publish('for one', recipient='c1')
+    hub.publish('for all')
+    assert hub.read(0, timeout=0, recipient='c1')[0] == ['for one', 'for all']
+    assert hub.read(0, timeout=0, recipient='c2')[0] == ['for all']
+
+
+def test_subscribe_resumes_from_last_seq_within_the_ring():
+    hub = BroadcastHub(4, start=10)
+    for message in 'abc':
+        hub.publish(message)
+    cursor = hub.subscribe(last_seq=11)
+    assert hub.read(cursor, timeout=0)[0] == ['b', 'c']
+
+
+def test_subscribe_ignores_a_foreign_or_future_last_seq():
+    hub = BroadcastHub(4, start=10)
+    hub.publish('a')
+    assert hub.subscribe(last_seq=5) == 11
+    assert hub.subscribe(last_seq=99) == 11
+
+
+def test_resume_past_the_ring_reports_dropped_messages():
+    hub = BroadcastHub(2, start=0)
+    for message in 'abcd':
+        hub.publish(message)
+    messages, _, dropped = hub.read(hub.subscribe(last_seq=0), timeout=0)
+    assert (messages, dropped) == (['c', 'd'], 2)
+
+
+def test_encode_stamps_stored_messages():
+    hub = BroadcastHub(4, encode=lambda seq, message: f'{seq}:{message}', start=0)
+    hub.publish('a')
+    assert hub.read(0, timeout=0)[0] == ['1:a']
+
+
+def test_late_sequence_number_is_stored_without_moving_the_head():
+    hub = BroadcastHub(4, start=0)
+    hub.publish('b', seq=2)
+    hub.publish('a', seq=1)
+    assert hub.head == 2
+    assert hub.read(0, timeout=0)[0] == ['a', 'b']
+    # Older than the ring: discarded
+    hub.publish('c', seq=10)
+    hub.publish('old', seq=3)
+    assert 'old' not in hub.read(6, timeout=0)[0]
+
+
+def test_read_wakes_on_publish_from_another_thread():
+    hub = BroadcastHub(4, start=0)
+    threading.Timer(0.05, hub.publish, args=('a',)).start()
+    assert hub.read(0, timeout=2)[0] == ['a']
+
+
+def test_aread_wakes_on_publish_from_another_thread():
+    hub = BroadcastHub(4, start=0)
+
+    async def read():
+        threading.Timer(0.05, hub.publish, args=('a',)).start()
+        return await hub.aread(0, timeout=2)
+
+    assert asyncio.run(read())[0] == ['a']
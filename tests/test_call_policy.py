@@ -0,0 +1,116 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from call_policy import CLOSED, HALF_OPEN, OPEN, CallPolicy, CircuitBreaker, CircuitOpen
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def throttled():
+    return aiohttp.ClientResponseError(None, (), status=429)
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(2):
+        breaker.record_failure(breaker.allow())
+    assert breaker.state == CLOSED
+    breaker.record_failure(breaker.allow())
+    assert breaker.state == OPEN and breaker.opens == 1
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_half_open_lets_exactly_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure(breaker.allow())
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+
+
+def test_probe_success_closes_and_probe_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure(breaker.allow())
+    breaker.record_failure(breaker.allow())
+    assert breaker.state == OPEN and breaker.opens == 2
+    breaker.record_success(breaker.allow())
+    assert breaker.state == CLOSED and breaker.failures == 0
+    assert breaker.allow() is False
+
+
+def test_only_the_probe_settles_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    stale = breaker.allow()  # Admitted while closed, still in flight
+    breaker.record_failure(breaker.allow())
+    probe = breaker.allow()
+    breaker.release(stale)
+    breaker.record_failure(stale)
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    breaker.release(probe)
+    assert breaker.allow() is True
+
+
+def test_throttling_does_not_open_the_breaker():
+    policy = CallPolicy(retries=5, base_delay=0, breaker=CircuitBreaker(failure_threshold=1))
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        if len(calls) < 3:
+            raise throttled()
+        return 'ok'
+
+    assert run(policy.call(attempt)) == 'ok'
+    assert policy.breaker.state == CLOSED
+    assert policy.throttled == 2
+
+
+def test_retryable_failures_are_retried_until_success():
+    policy = CallPolicy(retries=3, base_delay=0)
+    retries = []
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        if len(calls) < 3:
+            raise aiohttp.ClientConnectionError('reset')
+        return 'ok'
+
+    result = run(policy.call(attempt, on_retry=lambda number, delay, error: retries.append(number)))
+    assert result == 'ok'
+    assert retries == [1, 2]
+    assert policy.breaker.failures == 0
+
+
+def test_non_retryable_errors_are_raised_at_once():
+    policy = CallPolicy(retries=3, base_delay=0)
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        raise aiohttp.ClientResponseError(None, (), status=400)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        run(policy.call(attempt))
+    assert len(calls) == 1
+    assert policy.breaker.failures == 0
+
+
+def test_retries_must_be_at_least_one():
+    with pytest.raises(ValueError):
+        CallPolicy(retries=0)
+
+    async def attempt():
+        return 'ok'
+
+    with pytest.raises(ValueError):
+        run(CallPolicy().call(attempt, retries=0))
@@ -0,0 +1,22 @@
+from interim_translation import InterimTranslations, reusable_translation
+
+
+def translate_hypothesis(interim, language, hypothesis, translation):
+    token = interim.begin(language, hypothesis, now=0.0)
+    assert token is not None
+    interim.complete(language, token, translation, now=0.0)
+
+
+def test_punctuated_final_reuses_interim_translation():
+    interim = InterimTranslations()
+    translate_hypothesis(interim, 'es', 'the lord is my shepherd', 'el señor es mi pastor')
+    reusable = interim.finalize()
+    assert reusable_translation(reusable, 'es', 'The Lord is my shepherd.') == 'el señor es mi pastor'
+
+
+def test_different_final_is_translated_again():
+    interim = InterimTranslations()
+    translate_hypothesis(interim, 'es', 'the lord is my shepherd', 'el señor es mi pastor')
+    reusable = interim.finalize()
+    assert reusable_translation(reusable, 'es', 'The Lord is my shepherd, I shall not want.') is None
+    assert reusable_translation(reusable, 'pt', 'The Lord is my shepherd.') is None
@@ -0,0 +1,29 @@
+from rate_limiter import RateLimiter, ShardedBucket
+
+
+def test_refund_goes_back_to_the_shard_that_paid():
+    bucket = ShardedBucket(rate=0.001, capacity=2, shards=2)
+    home = bucket._home()
+    assert bucket.take() == 0
+    # The home shard is now empty, so this token comes from the other shard
+    assert bucket.take() == 0
+    other = 1 - home
+    assert bucket.shards[other].available() < 0.01
+    bucket.refund()
+    assert bucket.shards[other].available() >= 1
+    assert bucket.shards[home].available() < 0.01
+
+
+def test_single_thread_can_use_every_shard():
+    bucket = ShardedBucket(rate=0.001, capacity=8, shards=4)
+    assert all(bucket.take() == 0 for _ in range(8))
+    assert bucket.take() > 0
+
+
+def test_refused_call_refunds_the_buckets_it_took_from():
+    limiter = RateLimiter('test', per_minute=600, per_client_per_minute=1, burst=1)
+    limiter.try_acquire(client='c1')
+    before = limiter.global_bucket.available()
+    wait, scope = limiter.try_acquire(client='c1')
+    assert wait > 0 and scope == 'client'
+    assert limiter.global_bucket.available() >= before
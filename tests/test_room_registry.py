@@ -0,0 +1,61 @@
+from threading import Barrier, Thread
+
+import pytest
+
+from room_registry import RoomLimitReached, RoomRegistry
+
+
+class FakeRoom:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.closed = False
+
+    def touch(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_factory_runs_outside_the_registry_lock():
+    def factory(session_id):
+        # Would deadlock if the registry still held its lock here
+        with registry._lock:
+            return FakeRoom(session_id)
+
+    registry = RoomRegistry(factory, reap_interval=3600)
+    assert registry.get_or_create('a').session_id == 'a'
+    registry.close()
+
+
+def test_racing_creations_share_one_room_and_close_the_rest():
+    built = []
+    barrier = Barrier(4)
+
+    def factory(session_id):
+        room = FakeRoom(session_id)
+        built.append(room)
+        barrier.wait()
+        return room
+
+    registry = RoomRegistry(factory, reap_interval=3600)
+    results = []
+    threads = [Thread(target=lambda: results.append(registry.get_or_create('a'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(room) for room in results}) == 1
+    assert [room.closed for room in built].count(False) == 1
+    assert not results[0].closed
+    registry.close()
+
+
+def test_limit_is_enforced():
+    registry = RoomRegistry(FakeRoom, max_rooms=1, reap_interval=3600)
+    registry.get_or_create('a')
+    with pytest.raises(RoomLimitReached):
+        registry.get_or_create('b')
+    assert registry.get_or_create('a').session_id == 'a'
+    registry.close()
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('azure.cognitiveservices.speech')
+
+from synthesizer_pool import SynthesizerPool  # noqa: E402
+
+VOICE = 'es-ES-AlvaroNeural'
+
+
+class FailingReconnect(Exception):
+    pass
+
+
+class FakeEntry:
+    def __init__(self, voice):
+        self.voice = voice
+        self.created_at = float('inf')
+        self.connected = True
+        self.synthesizer = object()
+
+    def reconnect(self):
+        raise FailingReconnect()
+
+    def close(self):
+        pass
+
+
+class OfflinePool(SynthesizerPool):
+    """A pool whose synthesizers never talk to the Speech service"""
+
+    def _new_entry(self, voice):
+        return FakeEntry(voice)
+
+
+def test_failed_reconnect_gives_the_slot_back():
+    pool = OfflinePool('key', 'region', [VOICE], output_format=None, size=1, max_size=1, checkout_timeout=0.01)
+    pool.warm()
+    entry = pool.checkout(VOICE)
+    pool.release(entry)
+
+    entry.connected = False
+    with pytest.raises(FailingReconnect):
+        pool.checkout(VOICE)
+    assert pool.stats()[VOICE] == (0, 0)
+
+    # A fresh synthesizer takes the freed slot
+    replacement = pool.checkout(VOICE)
+    assert replacement is not entry
+    pool.release(replacement)
+    pool.close()
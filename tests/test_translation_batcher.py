@@ -0,0 +1,112 @@
+import asyncio
+
+import aiohttp
+
+from call_policy import CLOSED, CallPolicy, CircuitBreaker
+from translator_client import TranslationBatcher
+
+
+class FakeClient:
+    """Records each /translate request and answers "[<to>] <text>" for every pair"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def post(self, path, params, body):
+        languages = [value for key, value in params if key == 'to']
+        texts = [item['text'] for item in body]
+        self.requests.append((languages, texts))
+        return [{'translations': [{'text': f'[{language}] {text}'} for language in languages]} for text in texts]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_texts_are_sent_only_to_the_languages_asked_for_them():
+    client = FakeClient()
+
+    async def translate():
+        batcher = TranslationBatcher(client)
+        return await asyncio.gather(
+            batcher.translate('a', 'es'),
+            batcher.translate('b', 'pt-BR'),
+            batcher.translate('c', 'id'),
+        )
+
+    assert run(translate()) == ['[es] a', '[pt-BR] b', '[id] c']
+    assert sorted(client.requests) == [(['es'], ['a']), (['id'], ['c']), (['pt-BR'], ['b'])]
+
+
+def test_texts_wanting_the_same_languages_share_one_request():
+    client = FakeClient()
+
+    async def translate():
+        batcher = TranslationBatcher(client)
+        return await asyncio.gather(
+            *(batcher.translate(text, language) for text in ('a', 'b') for language in ('es', 'id'))
+        )
+
+    assert run(translate()) == ['[es] a', '[id] a', '[es] b', '[id] b']
+    assert client.requests == [(['es', 'id'], ['a', 'b'])]
+
+
+def test_identical_requests_share_one_translation():
+    client = FakeClient()
+    results = []
+
+    async def translate():
+        batcher = TranslationBatcher(client, on_result=lambda *pair: results.append(pair))
+        return await asyncio.gather(batcher.translate('a', 'es'), batcher.translate('a', 'es'))
+
+    assert run(translate()) == ['[es] a', '[es] a']
+    assert client.requests == [(['es'], ['a'])]
+    assert results == [('a', 'es', '[es] a')]
+
+
+def test_batch_is_flushed_before_exceeding_the_character_limit():
+    client = FakeClient()
+
+    async def translate():
+        batcher = TranslationBatcher(client, window=0.05)
+        batcher.MAX_CHARACTERS = 10
+        return await asyncio.gather(batcher.translate('aaaaaa', 'es'), batcher.translate('bbbbbb', 'es'))
+
+    run(translate())
+    assert client.requests == [(['es'], ['aaaaaa']), (['es'], ['bbbbbb'])]
+
+
+def test_failed_request_fails_every_waiter():
+    class FailingClient:
+        async def post(self, path, params, body):
+            raise ConnectionError('down')
+
+    async def translate():
+        batcher = TranslationBatcher(FailingClient())
+        return await asyncio.gather(batcher.translate('a', 'es'), batcher.translate('b', 'id'),
+                                    return_exceptions=True)
+
+    assert all(isinstance(result, ConnectionError) for result in run(translate()))
+
+
+def test_policy_sees_one_outcome_per_request_and_retries_the_same_batch():
+    class FlakyClient(FakeClient):
+        async def post(self, path, params, body):
+            if not self.requests:
+                self.requests.append(None)
+                raise aiohttp.ClientConnectionError('reset')
+            return await super().post(path, params, body)
+
+    client = FlakyClient()
+    policy = CallPolicy(retries=2, base_delay=0, breaker=CircuitBreaker(failure_threshold=2))
+    retries = []
+
+    async def translate():
+        batcher = TranslationBatcher(client, policy=policy,
+                                     on_retry=lambda *args: retries.append(args[:2]))
+        return await asyncio.gather(*(batcher.translate(text, 'es') for text in ('a', 'b', 'c')))
+
+    assert run(translate()) == ['[es] a', '[es] b', '[es] c']
+    assert client.requests == [None, (['es'], ['a', 'b', 'c'])]
+    assert retries == [(('es',), 1)]
+    assert policy.breaker.state == CLOSED
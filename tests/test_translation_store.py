@@ -0,0 +1,36 @@
+from translation_store import PersistentTranslationCache
+
+
+def make_store(tmp_path, **kwargs):
+    return PersistentTranslationCache(str(tmp_path / 'translations.db'), flush_interval=0.01, **kwargs)
+
+
+def test_prune_evicts_least_used_rows_beyond_the_cap(tmp_path):
+    # Uncapped while filling, so the writer does not prune on its own
+    store = make_store(tmp_path, max_rows=0)
+    for i in range(20):
+        store.put(f'text {i}', 'es', f'texto {i}')
+    store.close()
+
+    store = make_store(tmp_path, max_rows=0)
+    for i in range(5):
+        store.touch(f'text {i}', 'es')
+    store.close()
+
+    store = make_store(tmp_path, max_rows=10)
+    assert store.prune() == 11
+    kept = {text for text, _, _ in store.hottest(100)}
+    assert len(kept) == 9
+    assert {f'text {i}' for i in range(5)} <= kept
+    assert store.prune() == 0
+    store.close()
+
+
+def test_hottest_uses_the_hits_index(tmp_path):
+    store = make_store(tmp_path)
+    plan = store._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT text, language, translation FROM translations "
+        "ORDER BY hits DESC, updated_at DESC LIMIT 10"
+    ).fetchall()
+    store.close()
+    assert any('translations_by_use' in row[-1] for row in plan)
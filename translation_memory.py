@@ -0,0 +1,82 @@
+import csv
+import glob
+import logging
+import os
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+
+@lru_cache(maxsize=1024)
+def memory_key(text):
+    """Lowercase, punctuation-free, single-spaced form of a line, so recognizer output matches curated text"""
+    return ' '.join(_PUNCTUATION.sub(' ', text.lower()).split())
+
+
+class TranslationMemory:
+    """Approved translations of fixed texts (prayers, creeds, hymns, announcements).
+
+    Loaded from every *.csv file in a directory. The header names the language of
+    each column, e.g. `en,es,pt,yue,id`; each row is one line of text, given in the
+    `source` language column and in any of the others (empty cells are skipped).
+    Lines are indexed both as written and by `memory_key`, so a lookup is one or two
+    dict accesses. Later files override earlier ones.
+    """
+
+    def __init__(self, source='en'):
+        self.source = source
+        self._exact = {}       # (text, language) -> translation
+        self._normalized = {}  # (memory_key(text), language) -> translation
+        self.files = 0
+
+    def __len__(self):
+        return len(self._exact)
+
+    def load_directory(self, path):
+        """Load every CSV file in `path` in name order; returns the number of entries added"""
+        added = 0
+        for filename in sorted(glob.glob(os.path.join(path, '*.csv'))):
+            added += self.load_file(filename)
+        return added
+
+    def load_file(self, filename):
+        with open(filename, newline='', encoding='utf-8-sig') as csv_file:
+            reader = csv.DictReader(csv_file)
+            if not reader.fieldnames or self.source not in reader.fieldnames:
+                logger.error("Translation memory file %s has no '%s' column, skipped", filename, self.source)
+                return 0
+            added = 0
+            for row in reader:
+                text = (row.get(self.source) or '').strip()
+                if not text:
+                    continue
+                for language, translation in row.items():
+                    translation = (translation or '').strip()
+                    if language is None or language == self.source or not translation:
+                        continue
+                    self.add(text, language.strip(), translation)
+                    added += 1
+        self.files += 1
+        logger.info("Loaded %s translation memory entries from %s", added, filename)
+        return added
+
+    def add(self, text, language, translation):
+        self._exact[(text, language)] = translation
+        self._normalized[(memory_key(text), language)] = translation
+
+    def lookup(self, text, language):
+        """Return the approved translation of `text`, or None"""
+        translation = self._exact.get((text, language))
+        if translation is None:
+            translation = self._normalized.get((memory_key(text), language))
+        return translation
+
+    def counts(self):
+        """{language: number of entries}"""
+        counts = {}
+        for _, language in self._exact:
+            counts[language] = counts.get(language, 0) + 1
+        return counts
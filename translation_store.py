@@ -0,0 +1,190 @@
+import logging
+import os
+import queue
+import sqlite3
+import time
+from threading import Thread, local
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentTranslationCache:
+    """Durable translation cache on local disk, shared by every worker on the machine.
+
+    Entries live in a SQLite database in WAL mode, keyed by normalized text and
+    language. Reads use one connection per thread and never wait on a Python lock
+    (WAL readers do not block each other or the writer). Writes and hit counts are
+    queued and committed in batches by a single background thread, so request threads
+    never wait on disk.
+
+    The table is capped at `max_rows`: every `prune_interval` seconds the writer
+    deletes the least used entries (fewest hits, then least recently used) down to
+    90% of the cap. Hits refresh `updated_at`, and an index on (hits, updated_at)
+    serves both eviction and `hottest`.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS translations (
+            text TEXT NOT NULL,
+            language TEXT NOT NULL,
+            translation TEXT NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (text, language)
+        ) WITHOUT ROWID
+    """
+    INDEX = "CREATE INDEX IF NOT EXISTS translations_by_use ON translations (hits, updated_at)"
+
+    def __init__(self, path, flush_interval=1.0, batch_size=500, max_rows=200000, prune_interval=60):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self.evicted = 0
+        self._pruned_at = 0.0
+        self._local = local()
+        self._writes = queue.Queue()
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(self.SCHEMA)
+        conn.execute(self.INDEX)
+        conn.commit()
+
+        self._writer = Thread(target=self._write_loop, name='translation-store-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, text, language):
+        """Return the stored translation or None"""
+        try:
+            row = self._connect().execute(
+                "SELECT translation FROM translations WHERE text = ? AND language = ?",
+                (text, language)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Translation store read failed: %s", e)
+            return None
+        if row is None:
+            return None
+        self.touch(text, language)
+        return row[0]
+
+    def touch(self, text, language):
+        """Count a cache hit so warm-up can prefer the most used entries"""
+        if not self._closed:
+            self._writes.put(('hit', text, language, None))
+
+    def put(self, text, language, translation):
+        """Queue a translation to be written with the next batch"""
+        if not self._closed:
+            self._writes.put(('put', text, language, translation))
+
+    def hottest(self, limit):
+        """Return up to `limit` (text, language, translation) rows, most used first"""
+        try:
+            return self._connect().execute(
+                "SELECT text, language, translation FROM translations "
+                "ORDER BY hits DESC, updated_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Translation store warm-up read failed: %s", e)
+            return []
+
+    def _write_loop(self):
+        while True:
+            try:
+                batch = [self._writes.get()]
+            except Exception:
+                return
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._writes.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            stop = any(op is None for op in batch)
+            self._write_batch([op for op in batch if op is not None])
+            if stop:
+                return
+            if time.monotonic() - self._pruned_at >= self.prune_interval:
+                self._pruned_at = time.monotonic()
+                self.prune()
+
+    def prune(self):
+        """Delete the least used entries once the table holds more than `max_rows`; returns how many"""
+        if not self.max_rows:
+            return 0
+        try:
+            conn = self._connect()
+            rows = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if rows <= self.max_rows:
+                return 0
+            excess = rows - int(self.max_rows * 0.9)
+            with conn:
+                deleted = conn.execute(
+                    "DELETE FROM translations WHERE (text, language) IN ("
+                    "SELECT text, language FROM translations ORDER BY hits, updated_at LIMIT ?)",
+                    (excess,)
+                ).rowcount
+        except sqlite3.Error as e:
+            logger.warning("Translation store eviction failed: %s", e)
+            return 0
+        self.evicted += deleted
+        logger.info("Evicted %s least used translations from the store (%s rows)", deleted, rows)
+        return deleted
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        now = time.time()
+        puts = {}
+        hits = {}
+        for kind, text, language, translation in batch:
+            if kind == 'put':
+                puts[(text, language)] = translation
+            else:
+                hits[(text, language)] = hits.get((text, language), 0) + 1
+
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO translations (text, language, translation, hits, updated_at) "
+                    "VALUES (?, ?, ?, 0, ?) "
+                    "ON CONFLICT (text, language) DO UPDATE SET "
+                    "translation = excluded.translation, updated_at = excluded.updated_at",
+                    [(text, language, translation, now) for (text, language), translation in puts.items()]
+                )
+                conn.executemany(
+                    "UPDATE translations SET hits = hits + ?, updated_at = ? WHERE text = ? AND language = ?",
+                    [(count, now, text, language) for (text, language), count in hits.items()]
+                )
+        except sqlite3.Error as e:
+            logger.warning("Translation store write of %s entries failed: %s", len(batch), e)
+
+    def close(self, timeout=5):
+        """Flush queued writes and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._writes.put(None)
+        self._writer.join(timeout)
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import os
+from functools import partial
+from threading import Lock, Thread
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+class TranslatorClient:
+    """Keep-alive connection pool to the Translator API, owned by one background event loop.
+
+    Flask handlers run in worker threads (and async views get a throwaway loop per
+    request), so a session created there cannot be reused. Instead this client runs a
+    single asyncio loop in a daemon thread per process; callers submit coroutines to it
+    and the shared aiohttp session keeps connections, TLS sessions and DNS answers warm
+    between requests.
+    """
+
+    def __init__(self, endpoint, key, region, pool_size=100, pool_size_per_host=0,
+                 dns_ttl=300, keepalive_timeout=60, request_timeout=10):
+        self.endpoint = endpoint
+        self.headers = {
+            'Ocp-Apim-Subscription-Key': key,
+            'Ocp-Apim-Subscription-Region': region,
+            'Content-type': 'application/json'
+        }
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._pid = None
+        self._start_lock = Lock()
+
+    @property
+    def loop(self):
+        """The background event loop, started on first use (and again after a fork)"""
+        if self._loop is None or self._pid != os.getpid():
+            with self._start_lock:
+                if self._loop is None or self._pid != os.getpid():
+                    self._start()
+        return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        thread = Thread(target=loop.run_forever, name='translator-loop', daemon=True)
+        thread.start()
+        self._loop, self._thread, self._session, self._pid = loop, thread, None, os.getpid()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the background loop and return a concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the background loop and block until it finishes"""
+        return self.submit(coro).result(timeout)
+
+    async def get_session(self):
+        """Return the shared session, creating it on the background loop if needed"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self._session
+
+    async def post(self, path, params, body):
+        """POST a JSON body to the Translator API and return the decoded JSON response"""
+        session = await self.get_session()
+        async with session.post(f'{self.endpoint}{path}', params=params, json=body) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def close(self, timeout=5):
+        """Close the pooled session and stop the background loop"""
+        if self._loop is None or self._pid != os.getpid():
+            return
+
+        async def _close_session():
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+
+        try:
+            self.run(_close_session(), timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+
+class TranslationBatcher:
+    """Coalesces concurrent translation requests into multi-element, multi-target API calls.
+
+    Requests arriving within `window` seconds of the first pending one are sent together.
+    Texts are grouped by the set of languages asked for them, and each group is one call:
+    every text becomes one element of the body and every language one `to=` parameter,
+    so only requested (text, language) pairs are translated and billed. The response is
+    demultiplexed back to each waiting caller, and `on_result(text, language, translation)`
+    is called for every pair so the caller can cache them.
+
+    With a `policy` (a call_policy.CallPolicy), each request is made under it, so
+    retries resend the same batch and the circuit breaker sees one outcome per
+    upstream request rather than one per waiting caller. `on_retry(languages,
+    attempt, delay, error)` is called before each retry.
+    All methods must run on the client's event loop.
+    """
+
+    MAX_ELEMENTS = 100        # Translator v3 limit on array elements per request
+    MAX_CHARACTERS = 50000    # Translator v3 limit on characters per request, across all targets
+
+    def __init__(self, client, window=0.005, max_segments=MAX_ELEMENTS, on_result=None,
+                 policy=None, retries=None, hedge=True, on_retry=None):
+        self.client = client
+        self.window = window
+        self.max_segments = min(max_segments, self.MAX_ELEMENTS)
+        self.on_result = on_result
+        self.policy = policy
+        self.retries = retries
+        self.hedge = hedge
+        self.on_retry = on_retry
+        self._waiters = {}    # text -> {language: [futures]}
+        self._characters = 0  # Billed characters pending: each text once per requested language
+        self._flush_handle = None
+
+    async def translate(self, text, language):
+        """Queue a text for translation into an API language code and await the result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        pending = self._waiters.get(text)
+        if pending is None or language not in pending:
+            if self._waiters and self._characters + len(text) > self.MAX_CHARACTERS:
+                self._flush()
+                pending = None
+            if pending is None:
+                pending = self._waiters[text] = {}
+            self._characters += len(text)
+        pending.setdefault(language, []).append(future)
+
+        if len(self._waiters) >= self.max_segments:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._waiters:
+            return
+
+        waiters = self._waiters
+        self._waiters, self._characters = {}, 0
+        groups = {}
+        for text, pending in waiters.items():
+            groups.setdefault(tuple(sorted(pending)), {})[text] = pending
+        for languages, group in groups.items():
+            asyncio.ensure_future(self._send(group, languages))
+
+    async def _send(self, waiters, languages):
+        texts = list(waiters)
+        params = [('api-version', '3.0')] + [('to', language) for language in languages]
+        body = [{'text': text} for text in texts]
+
+        def attempt():
+            return self.client.post('/translate', params, body)
+
+        try:
+            if self.policy is None:
+                result = await attempt()
+            else:
+                on_retry = partial(self.on_retry, languages) if self.on_retry else None
+                result = await self.policy.call(attempt, retries=self.retries, hedge=self.hedge, on_retry=on_retry)
+        except Exception as e:
+            for pending in waiters.values():
+                for futures in pending.values():
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+            return
+
+        for text, item in zip(texts, result):
+            # Translations come back in the same order as the `to=` parameters
+            for language, translated in zip(languages, item['translations']):
+                translation = translated['text']
+                if self.on_result:
+                    try:
+                        self.on_result(text, language, translation)
+                    except Exception as e:
+                        logger.warning("Error handling batched translation result: %s", e)
+                for future in waiters[text].get(language, ()):
+                    if not future.done():
+                        future.set_result(translation)
+
+        for pending in waiters.values():
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(ValueError("Translation missing from API response"))
@@ -0,0 +1,100 @@
+import re
+import time
+
+SENTENCE_END = re.compile(r'[.!?;。！？…]["\'”’)\]]*$')
+
+
+class _Pending:
+    __slots__ = ('texts', 'started')
+
+    def __init__(self, started):
+        self.texts = []
+        self.started = started
+
+
+class UtteranceCoalescer:
+    """Joins consecutive final utterances per key into one translation request.
+
+    The first final for a key opens a window; finals added before it closes are
+    appended. When the window closes the joined text is flushed if it ends at a
+    sentence boundary, otherwise the flush waits for the sentence to end, up to
+    `max_window` after the first final. Nothing is ever discarded.
+
+    The window adapts to the speaker and the API. While finals arrive less than
+    `max_window` apart it is a little longer than the typical gap between them, so
+    the next final is caught; for slower speech it is half the typical API latency,
+    which overlaps the wait with the previous call. Either way it is clamped to
+    [`min_window`, `max_window`].
+
+    State lives on the event loop returned by `get_loop`, so `flush(key, text)` is
+    called there and may return a coroutine; `add` is safe from any thread.
+    """
+
+    def __init__(self, get_loop, flush, min_window=0.2, max_window=2.5, smoothing=0.2):
+        self.get_loop = get_loop
+        self.flush = flush
+        self.min_window = min_window
+        self.max_window = max_window
+        self.smoothing = smoothing
+        self.gap = None        # smoothed seconds between distinct finals
+        self.latency = None    # smoothed seconds per flushed translation
+        self.flushes = 0
+        self.coalesced = 0     # finals merged into another final's request
+        self._pending = {}
+        self._last_text = None
+        self._last_at = None
+
+    def add(self, key, text):
+        loop = self.get_loop()
+        loop.call_soon_threadsafe(self._add, loop, key, text, time.monotonic())
+
+    def observe_latency(self, seconds):
+        """Feed back how long a flushed request took (call on the loop)"""
+        self.latency = self._smooth(self.latency, seconds)
+
+    @property
+    def window(self):
+        if self.gap is not None and self.gap * 1.2 <= self.max_window:
+            window = self.gap * 1.2
+        elif self.latency is not None:
+            window = self.latency * 0.5
+        else:
+            window = self.min_window
+        return min(self.max_window, max(self.min_window, window))
+
+    def _smooth(self, current, sample):
+        if current is None:
+            return sample
+        return current + self.smoothing * (sample - current)
+
+    def _add(self, loop, key, text, now):
+        # Every listener posts the same transcript, so only distinct finals measure the pace
+        if text != self._last_text:
+            if self._last_at is not None:
+                # A long pause says nothing about pace, so it only counts as a slow gap
+                self.gap = self._smooth(self.gap, min(now - self._last_at, self.max_window * 2))
+            self._last_text, self._last_at = text, now
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending(now)
+            loop.call_later(self.window, self._due, loop, key)
+        else:
+            self.coalesced += 1
+        pending.texts.append(text)
+
+    def _due(self, loop, key):
+        pending = self._pending.get(key)
+        if pending is None:
+            return
+        text = ' '.join(pending.texts)
+        remaining = pending.started + self.max_window - time.monotonic()
+        if remaining > 0 and not SENTENCE_END.search(text):
+            loop.call_later(min(remaining, self.window), self._due, loop, key)
+            return
+        del self._pending[key]
+        self.flushes += 1
+        result = self.flush(key, text)
+        if result is not None:
+            loop.create_task(result)
+